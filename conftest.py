@@ -1,6 +1,31 @@
 import os
 import django
+import pytest
 
 def pytest_configure():
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
     django.setup()
+
+
+@pytest.fixture(autouse=True)
+def _limpar_cache():
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _snapshots_isolados(settings, tmp_path):
+    settings.ESCOLA_SNAPSHOT_DIR = str(tmp_path / 'snapshots')
+
+
+@pytest.fixture(autouse=True)
+def _instrumentacao_isolada(settings, tmp_path):
+    from escola import instrumentation
+    settings.ESCOLA_INSTRUMENTACAO_DIR = str(tmp_path / 'instrumentacao')
+    instrumentation.buffer().clear()
+
+
+@pytest.fixture(autouse=True)
+def _relatorio_sem_pool(settings):
+    # o pool de escola.assincrono usa outras conexões, que não enxergam a transação do teste
+    settings.ESCOLA_THREADS_RELATORIO = 0
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from escola.models import aluno, conteudo, professor, agendamento
+from escola.admin import AgendamentoAdmin, AlunoAdmin, ConteudoAdmin, ProfessorAdmin
 from django.contrib.auth.models import Group, User
 from django.contrib.auth.admin import UserAdmin
 
@@ -8,10 +9,10 @@ class CustomAdminSite(admin.AdminSite):
 
 admin_site = CustomAdminSite()
 
-admin_site.register(professor.Professor)
-admin_site.register(agendamento.Agendamento)
-admin_site.register(aluno.Aluno)
-admin_site.register(conteudo.Conteudo)
+admin_site.register(professor.Professor, ProfessorAdmin)
+admin_site.register(agendamento.Agendamento, AgendamentoAdmin)
+admin_site.register(aluno.Aluno, AlunoAdmin)
+admin_site.register(conteudo.Conteudo, ConteudoAdmin)
 
 admin_site.register(User, UserAdmin)
-admin_site.register(Group)
\ No newline at end of file
+admin_site.register(Group)
@@ -0,0 +1,27 @@
+"""
+Perfil de deploy ASGI: gunicorn gerencia processos uvicorn (core.asgi). As views JSON e de
+polling assíncronas (feed, alunos, relatório) esperam banco e cache sem prender um worker,
+então poucos processos atendem centenas de conexões abertas.
+
+    gunicorn -c core/gunicorn_asgi.py core.asgi:application
+
+O perfil síncrono continua sendo `gunicorn core.wsgi` (ver escola.carga para comparar os dois).
+"""
+import multiprocessing
+import os
+
+# Sob ASGI cada requisição usa uma thread diferente do pool do asgiref, e conexões
+# persistentes ficariam presas a threads ociosas: sem pool externo (pgbouncer), feche ao fim.
+os.environ.setdefault("CONN_MAX_AGE", "0")
+# Vários processos: as versões dos caches precisam de um cache compartilhado (ver core/settings.py).
+os.environ.setdefault("ESCOLA_CACHE_COMPARTILHADO", "1")
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+worker_class = "uvicorn_worker.UvicornWorker"
+# long-poll (feed/?esperar=) e SSE (feed/eventos/) ficam abertos por até alguns minutos
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 330))
+graceful_timeout = 30
+keepalive = 5
+max_requests = 5000
+max_requests_jitter = 500
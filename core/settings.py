@@ -28,11 +28,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  
+    'escola.middleware.ArquivosEstaticosMiddleware',  # WhiteNoise, também assíncrono
+    'escola.middleware.InstrumentacaoMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'escola.middleware.PapelMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,7 +64,11 @@ WSGI_APPLICATION = 'core.wsgi.application'
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=True)
+        # sob ASGI (core/gunicorn_asgi.py) cada requisição pode usar outra thread: conexões
+        # persistentes ficariam abertas por thread, então o perfil ASGI usa CONN_MAX_AGE=0
+        'default': dj_database_url.parse(
+            DATABASE_URL, conn_max_age=int(os.environ.get('CONN_MAX_AGE', 600)), ssl_require=True,
+        )
     }
 else:
     DATABASES = {
@@ -73,6 +79,37 @@ else:
     }
 
 
+# CACHE
+
+# As versões dos caches derivados (escola.versoes: lista de alunos, painéis da home, seções do
+# relatório) precisam ser as mesmas em todos os processos: com vários workers (gunicorn), um
+# LocMemCache por processo faria cada worker enxergar só as trocas que ele mesmo fez.
+# REDIS_URL usa o Redis (incr atômico); sem ele, em produção e no perfil ASGI
+# (core/gunicorn_asgi.py liga ESCOLA_CACHE_COMPARTILHADO) fica a tabela do banco, criada por
+# `manage.py createcachetable`. LocMemCache só para um processo (runserver, testes).
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 20000))
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL},
+    }
+elif not DEBUG or os.environ.get('ESCOLA_CACHE_COMPARTILHADO'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'escola_cache',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        },
+    }
+
+
 # STATIC FILES
 
 STATIC_URL = '/static/'
@@ -81,6 +118,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # WhiteNoise para servir arquivos estáticos no Render
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Arquivos gerados (relatórios dos ReportJobs); servidos só pela view de download
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Arquivo colunar dos agendamentos por mês (ver escola.snapshots / snapshot_agendamentos)
+ESCOLA_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+
+# Amostras da instrumentação por requisição, um arquivo por processo (ver escola.instrumentation)
+ESCOLA_INSTRUMENTACAO_DIR = os.path.join(BASE_DIR, 'instrumentacao')
+ESCOLA_INSTRUMENTACAO_TAXA = float(os.environ.get('ESCOLA_INSTRUMENTACAO_TAXA', 0.2))
+
+# Threads por processo para agregações do relatório chamadas de views assíncronas
+# (ver escola.assincrono); 0 roda na thread da própria requisição
+ESCOLA_THREADS_RELATORIO = int(os.environ.get('ESCOLA_THREADS_RELATORIO', 4))
+
 
 # LOGIN SETTINGS
 
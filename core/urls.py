@@ -6,6 +6,7 @@ urlpatterns = [
     path('agendamentos/', include('escola.routers.agendamento_urls', namespace='agendamentos')),
     path('alunos/', include('escola.routers.aluno_urls', namespace='alunos')),
     path('relatorios/', include('escola.routers.relatorio_urls', namespace='relatorios')),
+    path('instrumentacao/', include('escola.routers.instrumentacao_urls', namespace='instrumentacao')),
     path('', include('escola.routers.login_urls', namespace='login'))
 ]
 
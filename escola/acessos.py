@@ -0,0 +1,108 @@
+"""
+Sincronização em lote dos grupos (Diretoria, Coordenação, Professor), das permissões de
+cada grupo e dos perfis de Professor. Cada etapa compara o estado desejado com o atual
+em poucas queries por conjunto e só grava a diferença (bulk_create na tabela de ligação
+ou de Professor); rodar de novo sem mudanças não escreve nada.
+Usada no post_migrate e pelo comando `sync_professional_groups`.
+"""
+from typing import NamedTuple
+
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+
+from escola import dashboard, roles
+from escola.models.professor import Professor
+
+# grupo -> codenames das permissões; None = todas as permissões do projeto
+PERMISSOES_POR_GRUPO = {
+    roles.GRUPO_DIRETORIA: None,
+    roles.GRUPO_COORDENACAO: [
+        'add_agendamento', 'change_agendamento', 'delete_agendamento', 'view_agendamento',
+        'add_aluno', 'change_aluno', 'delete_aluno', 'view_aluno', 'view_relatorio', 'export_relatorio',
+    ],
+    roles.GRUPO_PROFESSOR: ['view_agendamento', 'view_aluno', 'change_agendamento'],
+}
+
+
+class ResultadoGrupos(NamedTuple):
+    grupos_criados: int
+    permissoes_adicionadas: int
+    permissoes_removidas: int
+
+
+class ResultadoProfessores(NamedTuple):
+    usuarios_vinculados: int  # usuários de Professor.user colocados no grupo Professor
+    professores_criados: int  # perfis criados para usuários do grupo sem Professor
+
+
+def garantir_grupos(nomes):
+    """({nome: pk}, quantos foram criados), criando os grupos que faltam de uma vez."""
+    existentes = dict(Group.objects.filter(name__in=nomes).values_list('name', 'pk'))
+    faltando = [Group(name=nome) for nome in nomes if nome not in existentes]
+    if faltando:
+        Group.objects.bulk_create(faltando, ignore_conflicts=True)
+        existentes = dict(Group.objects.filter(name__in=nomes).values_list('name', 'pk'))
+    return existentes, len(faltando)
+
+
+@transaction.atomic
+def sincronizar_grupos():
+    """Cria os grupos que faltam e deixa as permissões de cada um iguais a PERMISSOES_POR_GRUPO."""
+    grupos, criados = garantir_grupos(list(PERMISSOES_POR_GRUPO))
+    todas = list(Permission.objects.values_list('pk', 'codename'))
+    desejadas = {
+        (grupos[nome], pk)
+        for nome, codenames in PERMISSOES_POR_GRUPO.items()
+        for pk, codename in todas
+        if codenames is None or codename in codenames
+    }
+
+    Ligacao = Group.permissions.through
+    atuais = set(Ligacao.objects.filter(group_id__in=grupos.values()).values_list('group_id', 'permission_id'))
+    adicionar, remover = desejadas - atuais, atuais - desejadas
+    if adicionar:
+        Ligacao.objects.bulk_create(
+            [Ligacao(group_id=grupo_id, permission_id=pk) for grupo_id, pk in adicionar], ignore_conflicts=True,
+        )
+    for grupo_id in {grupo_id for grupo_id, _ in remover}:
+        Ligacao.objects.filter(
+            group_id=grupo_id, permission_id__in=[pk for g, pk in remover if g == grupo_id],
+        ).delete()
+    return ResultadoGrupos(criados, len(adicionar), len(remover))
+
+
+def _nome(first_name, last_name, username):
+    # mesmo critério de User.get_full_name() or username
+    return f'{first_name} {last_name}'.strip() or username
+
+
+@transaction.atomic
+def sincronizar_professores():
+    """
+    Coloca no grupo Professor os usuários ligados a um Professor e cria o Professor dos
+    usuários do grupo que ainda não têm perfil. Como bulk_create não dispara signals,
+    invalida aqui o papel dos usuários alterados e, se houver perfis novos, os painéis.
+    """
+    grupos, _ = garantir_grupos([roles.GRUPO_PROFESSOR])
+    grupo_id = grupos[roles.GRUPO_PROFESSOR]
+    Ligacao = User.groups.through
+
+    vinculados = set(Professor.objects.filter(user__isnull=False).values_list('user_id', flat=True))
+    no_grupo = set(Ligacao.objects.filter(group_id=grupo_id).values_list('user_id', flat=True))
+    adicionar = vinculados - no_grupo
+    if adicionar:
+        Ligacao.objects.bulk_create(
+            [Ligacao(user_id=user_id, group_id=grupo_id) for user_id in adicionar], ignore_conflicts=True,
+        )
+
+    sem_perfil = User.objects.filter(groups=grupo_id, professor_profile__isnull=True).values_list(
+        'pk', 'first_name', 'last_name', 'username',
+    )
+    novos = [Professor(user_id=pk, nome=_nome(first, last, username)) for pk, first, last, username in sem_perfil]
+    if novos:
+        Professor.objects.bulk_create(novos)
+        dashboard.invalidar_cadastros()
+
+    alterados = adicionar | {professor.user_id for professor in novos}
+    roles.invalidar(*alterados)
+    return ResultadoProfessores(len(adicionar), len(novos))
@@ -1,28 +1,55 @@
 from django.contrib import admin
-from .models import agendamento, aluno, conteudo, professor
+from .models import professor
+from .pagination import PaginatorEstimado
 
-@admin.register(aluno.Aluno)
-class AlunoAdmin(admin.ModelAdmin):
+# Registrados no admin_site de core.admin, o que está nas URLs.
+
+
+class ListaGrandeAdmin(admin.ModelAdmin):
+    """Listas de tabelas grandes: sem o COUNT(*) da tabela inteira e com contagem estimada no Postgres."""
+    paginator = PaginatorEstimado
+    show_full_result_count = False
+
+
+class ProfessorListFilter(admin.RelatedFieldListFilter):
+    """Filtro por professor sem uma query de usuário por opção (Professor.__str__ usa o user)."""
+
+    def field_choices(self, field, request, model_admin):
+        return [(p.pk, str(p)) for p in professor.Professor.objects.select_related('user').order_by('nome')]
+
+
+class AlunoAdmin(ListaGrandeAdmin):
     list_display = ('id', 'nome', 'serie', 'turno','telefone')
     search_fields = ('nome', 'serie', 'turno',"telefone")
+    ordering = ('nome',)
 
 
-@admin.register(conteudo.Conteudo)
 class ConteudoAdmin(admin.ModelAdmin):
     list_display = ('id', 'nome', 'duracao_minutos', 'descricao','descritor')
     search_fields = ('nome','duracao_minutos', 'descricao','descritor')
+    ordering = ('nome',)
 
 
-@admin.register(professor.Professor)
 class ProfessorAdmin(admin.ModelAdmin):
     list_display = ('id', 'nome', 'user', 'especialidade')
     search_fields = ('nome', 'especialidade', 'user__username')
+    autocomplete_fields = ('user',)
+    ordering = ('nome',)
 
+    def get_queryset(self, request):
+        # também usado pelo autocomplete dos agendamentos
+        return super().get_queryset(request).select_related('user')
 
-@admin.register(agendamento.Agendamento)
-class AgendamentoAdmin(admin.ModelAdmin):
+
+class AgendamentoAdmin(ListaGrandeAdmin):
     list_display = ('id', 'aluno', 'conteudo', 'professor', 'inicio', 'status')
-    list_filter = ('status', 'professor', 'conteudo')
+    list_filter = ('status', ('professor', ProfessorListFilter), 'conteudo')
+    list_select_related = ('aluno', 'conteudo', 'professor__user')
     search_fields = ('aluno__nome', 'professor__nome', 'conteudo__nome')
+    autocomplete_fields = ('aluno', 'conteudo', 'professor')
     ordering = ('-inicio',)
     date_hierarchy = 'inicio'
+
+    def get_queryset(self, request):
+        # change form/exclusão usam __str__ (aluno, conteúdo) e o do professor (user)
+        return super().get_queryset(request).select_related('aluno', 'conteudo', 'professor__user')
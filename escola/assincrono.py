@@ -0,0 +1,50 @@
+"""
+Trabalho síncrono pesado chamado de views assíncronas (agregações do relatório, leitura
+do resultado de um job) roda num pool de threads limitado (ESCOLA_THREADS_RELATORIO por
+processo): o event loop continua atendendo as outras requisições e, no máximo, essa
+quantidade de agregações ocupa o banco ao mesmo tempo. Cada thread do pool tem a sua
+conexão, fechada ao fim de cada tarefa conforme CONN_MAX_AGE, como no fim de uma requisição.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_pool = None
+_lock = threading.Lock()
+
+
+def threads():
+    return getattr(settings, "ESCOLA_THREADS_RELATORIO", 4)
+
+
+def pool():
+    global _pool
+    with _lock:
+        if _pool is None or _pool._max_workers != threads():
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ThreadPoolExecutor(max_workers=threads(), thread_name_prefix="escola-relatorio")
+        return _pool
+
+
+def _executar(funcao, args, kwargs):
+    close_old_connections()
+    try:
+        return funcao(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def em_thread(funcao, *args, **kwargs):
+    """Executa funcao(*args, **kwargs) no pool; com 0 threads, na thread da requisição."""
+    if not threads():
+        return await sync_to_async(funcao)(*args, **kwargs)
+    # leva o contexto junto (ex.: a Medicao da instrumentação), como o sync_to_async
+    contexto = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool(), contexto.run, _executar, funcao, args, kwargs)
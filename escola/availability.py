@@ -0,0 +1,107 @@
+"""
+Busca dos próximos horários livres em comum para um professor e um aluno.
+Os intervalos ocupados de cada um vêm de uma query (com o término calculado no banco),
+são unidos numa única lista ordenada e varridos uma vez junto com o expediente.
+"""
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from escola.conflicts import JANELA_RETROATIVA, STATUS_OCUPADOS
+from escola.models.agendamento import Agendamento
+from escola.reports import fim_efetivo
+
+# Expediente padrão; pode ser trocado em settings.ESCOLA_EXPEDIENTE ou por chamada.
+EXPEDIENTE_PADRAO = {"inicio": time(7, 0), "fim": time(18, 0), "dias_semana": (0, 1, 2, 3, 4)}
+PASSO_PADRAO = timedelta(minutes=30)
+# Janelas maiores são cortadas: limita o que as duas queries de ocupação trazem.
+JANELA_MAXIMA = timedelta(days=62)
+
+
+def expediente():
+    return {**EXPEDIENTE_PADRAO, **getattr(settings, "ESCOLA_EXPEDIENTE", {})}
+
+
+def ocupados(inicio, fim, **filtro):
+    """Intervalos (inicio, fim) ocupados que tocam [inicio, fim), ordenados pelo início."""
+    qs = (
+        Agendamento.objects.filter(
+            status__in=STATUS_OCUPADOS,
+            inicio__gte=inicio - JANELA_RETROATIVA,
+            inicio__lt=fim,
+            **filtro,
+        )
+        .annotate(fim_efetivo=fim_efetivo())
+        .filter(fim_efetivo__gt=inicio)
+        .order_by("inicio")
+        .values_list("inicio", "fim_efetivo")
+    )
+    return list(qs)
+
+
+def unir(*listas):
+    """Une listas ordenadas de intervalos numa lista ordenada sem sobreposições."""
+    unidos = []
+    for inicio, fim in heapq.merge(*listas):
+        if unidos and inicio <= unidos[-1][1]:
+            if fim > unidos[-1][1]:
+                unidos[-1] = (unidos[-1][0], fim)
+        else:
+            unidos.append((inicio, fim))
+    return unidos
+
+
+def _alinhar(instante, base, passo):
+    """Primeiro horário da grade base + k*passo que não é anterior a `instante`."""
+    if instante <= base:
+        return base
+    return base + -((base - instante) // passo) * passo
+
+
+def horarios_livres(
+    professor_id,
+    aluno_id,
+    duracao,
+    inicio,
+    fim,
+    quantidade=10,
+    passo=PASSO_PADRAO,
+    hora_inicial=None,
+    hora_final=None,
+    dias_semana=None,
+):
+    """
+    Primeiros `quantidade` horários (inicio, fim) de `duracao` livres para o professor e o aluno
+    em [inicio, fim), dentro do expediente e começando na grade de `passo` a partir do início do expediente.
+    `fim` é limitado a `inicio + JANELA_MAXIMA`.
+    """
+    fim = min(fim, inicio + JANELA_MAXIMA)
+    padrao = expediente()
+    hora_inicial = hora_inicial or padrao["inicio"]
+    hora_final = hora_final or padrao["fim"]
+    dias_semana = padrao["dias_semana"] if dias_semana is None else dias_semana
+
+    ocupado = unir(
+        ocupados(inicio, fim, professor_id=professor_id),
+        ocupados(inicio, fim, aluno_id=aluno_id),
+    )
+
+    livres, j = [], 0
+    dia = timezone.localtime(inicio).date()
+    while len(livres) < quantidade and dia <= timezone.localtime(fim).date():
+        if dia.weekday() in dias_semana:
+            abertura = timezone.make_aware(datetime.combine(dia, hora_inicial))
+            fechamento = min(timezone.make_aware(datetime.combine(dia, hora_final)), fim)
+            t = _alinhar(inicio, abertura, passo)
+            while len(livres) < quantidade and t + duracao <= fechamento:
+                while j < len(ocupado) and ocupado[j][1] <= t:
+                    j += 1
+                if j < len(ocupado) and ocupado[j][0] < t + duracao:
+                    t = _alinhar(ocupado[j][1], abertura, passo)
+                    continue
+                livres.append((t, t + duracao))
+                t += passo
+        dia += timedelta(days=1)
+    return livres
@@ -0,0 +1,214 @@
+"""
+Suíte de benchmarks dos caminhos quentes (salvar/validar agendamento, relatório, exportação,
+home por papel, listagem e lista de alunos), com tempos e número de queries por caso.
+Pensada para rodar sobre uma base com volume (ver seed_synthetic): tudo roda dentro de uma
+transação desfeita no final, e cada repetição num savepoint próprio, então a base não muda.
+"""
+import platform
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from escola import jobs, roster
+from escola.models.agendamento import Agendamento
+from escola.models.aluno import Aluno
+from escola.models.conteudo import Conteudo
+from escola.models.professor import Professor
+from escola.models.report_job import ReportJob
+
+CASOS = {}
+
+
+def caso(nome, preparar=None, finalizar=None):
+    """Registra um caso; `preparar` e `finalizar` rodam fora da medição, na mesma repetição."""
+    def registrar(func):
+        CASOS[nome] = (func, preparar, finalizar)
+        return func
+    return registrar
+
+
+class Contexto:
+    """Objetos e clientes usados pelos casos, criados dentro da transação da suíte."""
+
+    def __init__(self):
+        self.hoje = timezone.localdate()
+        self.professor = Professor.objects.annotate(n=Count("agendamentos")).order_by("-n").first()
+        self.aluno = Aluno.objects.filter(is_active=True).order_by("pk").first()
+        self.conteudo = Conteudo.objects.order_by("pk").first()
+        if not (self.professor and self.aluno and self.conteudo):
+            raise ValueError("Base sem professor, aluno ativo ou conteúdo; rode seed_synthetic antes.")
+
+        proximo_dia_util = self.hoje + timedelta(days=1)
+        while proximo_dia_util.weekday() >= 5:
+            proximo_dia_util += timedelta(days=1)
+        self.inicio_novo = timezone.make_aware(datetime(proximo_dia_util.year, proximo_dia_util.month, proximo_dia_util.day, 12))
+
+        self.clientes = {papel: self._cliente(papel) for papel in ("diretoria", "coordenacao", "professor")}
+
+    def _cliente(self, papel):
+        user = User.objects.create_user(username=f"benchmark_{papel}_{time.time_ns()}")
+        if papel == "professor":
+            self.professor.user = user
+            self.professor.save()
+        else:
+            user.groups.add(Group.objects.get(name={"diretoria": "Diretoria", "coordenacao": "Coordenação"}[papel]))
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost"
+        cliente = Client(HTTP_HOST=host)
+        cliente.force_login(user)
+        cliente.user = user
+        return cliente
+
+    def novo_agendamento(self):
+        return Agendamento(
+            aluno=self.aluno,
+            professor=self.professor,
+            conteudo=self.conteudo,
+            inicio=self.inicio_novo,
+        )
+
+    def periodo(self, dias):
+        return {"start": (self.hoje - timedelta(days=dias)).isoformat(), "end": self.hoje.isoformat()}
+
+
+@caso("agendamento_clean")
+def _clean(ctx):
+    try:
+        ctx.novo_agendamento().clean()
+    except ValidationError:
+        pass
+
+
+@caso("agendamento_save")
+def _save(ctx):
+    ag = ctx.novo_agendamento()
+    ag.duracao_minutos = ctx.conteudo.duracao_minutos
+    ag.save()
+
+
+def _relatorio(dias):
+    def gerar(ctx):
+        from escola.views.relatorio_view import _generate_report_data
+
+        inicio = ctx.hoje - timedelta(days=dias)
+        _generate_report_data(inicio, ctx.hoje)
+    return gerar
+
+
+caso("generate_report_data_30d")(_relatorio(30))
+caso("generate_report_data_365d")(_relatorio(365))
+
+
+def _sem_jobs_reaproveitaveis(ctx):
+    # desfeito junto com o savepoint da repetição
+    ReportJob.objects.exclude(status="ERRO").update(status="ERRO")
+
+
+def _apagar_arquivos_dos_jobs(ctx):
+    for job in ReportJob.objects.filter(solicitado_por=ctx.clientes["coordenacao"].user):
+        job.arquivo.delete(save=False)
+
+
+@caso("export_relatorio_excel_30d", preparar=_sem_jobs_reaproveitaveis, finalizar=_apagar_arquivos_dos_jobs)
+def _exportar(ctx):
+    cliente = ctx.clientes["coordenacao"]
+    url = reverse("relatorios:export_relatorio_excel")
+    enfileirado = cliente.get(url, ctx.periodo(30))
+    jobs.executar_job(enfileirado.json()["job"])
+    resposta = cliente.get(url, ctx.periodo(30))
+    b"".join(resposta.streaming_content)
+
+
+def _get(papel, nome_url, params=None):
+    def requisitar(ctx):
+        resposta = ctx.clientes[papel].get(reverse(nome_url), params)
+        assert resposta.status_code in (200, 302), resposta.status_code
+        if resposta.streaming:
+            b"".join(resposta.streaming_content)
+    return requisitar
+
+
+for _papel in ("diretoria", "coordenacao", "professor"):
+    caso(f"home_{_papel}")(_get(_papel, "agendamentos:home"))
+for _papel in ("coordenacao", "professor"):
+    caso(f"agendamento_list_{_papel}")(_get(_papel, "agendamentos:list"))
+
+_ALUNOS_JSON = _get("coordenacao", "alunos:alunos_json", {"serie": "1", "turno": "Manhã"})
+caso("alunos_json_frio", preparar=lambda ctx: roster.invalidar())(_ALUNOS_JSON)
+caso("alunos_json_quente")(_ALUNOS_JSON)
+
+
+def _medir(func, ctx, preparar, finalizar):
+    with transaction.atomic():
+        if preparar:
+            preparar(ctx)
+        with CaptureQueriesContext(connection) as queries:
+            inicio = time.perf_counter()
+            func(ctx)
+            duracao = time.perf_counter() - inicio
+        if finalizar:
+            finalizar(ctx)
+        transaction.set_rollback(True)
+    return duracao, len(queries), sum(float(q["time"]) for q in queries.captured_queries)
+
+
+def volumes():
+    return {
+        "agendamentos": Agendamento.objects.count(),
+        "alunos": Aluno.objects.count(),
+        "professores": Professor.objects.count(),
+        "conteudos": Conteudo.objects.count(),
+    }
+
+
+def executar(repeticoes=5, nomes=None, aquecimento=1):
+    """Roda os casos (todos ou `nomes`) e devolve um dict pronto para JSON."""
+    resultados = {}
+    with transaction.atomic():
+        ctx = Contexto()
+        for nome, (func, preparar, finalizar) in CASOS.items():
+            if nomes and nome not in nomes:
+                continue
+            for _ in range(aquecimento):
+                _medir(func, ctx, preparar, finalizar)
+            medidas = [_medir(func, ctx, preparar, finalizar) for _ in range(repeticoes)]
+            tempos = [m[0] for m in medidas]
+            resultados[nome] = {
+                "repeticoes": repeticoes,
+                "min_s": min(tempos),
+                "mediana_s": statistics.median(tempos),
+                "max_s": max(tempos),
+                "queries": medidas[-1][1],
+                "tempo_sql_s": statistics.median(m[2] for m in medidas),
+            }
+        transaction.set_rollback(True)
+    return {
+        "gerado_em": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "banco": connection.vendor,
+        "volumes": volumes(),
+        "casos": resultados,
+    }
+
+
+def comparar(atual, anterior):
+    """Linhas (caso, mediana anterior, mediana atual, razão, queries anterior, queries atual)."""
+    linhas = []
+    for nome, medida in atual["casos"].items():
+        antes = anterior.get("casos", {}).get(nome)
+        if antes is None:
+            continue
+        razao = medida["mediana_s"] / antes["mediana_s"] if antes["mediana_s"] else None
+        linhas.append((nome, antes["mediana_s"], medida["mediana_s"], razao, antes["queries"], medida["queries"]))
+    return linhas
@@ -0,0 +1,139 @@
+"""
+Teste de carga dos endpoints JSON e de polling: N clientes concorrentes (asyncio, HTTP/1.1
+com keep-alive, só biblioteca padrão) repetem GETs numa lista de URLs durante um tempo fixo.
+Serve para comparar o mesmo endpoint servido por workers síncronos (gunicorn core.wsgi) e por
+workers uvicorn (core/gunicorn_asgi.py): requisições/s, latências p50/p95/p99 e erros.
+"""
+import asyncio
+import itertools
+import statistics
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+TIMEOUT = 30
+
+
+def cookie_de_sessao(user):
+    """Cookie de uma sessão autenticada de `user`, criada direto no SESSION_ENGINE."""
+    sessao = import_module(settings.SESSION_ENGINE).SessionStore()
+    sessao[SESSION_KEY] = str(user.pk)
+    sessao[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    sessao[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    sessao.create()
+    return f"{settings.SESSION_COOKIE_NAME}={sessao.session_key}"
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) por interpolação linear; valores já ordenados."""
+    if not valores:
+        return 0.0
+    posicao = (len(valores) - 1) * p / 100
+    baixo = int(posicao)
+    alto = min(baixo + 1, len(valores) - 1)
+    return valores[baixo] + (valores[alto] - valores[baixo]) * (posicao - baixo)
+
+
+async def _ler_resposta(leitor):
+    """Status da resposta; consome o corpo (Content-Length ou chunked) para reusar a conexão."""
+    status = int((await leitor.readline()).split()[1])
+    tamanho, chunked, fechar = None, False, False
+    while (linha := await leitor.readline()) not in (b"\r\n", b""):
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        nome, valor = nome.strip().lower(), valor.strip().lower()
+        if nome == "content-length":
+            tamanho = int(valor)
+        elif nome == "transfer-encoding" and "chunked" in valor:
+            chunked = True
+        elif nome == "connection" and valor == "close":
+            fechar = True
+    if chunked:
+        while (bloco := int((await leitor.readline()).split(b";")[0], 16)):
+            await leitor.readexactly(bloco + 2)
+        await leitor.readline()
+    elif tamanho is not None:
+        await leitor.readexactly(tamanho)
+    else:
+        await leitor.read()
+        fechar = True
+    return status, fechar
+
+
+async def _cliente(urls, fim, cookie, medidas):
+    conexao = None
+    for url in urls:
+        if time.monotonic() >= fim:
+            break
+        partes = urlsplit(url)
+        caminho = partes.path + (f"?{partes.query}" if partes.query else "")
+        pedido = (
+            f"GET {caminho} HTTP/1.1\r\nHost: {partes.netloc}\r\nAccept: application/json\r\n"
+            + (f"Cookie: {cookie}\r\n" if cookie else "")
+            + "\r\n"
+        ).encode()
+        inicio = time.perf_counter()
+        try:
+            if conexao is None:
+                conexao = await asyncio.wait_for(
+                    asyncio.open_connection(partes.hostname, partes.port or 80), TIMEOUT,
+                )
+            leitor, escritor = conexao
+            escritor.write(pedido)
+            await escritor.drain()
+            status, fechar = await asyncio.wait_for(_ler_resposta(leitor), TIMEOUT)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+            status, fechar = None, True
+        medidas.append((url, status, time.perf_counter() - inicio))
+        if fechar and conexao is not None:
+            conexao[1].close()
+            conexao = None
+    if conexao is not None:
+        conexao[1].close()
+
+
+async def _executar(urls, clientes, duracao, cookie):
+    medidas = []
+    fim = time.monotonic() + duracao
+    # cada cliente começa num ponto diferente da lista
+    await asyncio.gather(*(
+        _cliente(itertools.islice(itertools.cycle(urls), i % len(urls), None), fim, cookie, medidas)
+        for i in range(clientes)
+    ))
+    return medidas
+
+
+def resumo(medidas, duracao):
+    """{"requisicoes", "por_segundo", "erros", "p50_ms", "p95_ms", "p99_ms", "status"}."""
+    tempos = sorted(tempo for _, status, tempo in medidas if status is not None and status < 500)
+    status = {}
+    for _, codigo, _ in medidas:
+        chave = str(codigo) if codigo is not None else "falha"
+        status[chave] = status.get(chave, 0) + 1
+    return {
+        "requisicoes": len(medidas),
+        "por_segundo": round(len(medidas) / duracao, 1) if duracao else 0.0,
+        "erros": len(medidas) - len(tempos),
+        "p50_ms": round(percentil(tempos, 50) * 1000, 1),
+        "p95_ms": round(percentil(tempos, 95) * 1000, 1),
+        "p99_ms": round(percentil(tempos, 99) * 1000, 1),
+        "media_ms": round(statistics.fmean(tempos) * 1000, 1) if tempos else 0.0,
+        "status": status,
+    }
+
+
+def executar(urls, clientes=200, duracao=10.0, cookie=None):
+    """Roda a carga e devolve {"total": resumo, "urls": {url: resumo}}."""
+    if not urls:
+        raise ValueError("Informe ao menos uma URL.")
+    inicio = time.monotonic()
+    medidas = asyncio.run(_executar(list(urls), clientes, duracao, cookie))
+    decorrido = time.monotonic() - inicio
+    return {
+        "clientes": clientes,
+        "duracao_s": round(decorrido, 2),
+        "total": resumo(medidas, decorrido),
+        "urls": {url: resumo([m for m in medidas if m[0] == url], decorrido) for url in dict.fromkeys(urls)},
+    }
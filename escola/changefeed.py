@@ -0,0 +1,206 @@
+"""
+Feed de mudanças dos agendamentos para sincronização incremental (tablets das salas).
+Cada gravação deixa uma MudancaAgendamento, inserida depois do commit (`registrar`, chamado
+pelos signals e pelos caminhos em massa): o id segue a ordem em que as transações terminaram,
+então uma transação longa não grava nada antes de um cursor já entregue, como aconteceria
+ordenando por updated_at (definido no Python, antes do commit).
+O cliente guarda o cursor da última resposta e recebe, na ordem do registro, só o que veio depois:
+ - "upsert": estado atual do agendamento alterado (várias mudanças dele no lote viram uma);
+ - "delete": agendamento excluído ou trocado de professor (a troca não tira o agendamento
+   da visão da Coordenação).
+Sem cursor, o feed lista primeiro todos os agendamentos do escopo em ordem de pk e depois segue
+o registro a partir da última mudança existente quando a listagem começou.
+Cada consulta usa os índices (professor_id, id) do registro e (professor, id) dos agendamentos,
+com LIMIT, então o custo depende do número de mudanças, não do tamanho da tabela. O id é reservado
+no INSERT, e dois registros concorrentes podem aparecer fora de ordem por alguns milissegundos:
+mudanças dos últimos ATRASO_ESTAVEL segundos ficam para a próxima consulta.
+"""
+import base64
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from escola import roles
+from escola.models.agendamento import Agendamento
+from escola.models.mudanca_agendamento import MudancaAgendamento
+from escola.reports import duracao_efetiva, fim_efetivo
+
+ATRASO_ESTAVEL = timedelta(seconds=2)
+# Mudanças registradas há mais que isso são apagadas (prune_change_feed); cursores
+# emitidos antes disso recebem 410 e o cliente refaz a sincronização completa.
+RETENCAO = timedelta(days=30)
+LIMITE_PADRAO = 200
+LIMITE_MAXIMO = 1000
+LOTE_REGISTRO = 1000
+# Long-poll e Server-Sent Events: intervalo entre consultas e tempo máximo de cada conexão.
+INTERVALO_CONSULTA = 1.0
+ESPERA_MAXIMA = 25
+DURACAO_SSE = 5 * 60
+
+CAMPOS = (
+    "id", "inicio", "fim_efetivo", "duracao", "status", "observacoes", "updated_at",
+    "aluno_id", "aluno__nome", "conteudo_id", "conteudo__nome", "professor_id", "professor__nome",
+)
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class CursorExpirado(Exception):
+    """O cursor é anterior à retenção do registro de mudanças."""
+
+
+class Cursor(NamedTuple):
+    emitido: datetime  # até quando o registro já foi entregue (menos o atraso)
+    seq: int  # última MudancaAgendamento entregue
+    pk: Optional[int]  # último agendamento da primeira sincronização; None depois dela
+
+
+class Lote(NamedTuple):
+    eventos: list
+    cursor: str
+    has_more: bool
+
+
+def codificar_cursor(cursor):
+    pk = "" if cursor.pk is None else cursor.pk
+    bruto = f"{cursor.emitido.isoformat()}|{cursor.seq}|{pk}"
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(texto):
+    try:
+        bruto = base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4)).decode()
+        partes = bruto.split("|")
+        if len(partes) == 4:
+            # formato anterior, ordenado por updated_at: só uma sincronização completa é segura
+            raise CursorExpirado("Cursor de uma versão anterior do feed; refaça a sincronização completa.")
+        emitido, seq, pk = partes
+        cursor = Cursor(datetime.fromisoformat(emitido), int(seq), int(pk) if pk else None)
+        if timezone.is_naive(cursor.emitido):
+            raise ValueError
+        return cursor
+    except (ValueError, UnicodeDecodeError):
+        raise CursorInvalido("Cursor inválido.")
+
+
+def registrar(mudancas):
+    """
+    Grava no registro do feed, depois do commit da transação atual (na hora, fora de uma),
+    as mudanças (agendamento_id, professor_id, tipo). Para quem grava agendamentos sem
+    signals: bulk_create e queryset.update().
+    """
+    novas = [
+        MudancaAgendamento(agendamento_id=agendamento_id, professor_id=professor_id, tipo=tipo)
+        for agendamento_id, professor_id, tipo in mudancas
+    ]
+    if novas:
+        transaction.on_commit(lambda: MudancaAgendamento.objects.bulk_create(novas, batch_size=LOTE_REGISTRO))
+
+
+def escopo_de(user):
+    """None para ver todos os agendamentos (Coordenação/admin) ou o pk do professor."""
+    papel = roles.papel_de(user)
+    if user.is_superuser or papel.eh_coordenacao:
+        return None
+    if papel.eh_professor and papel.professor is not None:
+        return papel.professor.pk
+    raise PermissionDenied
+
+
+def _cursor_inicial(agora):
+    ultima = MudancaAgendamento.objects.aggregate(ultima=Max("id"))["ultima"]
+    return Cursor(agora, ultima or 0, 0)
+
+
+def _estado_atual(professor_id, **filtros):
+    qs = Agendamento.objects.filter(**filtros)
+    if professor_id is not None:
+        qs = qs.filter(professor_id=professor_id)
+    return qs.annotate(duracao=duracao_efetiva(), fim_efetivo=fim_efetivo()).values(*CAMPOS)
+
+
+def _mudancas(professor_id, cursor, ate, limite):
+    qs = MudancaAgendamento.objects.filter(pk__gt=cursor.seq, registrada_em__lte=ate)
+    if professor_id is None:
+        # trocar de professor não tira o agendamento da visão da Coordenação
+        qs = qs.exclude(tipo=MudancaAgendamento.SAIU)
+    else:
+        qs = qs.filter(professor_id=professor_id)
+    return list(qs.order_by("id").values_list("id", "agendamento_id", "tipo")[:limite])
+
+
+def _upsert(linha):
+    return {
+        "op": "upsert",
+        "id": linha["id"],
+        "inicio": linha["inicio"],
+        "fim": linha["fim_efetivo"],
+        "duracao": linha["duracao"],
+        "status": linha["status"],
+        "observacoes": linha["observacoes"],
+        "aluno_id": linha["aluno_id"],
+        "aluno": linha["aluno__nome"],
+        "conteudo_id": linha["conteudo_id"],
+        "conteudo": linha["conteudo__nome"],
+        "professor_id": linha["professor_id"],
+        "professor": linha["professor__nome"],
+        "updated_at": linha["updated_at"],
+    }
+
+
+def lote(professor_id, cursor=None, limite=LIMITE_PADRAO):
+    """
+    Próximas mudanças do escopo (`professor_id` ou None para todos) depois de `cursor`
+    (texto vindo de um Lote anterior, ou None para começar do zero).
+    Levanta CursorInvalido ou CursorExpirado.
+    """
+    agora = timezone.now()
+    if cursor:
+        atual = decodificar_cursor(cursor)
+        if atual.emitido < agora - RETENCAO + ATRASO_ESTAVEL:
+            raise CursorExpirado("Cursor expirado; refaça a sincronização completa.")
+    else:
+        atual = _cursor_inicial(agora)
+
+    if atual.pk is not None:
+        return _listar(professor_id, atual, limite)
+
+    mudancas = _mudancas(professor_id, atual, agora - ATRASO_ESTAVEL, limite + 1)
+    entregues, has_more = mudancas[:limite], len(mudancas) > limite
+
+    # só a última mudança de cada agendamento no lote conta, na posição dela
+    ultimas = {agendamento_id: (seq, tipo) for seq, agendamento_id, tipo in entregues}
+    alterados = [pk for pk, (_, tipo) in ultimas.items() if tipo == MudancaAgendamento.ALTERADO]
+    estado = {linha["id"]: linha for linha in _estado_atual(professor_id, pk__in=alterados)} if alterados else {}
+    eventos = []
+    for agendamento_id, (_, tipo) in sorted(ultimas.items(), key=lambda item: item[1][0]):
+        if tipo != MudancaAgendamento.ALTERADO:
+            eventos.append({"op": "delete", "id": agendamento_id})
+        elif agendamento_id in estado:
+            # sem estado: foi excluído ou saiu do escopo, e a mudança disso vem depois
+            eventos.append(_upsert(estado[agendamento_id]))
+
+    # só avança o "emitido" quando todo o registro até agora foi entregue
+    emitido = atual.emitido if has_more else agora
+    seq = entregues[-1][0] if entregues else atual.seq
+    return Lote(eventos, codificar_cursor(Cursor(emitido, seq, None)), has_more)
+
+
+def _listar(professor_id, cursor, limite):
+    """Primeira sincronização: estado atual dos agendamentos do escopo, em ordem de pk."""
+    linhas = list(_estado_atual(professor_id, pk__gt=cursor.pk).order_by("id")[:limite + 1])
+    entregues, has_more = linhas[:limite], len(linhas) > limite
+    proximo = cursor._replace(pk=entregues[-1]["id"] if has_more else None)
+    return Lote([_upsert(linha) for linha in entregues], codificar_cursor(proximo), has_more)
+
+
+def podar(antes_de=None):
+    """Apaga as mudanças registradas antes da retenção; retorna quantas foram apagadas."""
+    antes_de = antes_de or timezone.now() - RETENCAO
+    return MudancaAgendamento.objects.filter(registrada_em__lt=antes_de).delete()[0]
@@ -0,0 +1,162 @@
+"""
+Detecção de conflitos de horário entre agendamentos (mesmo aluno ou mesmo professor).
+Uma única query busca a janela relevante, já com o término calculado no banco, e um
+índice de intervalos ordenados responde às verificações de um agendamento ou de um lote.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from django.db.models import Q
+from django.utils import timezone
+
+from escola.models.agendamento import Agendamento
+from escola.models.aluno import Aluno
+from escola.models.professor import Professor
+from escola.reports import fim_efetivo
+
+STATUS_OCUPADOS = [Agendamento.STATUS_AGENDADO, Agendamento.STATUS_CONCLUIDO]
+# Até quanto antes do início buscamos agendamentos que ainda possam estar em andamento.
+JANELA_RETROATIVA = timedelta(hours=24)
+
+
+class Ocupacao(NamedTuple):
+    inicio: datetime
+    fim: datetime
+    pk: int | None
+    aluno_id: int
+    professor_id: int
+    aluno_nome: str = ""
+    professor_nome: str = ""
+
+
+class Conflito(NamedTuple):
+    tipo: str  # "aluno" ou "professor"
+    ocupacao: Ocupacao
+
+    @property
+    def mensagem(self):
+        o = self.ocupacao
+        horario = f"{timezone.localtime(o.inicio):%H:%M} - {timezone.localtime(o.fim):%H:%M}"
+        if self.tipo == "aluno":
+            return f"Este aluno já possui um atendimento nesse horário com o professor {o.professor_nome} ({horario})."
+        return f"Este professor já possui um atendimento nesse horário com o aluno {o.aluno_nome} ({horario})."
+
+
+class IndiceIntervalos:
+    """Intervalos [inicio, fim) por aluno e por professor, em listas ordenadas pelo início."""
+
+    def __init__(self, ocupacoes=()):
+        self._inicios = {}
+        self._itens = {}
+        self._maior_duracao = timedelta(0)
+        for ocupacao in ocupacoes:
+            self.adicionar(ocupacao)
+
+    def adicionar(self, ocupacao):
+        for chave in (("aluno", ocupacao.aluno_id), ("professor", ocupacao.professor_id)):
+            inicios = self._inicios.setdefault(chave, [])
+            i = bisect_right(inicios, ocupacao.inicio)
+            inicios.insert(i, ocupacao.inicio)
+            self._itens.setdefault(chave, []).insert(i, ocupacao)
+        self._maior_duracao = max(self._maior_duracao, ocupacao.fim - ocupacao.inicio)
+
+    def sobrepostos(self, chave, inicio, fim, ignorar=None):
+        """Ocupações da chave que se sobrepõem a [inicio, fim); encostar no limite não conta."""
+        inicios = self._inicios.get(chave)
+        if not inicios:
+            return []
+        lo = bisect_right(inicios, inicio - self._maior_duracao)
+        hi = bisect_left(inicios, fim)
+        return [
+            o for o in self._itens[chave][lo:hi]
+            if o.fim > inicio and (ignorar is None or o.pk != ignorar)
+        ]
+
+    def conflitos(self, ocupacao, verificar_professor=True):
+        encontrados = [
+            Conflito("aluno", o)
+            for o in self.sobrepostos(("aluno", ocupacao.aluno_id), ocupacao.inicio, ocupacao.fim, ocupacao.pk)
+        ]
+        if verificar_professor:
+            vistos = {c.ocupacao for c in encontrados}
+            encontrados += [
+                Conflito("professor", o)
+                for o in self.sobrepostos(("professor", ocupacao.professor_id), ocupacao.inicio, ocupacao.fim, ocupacao.pk)
+                if o not in vistos
+            ]
+        return encontrados
+
+
+def ocupacao_de(agendamento):
+    """Ocupação de um agendamento em memória (salvo ou não)."""
+    return Ocupacao(
+        inicio=agendamento.inicio,
+        fim=agendamento.fim,
+        pk=agendamento.pk,
+        aluno_id=agendamento.aluno_id,
+        professor_id=agendamento.professor_id,
+        aluno_nome=agendamento.aluno.nome,
+        professor_nome=agendamento.professor.nome,
+    )
+
+
+def carregar_indice(ocupacoes, excluir_pks=()):
+    """
+    Carrega, em uma query, os agendamentos ativos dos mesmos alunos e professores
+    que podem colidir com as ocupações informadas.
+    """
+    if not ocupacoes:
+        return IndiceIntervalos()
+    inicio = min(o.inicio for o in ocupacoes)
+    fim = max(o.fim for o in ocupacoes)
+    qs = (
+        Agendamento.objects.filter(
+            Q(aluno_id__in={o.aluno_id for o in ocupacoes}) | Q(professor_id__in={o.professor_id for o in ocupacoes}),
+            status__in=STATUS_OCUPADOS,
+            inicio__gte=inicio - JANELA_RETROATIVA,
+            inicio__lt=fim,
+        )
+        .exclude(pk__in=[pk for pk in excluir_pks if pk is not None])
+        .annotate(fim_efetivo=fim_efetivo())
+        .filter(fim_efetivo__gt=inicio)
+        .order_by()
+        .values_list("inicio", "fim_efetivo", "pk", "aluno_id", "professor_id", "aluno__nome", "professor__nome")
+    )
+    return IndiceIntervalos(Ocupacao(*linha) for linha in qs.iterator())
+
+
+def travar(itens):
+    """
+    Trava (select_for_update, em ordem de pk) os professores e alunos de `itens` (agendamentos
+    ou ocupações) até o fim da transação: verificações concorrentes das mesmas pessoas esperam
+    esta gravar antes de olhar a agenda.
+    """
+    itens = list(itens)
+    for modelo, campo in ((Professor, "professor_id"), (Aluno, "aluno_id")):
+        pks = sorted({getattr(item, campo) for item in itens})
+        list(modelo.objects.select_for_update().filter(pk__in=pks).order_by("pk").values_list("pk", flat=True))
+
+
+def verificar_lote(ocupacoes, verificar_professor=True):
+    """
+    Verifica uma sequência de ocupações contra o banco e entre si (na ordem dada).
+    Retorna uma lista paralela com os conflitos de cada uma; as sem conflito passam
+    a ocupar o horário para as seguintes.
+    """
+    ocupacoes = list(ocupacoes)
+    indice = carregar_indice(ocupacoes, excluir_pks=[o.pk for o in ocupacoes])
+    resultado = []
+    for ocupacao in ocupacoes:
+        conflitos = indice.conflitos(ocupacao, verificar_professor)
+        if not conflitos:
+            indice.adicionar(ocupacao)
+        resultado.append(conflitos)
+    return resultado
+
+
+def conflitos_de(agendamento, verificar_professor=True):
+    """Todos os agendamentos ativos que colidem com `agendamento` (cancelados não colidem)."""
+    if agendamento.status == Agendamento.STATUS_CANCELADO:
+        return []
+    return verificar_lote([ocupacao_de(agendamento)], verificar_professor)[0]
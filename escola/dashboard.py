@@ -0,0 +1,96 @@
+"""
+Cache dos painéis da home (Coordenação e Professor) em dois níveis:
+ - cada linha da tabela é um fragmento guardado pela chave (pk, updated_at) e pela
+   versão dos cadastros (nomes de aluno, conteúdo e professor aparecem na linha);
+ - a tabela inteira de um papel/professor/página é guardada pelas versões dos
+   agendamentos (todos, ou só os do professor) e dos cadastros; o ETag sai do conteúdo.
+Os signals de Agendamento, Aluno, Conteudo e Professor trocam as versões; caminhos em
+massa (bulk_create/update) chamam invalidar_agendamentos() explicitamente. O token CSRF
+não entra nos fragmentos: a página, que não é guardada, o coloca nos formulários.
+"""
+import hashlib
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from escola import roster, transitions, versoes
+
+CADASTROS_KEY = 'escola:dashboard:cadastros'
+AGENDAMENTOS_KEY = 'escola:dashboard:agendamentos'
+PROFESSOR_KEY = 'escola:dashboard:professor:{}'
+# Rede de segurança, como roles.PAPEL_CACHE_TIMEOUT: se a troca de versão não chegar a um
+# processo (cache não compartilhado, ver core/settings.py), o que ele guardou vence logo.
+PAINEL_CACHE_TIMEOUT = 5 * 60
+LINHA_CACHE_TIMEOUT = 5 * 60
+
+
+class Painel(NamedTuple):
+    html: str
+    etag: str
+
+
+def versao_cadastros():
+    # a versão da lista de alunos já muda com qualquer Aluno salvo, excluído ou importado
+    return f'{versoes.numero(CADASTROS_KEY)}.{roster.versao()}'
+
+
+def versao_agendamentos():
+    """Muda com qualquer agendamento salvo, excluído ou alterado em massa."""
+    return versoes.numero(AGENDAMENTOS_KEY)
+
+
+def invalidar_cadastros():
+    versoes.trocar(CADASTROS_KEY)
+
+
+def invalidar_agendamentos(professor_ids=()):
+    """Agendamentos mudaram: invalida o painel da Coordenação e o dos professores informados."""
+    versoes.trocar(AGENDAMENTOS_KEY, *(PROFESSOR_KEY.format(pk) for pk in set(professor_ids) if pk is not None))
+
+
+def opcoes_de_status(ag):
+    """O status atual e os que ele pode assumir (escola.transitions), para o <select> da linha."""
+    permitidos = transitions.TRANSICOES.get(ag.status, set()) | {ag.status}
+    return [(valor, rotulo) for valor, rotulo in ag.STATUS_CHOICES if valor in permitidos]
+
+
+def linhas(agendamentos, template):
+    """HTML de cada linha; as que não estão no cache são renderizadas e guardadas de uma vez."""
+    agendamentos = list(agendamentos)
+    cadastros = versao_cadastros()
+    chaves = [
+        f'escola:dashboard:linha:{template}:{cadastros}:{ag.pk}:{ag.updated_at.timestamp()}'
+        for ag in agendamentos
+    ]
+    prontas = cache.get_many(chaves)
+    novas = {}
+    for ag, chave in zip(agendamentos, chaves):
+        if chave not in prontas:
+            novas[chave] = render_to_string(template, {'ag': ag, 'opcoes': opcoes_de_status(ag)})
+    if novas:
+        cache.set_many(novas, LINHA_CACHE_TIMEOUT)
+        prontas.update(novas)
+    return [prontas[chave] for chave in chaves]
+
+
+def painel(escopo, parametros, montar):
+    """
+    Tabela do painel do `escopo` ('coordenacao' ou 'professor:<pk>') para os `parametros`
+    da requisição (cursor/página); `montar()` só é chamado quando a versão mudou.
+    """
+    if escopo == 'coordenacao':
+        versao = versao_agendamentos()
+    else:
+        versao = versoes.numero(PROFESSOR_KEY.format(escopo.split(':', 1)[1]))
+    # a home lista a partir de hoje: o painel também vence na virada do dia
+    identidade = f'{escopo}:{versao}:{versao_cadastros()}:{timezone.localdate()}:{sorted(parametros.items())}'
+    chave = 'escola:dashboard:painel:' + hashlib.sha1(identidade.encode()).hexdigest()
+    resultado = cache.get(chave)
+    if resultado is None:
+        html = montar()
+        # do conteúdo, não da chave: um 304 nunca confirma uma tabela que mudou
+        resultado = Painel(html, hashlib.sha1(html.encode()).hexdigest())
+        cache.set(chave, resultado, PAINEL_CACHE_TIMEOUT)
+    return resultado
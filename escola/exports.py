@@ -0,0 +1,155 @@
+"""
+Exportação do relatório em streaming (XLSX, CSV e ZIP de CSVs).
+As linhas de agendamentos vêm de um iterador sobre o queryset; só as agregações
+(poucas linhas) ficam em memória.
+"""
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime
+
+from escola import reports
+
+COLUNAS_AGENDAMENTOS = [
+    "id",
+    "inicio",
+    "duracao_minutos",
+    "status",
+    "aluno",
+    "serie",
+    "turno",
+    "professor",
+    "especialidade",
+    "conteudo",
+    "descritor",
+]
+COLUNAS_RESUMO = ["periodo_inicial", "periodo_final", "total_agendamentos", "total_horas", "media_duracao_min"]
+
+# Acima disso o arquivo temporário sai da memória e vai para o disco.
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+CHUNK_BYTES = 64 * 1024
+# Intervalo (em linhas) entre chamadas do callback de progresso.
+PROGRESSO_A_CADA = 1000
+
+
+def _linhas_agendamentos(start_dt_dt, end_dt_dt, progresso=None):
+    for n, linha in enumerate(reports.iterar_linhas(start_dt_dt, end_dt_dt), start=1):
+        if progresso is not None and n % PROGRESSO_A_CADA == 0:
+            progresso(n)
+        yield [linha[c] for c in COLUNAS_AGENDAMENTOS]
+
+
+def secoes_relatorio(start_date, end_date, progresso=None):
+    """
+    Retorna as abas do relatório como (nome, colunas, linhas), na ordem da planilha.
+    `linhas` das abas agregadas são listas; a de agendamentos é um gerador.
+    progresso: callable opcional chamado com o nº de linhas de agendamentos já geradas.
+    """
+    _, _, start_dt_dt, end_dt_dt = reports.resolver_periodo(start_date, end_date)
+    report = reports.gerar_relatorio(start_date, end_date, incluir_linhas=False)
+
+    def _tabela(lista, colunas):
+        return [[item[c] for c in colunas] for item in lista]
+
+    agendamentos = _linhas_agendamentos(start_dt_dt, end_dt_dt, progresso)
+    return [
+        ("Agendamentos", COLUNAS_AGENDAMENTOS, agendamentos),
+        ("Resumo", COLUNAS_RESUMO, _tabela([report["resumo"]], COLUNAS_RESUMO)),
+        ("Por Professor", ["professor", "agendamentos", "horas"], _tabela(report["by_professor"], ["professor", "agendamentos", "horas"])),
+        ("Por Aluno", ["aluno", "agendamentos", "horas"], _tabela(report["by_aluno"], ["aluno", "agendamentos", "horas"])),
+        ("Por Conteúdo", ["conteudo", "agendamentos", "horas"], _tabela(report["by_conteudo"], ["conteudo", "agendamentos", "horas"])),
+        ("Mensal", ["mes", "agendamentos", "horas"], _tabela(report["monthly"], ["mes", "agendamentos", "horas"])),
+    ]
+
+
+def _ler_em_blocos(arquivo):
+    try:
+        arquivo.seek(0)
+        while bloco := arquivo.read(CHUNK_BYTES):
+            yield bloco
+    finally:
+        arquivo.close()
+
+
+def xlsx_relatorio(start_date, end_date, progresso=None):
+    """
+    Escreve a planilha com xlsxwriter em `constant_memory` num SpooledTemporaryFile
+    e devolve um gerador com o conteúdo em blocos.
+    """
+    import xlsxwriter  # só a exportação XLSX usa; fica fora da inicialização dos workers
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    workbook = xlsxwriter.Workbook(arquivo, {"constant_memory": True})
+    cabecalho = workbook.add_format({"bold": True, "border": 1})
+    fmt_datahora = workbook.add_format({"num_format": "yyyy-mm-dd HH:MM"})
+    fmt_data = workbook.add_format({"num_format": "yyyy-mm-dd"})
+
+    for nome, colunas, linhas in secoes_relatorio(start_date, end_date, progresso):
+        sheet = workbook.add_worksheet(nome)
+        sheet.write_row(0, 0, colunas, cabecalho)
+        for i, linha in enumerate(linhas, start=1):
+            for j, valor in enumerate(linha):
+                if isinstance(valor, datetime):
+                    sheet.write_datetime(i, j, valor, fmt_datahora)
+                elif isinstance(valor, date):
+                    sheet.write_datetime(i, j, valor, fmt_data)
+                else:
+                    sheet.write(i, j, valor)
+    workbook.close()
+    return _ler_em_blocos(arquivo)
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve o que seria escrito."""
+
+    def write(self, value):
+        return value
+
+
+def csv_agendamentos(start_date, end_date, progresso=None):
+    """Gera o CSV das linhas de agendamentos, uma linha por vez (sem calcular as agregações)."""
+    _, _, start_dt_dt, end_dt_dt = reports.resolver_periodo(start_date, end_date)
+    writer = csv.writer(_Eco())
+    yield writer.writerow(COLUNAS_AGENDAMENTOS)
+    for linha in _linhas_agendamentos(start_dt_dt, end_dt_dt, progresso):
+        yield writer.writerow(linha)
+
+
+class _Buffer(io.RawIOBase):
+    """Destino não pesquisável do ZipFile: acumula bytes até serem drenados."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def drenar(self):
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def zip_csvs(start_date, end_date, progresso=None):
+    """Gera um ZIP com um CSV por aba, comprimido e enviado conforme é escrito."""
+    destino = _Buffer()
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, colunas, linhas in secoes_relatorio(start_date, end_date, progresso):
+            with zf.open(f"{nome}.csv", "w") as entrada:
+                texto = io.TextIOWrapper(entrada, encoding="utf-8", newline="")
+                writer = csv.writer(texto)
+                writer.writerow(colunas)
+                for linha in linhas:
+                    writer.writerow(linha)
+                    if dados := destino.drenar():
+                        yield dados
+                texto.flush()
+                texto.detach()
+            if dados := destino.drenar():
+                yield dados
+    yield destino.drenar()
@@ -1,4 +1,5 @@
 from django import forms
+from .. import roles
 from ..models import agendamento, professor, aluno  as aluno_model
 
 class AgendamentoForm(forms.ModelForm):
@@ -31,7 +32,7 @@ class AgendamentoForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-        if user and user.groups.filter(name="Professor").exists():
+        if user and roles.papel_de(user).eh_professor:
             self.fields['professor'].queryset = professor.Professor.objects.filter(user=user)
         
         self.fields['aluno'].queryset = aluno_model.Aluno.objects.none()
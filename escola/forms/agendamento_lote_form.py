@@ -0,0 +1,40 @@
+from django import forms
+from ..models import aluno as aluno_model, conteudo, professor
+
+class AgendamentoLoteForm(forms.Form):
+    DIAS_SEMANA_CHOICES = [
+        ('0', 'Segunda'),
+        ('1', 'Terça'),
+        ('2', 'Quarta'),
+        ('3', 'Quinta'),
+        ('4', 'Sexta'),
+        ('5', 'Sábado'),
+    ]
+
+    alunos = forms.ModelMultipleChoiceField(queryset=aluno_model.Aluno.objects.filter(is_active=True).order_by('nome'))
+    conteudo = forms.ModelChoiceField(queryset=conteudo.Conteudo.objects.all())
+    professor = forms.ModelChoiceField(queryset=professor.Professor.objects.all())
+    data_inicial = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    data_final = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    dias_semana = forms.MultipleChoiceField(choices=DIAS_SEMANA_CHOICES, widget=forms.CheckboxSelectMultiple, label="Dias da semana")
+    horario = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}), label="Horário")
+    intervalo_semanas = forms.IntegerField(min_value=1, max_value=8, initial=1, label="Repetir a cada (semanas)")
+    duracao_minutos = forms.IntegerField(min_value=1, required=False, label="Duração (min)")
+    escalonar = forms.BooleanField(required=False, label="Atender os alunos em sequência")
+    tudo_ou_nada = forms.BooleanField(required=False, label="Não criar nada se houver conflito")
+    observacoes = forms.CharField(widget=forms.Textarea, required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        inicio, fim = cleaned.get('data_inicial'), cleaned.get('data_final')
+        if inicio and fim and fim < inicio:
+            raise forms.ValidationError("A data final deve ser igual ou posterior à inicial.")
+        if inicio and fim and (fim - inicio).days > 366:
+            raise forms.ValidationError("O período máximo é de um ano.")
+        alunos = cleaned.get('alunos')
+        if alunos and len(alunos) > 1 and not cleaned.get('escalonar'):
+            raise forms.ValidationError(
+                "O professor atende um aluno por vez: marque \"Atender os alunos em sequência\" "
+                "para agendar vários alunos."
+            )
+        return cleaned
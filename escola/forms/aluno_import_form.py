@@ -0,0 +1,13 @@
+from django import forms
+
+
+class ImportarAlunosForm(forms.Form):
+    arquivo = forms.FileField(label="Arquivo (CSV ou XLSX)")
+    desativar_ausentes = forms.BooleanField(required=False, label="Desativar alunos ausentes do arquivo")
+    simular = forms.BooleanField(required=False, initial=True, label="Só simular (não gravar)")
+
+    def clean_arquivo(self):
+        arquivo = self.cleaned_data["arquivo"]
+        if not arquivo.name.lower().endswith((".csv", ".xlsx")):
+            raise forms.ValidationError("Envie um arquivo .csv ou .xlsx.")
+        return arquivo
@@ -0,0 +1,22 @@
+from django import forms
+from ..availability import JANELA_MAXIMA
+from ..models import aluno as aluno_model, conteudo, professor
+
+class DisponibilidadeForm(forms.Form):
+    professor = forms.ModelChoiceField(queryset=professor.Professor.objects.all())
+    aluno = forms.ModelChoiceField(queryset=aluno_model.Aluno.objects.filter(is_active=True))
+    conteudo = forms.ModelChoiceField(queryset=conteudo.Conteudo.objects.all())
+    duracao_minutos = forms.IntegerField(min_value=1, max_value=600, required=False, label="Duração (min)")
+    data_inicial = forms.DateField(required=False)
+    dias = forms.IntegerField(min_value=1, max_value=JANELA_MAXIMA.days, required=False, initial=30)
+    quantidade = forms.IntegerField(min_value=1, max_value=50, required=False, initial=10)
+    passo_minutos = forms.IntegerField(min_value=5, max_value=240, required=False, initial=30)
+    das = forms.TimeField(required=False)
+    ate = forms.TimeField(required=False)
+
+    def clean(self):
+        cleaned = super().clean()
+        das, ate = cleaned.get('das'), cleaned.get('ate')
+        if das and ate and ate <= das:
+            raise forms.ValidationError("O fim do expediente deve ser posterior ao início.")
+        return cleaned
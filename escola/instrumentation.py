@@ -0,0 +1,269 @@
+"""
+Instrumentação por requisição: nº e tempo de SQL, queries repetidas (fingerprints),
+tempo de renderização de template (e quantas queries saíram do template) e o restante
+em Python. Uma fração das requisições (ESCOLA_INSTRUMENTACAO_TAXA) é medida e guardada
+num ring buffer do processo, gravado de tempos em tempos em ESCOLA_INSTRUMENTACAO_DIR
+(um arquivo por processo) para o endpoint e o comando `slow_requests` enxergarem todos
+os workers.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+TAXA_PADRAO = 0.2
+CAPACIDADE_PADRAO = 2000
+# Segundos entre gravações do buffer do processo em disco.
+INTERVALO_GRAVACAO = 15
+# Arquivos de processos que não gravam há mais tempo que isso são ignorados.
+VALIDADE_ARQUIVO = 24 * 3600
+DUPLICADAS_POR_AMOSTRA = 5
+METRICAS = ("total_ms", "sql_ms", "sql_count", "template_ms", "template_sql_count", "python_ms", "duplicadas")
+
+_atual = ContextVar("escola_instrumentacao", default=None)
+_buffer = None
+_lock = threading.Lock()
+_ultima_gravacao = 0.0
+_template_instrumentado = False
+
+
+def taxa():
+    return getattr(settings, "ESCOLA_INSTRUMENTACAO_TAXA", TAXA_PADRAO)
+
+
+def capacidade():
+    return getattr(settings, "ESCOLA_INSTRUMENTACAO_CAPACIDADE", CAPACIDADE_PADRAO)
+
+
+def _diretorio():
+    return settings.ESCOLA_INSTRUMENTACAO_DIR
+
+
+def buffer():
+    global _buffer
+    if _buffer is None or _buffer.maxlen != capacidade():
+        _buffer = deque(_buffer or (), maxlen=capacidade())
+    return _buffer
+
+
+class Medicao:
+    """Acumuladores de uma requisição; alimentados pelo execute_wrapper e pelo Template.render."""
+
+    __slots__ = (
+        "inicio", "sql_count", "sql_s", "template_s", "template_sql_count", "em_template", "consultas", "assincrona",
+    )
+
+    def __init__(self, assincrona=False):
+        self.assincrona = assincrona
+        self.inicio = time.perf_counter()
+        self.sql_count = 0
+        self.sql_s = 0.0
+        self.template_s = 0.0
+        self.template_sql_count = 0
+        self.em_template = False
+        self.consultas = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_s += time.perf_counter() - inicio
+            self.sql_count += 1
+            self.consultas[sql] += 1
+            if self.em_template:
+                self.template_sql_count += 1
+
+
+def iniciar(assincrona=False):
+    """Medicao da requisição atual, ou None se ela não foi sorteada."""
+    if random.random() >= taxa():
+        return None
+    medicao = Medicao(assincrona)
+    _atual.set(medicao)
+    return medicao
+
+
+def descartar():
+    _atual.set(None)
+
+
+_IN_LISTA = re.compile(r"\bIN \((?:%s, )*%s\)")
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def fingerprint(sql):
+    """SQL sem literais e com listas de IN colapsadas: queries iguais a menos dos valores coincidem."""
+    return _LITERAIS.sub("?", _IN_LISTA.sub("IN (...)", sql))
+
+
+def finalizar(medicao, view, metodo, status):
+    descartar()
+    total_s = time.perf_counter() - medicao.inicio
+    repetidas = Counter()
+    for sql, n in medicao.consultas.items():
+        repetidas[fingerprint(sql)] += n
+    duplicadas = [[sql, n] for sql, n in repetidas.most_common(DUPLICADAS_POR_AMOSTRA) if n > 1]
+    registrar({
+        "view": view,
+        "metodo": metodo,
+        "status": status,
+        "em": time.time(),
+        "total_ms": round(total_s * 1000, 3),
+        "sql_count": medicao.sql_count,
+        "sql_ms": round(medicao.sql_s * 1000, 3),
+        "template_ms": round(medicao.template_s * 1000, 3),
+        "template_sql_count": medicao.template_sql_count,
+        # o tempo de template já vem sem o SQL disparado de dentro dele
+        "python_ms": round(max(total_s - medicao.sql_s - medicao.template_s, 0) * 1000, 3),
+        "duplicadas": duplicadas,
+    })
+
+
+def registrar(amostra):
+    global _ultima_gravacao
+    buffer().append(amostra)
+    agora = time.monotonic()
+    if agora - _ultima_gravacao >= getattr(settings, "ESCOLA_INSTRUMENTACAO_INTERVALO", INTERVALO_GRAVACAO):
+        if _lock.acquire(blocking=False):
+            try:
+                _ultima_gravacao = agora
+                gravar()
+            finally:
+                _lock.release()
+
+
+def _arquivo_do_processo():
+    return os.path.join(_diretorio(), f"{os.getpid()}.json")
+
+
+def gravar():
+    """Grava o buffer deste processo (substituição atômica do arquivo do pid)."""
+    os.makedirs(_diretorio(), exist_ok=True)
+    destino = _arquivo_do_processo()
+    temporario = f"{destino}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(list(buffer()), arquivo)
+    os.replace(temporario, destino)
+
+
+def amostras():
+    """Amostras de todos os processos: as deste em memória e as dos outros lidas dos arquivos."""
+    todas = list(buffer())
+    proprio = _arquivo_do_processo()
+    limite = time.time() - VALIDADE_ARQUIVO
+    try:
+        nomes = os.listdir(_diretorio())
+    except FileNotFoundError:
+        nomes = []
+    for nome in nomes:
+        caminho = os.path.join(_diretorio(), nome)
+        if not nome.endswith(".json") or caminho == proprio:
+            continue
+        try:
+            if os.path.getmtime(caminho) < limite:
+                continue
+            with open(caminho, encoding="utf-8") as arquivo:
+                todas.extend(json.load(arquivo))
+        except (OSError, ValueError):
+            continue
+    return todas
+
+
+def limpar():
+    buffer().clear()
+    try:
+        nomes = os.listdir(_diretorio())
+    except FileNotFoundError:
+        return
+    for nome in nomes:
+        if nome.endswith(".json"):
+            os.remove(os.path.join(_diretorio(), nome))
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def piores(lista=None, ordenar="total_ms", limite=10):
+    """Resumo por view (médias, p95 e queries repetidas), das piores para as melhores em `ordenar`."""
+    if ordenar not in METRICAS:
+        raise ValueError(f"Métrica inválida: {ordenar}")
+    por_view = defaultdict(list)
+    for amostra in amostras() if lista is None else lista:
+        por_view[amostra["view"]].append(amostra)
+
+    resumo = []
+    for view, itens in por_view.items():
+        n = len(itens)
+        repetidas = Counter()
+        for amostra in itens:
+            for sql, vezes in amostra["duplicadas"]:
+                repetidas[sql] = max(repetidas[sql], vezes)
+        linha = {"view": view, "requisicoes": n}
+        for metrica in METRICAS[:-1]:
+            linha[metrica] = round(sum(a[metrica] for a in itens) / n, 3)
+        linha["p95_total_ms"] = _percentil([a["total_ms"] for a in itens], 0.95)
+        linha["max_total_ms"] = max(a["total_ms"] for a in itens)
+        linha["duplicadas"] = sum(vezes - 1 for vezes in repetidas.values())
+        linha["queries_repetidas"] = [[sql, vezes] for sql, vezes in repetidas.most_common(DUPLICADAS_POR_AMOSTRA)]
+        resumo.append(linha)
+    resumo.sort(key=lambda linha: linha[ordenar], reverse=True)
+    return resumo[:limite]
+
+
+def instrumentar_templates():
+    """Mede Template.render (backend do Django) quando há uma Medicao ativa; idempotente."""
+    global _template_instrumentado
+    if _template_instrumentado:
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        medicao = _atual.get()
+        if medicao is None or medicao.em_template:
+            return original(self, context, request)
+        medicao.em_template = True
+        sql_antes = medicao.sql_s
+        inicio = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            medicao.em_template = False
+            medicao.template_s += (time.perf_counter() - inicio) - (medicao.sql_s - sql_antes)
+
+    Template.render = render
+    _template_instrumentado = True
+
+
+def _sql_de_requisicao_assincrona(execute, sql, params, many, context):
+    medicao = _atual.get()
+    if medicao is None or not medicao.assincrona:
+        return execute(sql, params, many, context)
+    return medicao(execute, sql, params, many, context)
+
+
+def _ao_conectar(sender, connection, **kwargs):
+    if _sql_de_requisicao_assincrona not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_de_requisicao_assincrona)
+
+
+def instrumentar_conexoes():
+    """
+    Mede o SQL de requisições assíncronas. Ele roda nas threads do sync_to_async, onde o
+    execute_wrapper aberto pelo middleware não chega; cada conexão ganha um wrapper que
+    encontra a Medicao pela ContextVar (copiada para essas threads). Idempotente.
+    """
+    connection_created.connect(_ao_conectar, dispatch_uid="escola.instrumentation")
+    for conexao in connections.all(initialized_only=True):
+        _ao_conectar(None, conexao)
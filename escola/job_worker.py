@@ -0,0 +1,15 @@
+"""
+Pontos de entrada dos processos do pool do `run_report_worker`.
+Sem imports de models no topo: o módulo é importado pelo processo filho antes do django.setup().
+"""
+import django
+
+
+def inicializar():
+    django.setup()
+
+
+def executar(job_id):
+    from escola import jobs
+
+    return jobs.executar_job(job_id)
@@ -0,0 +1,162 @@
+"""
+Relatórios em segundo plano. As views só enfileiram um ReportJob e consultam seu status;
+o comando `run_report_worker` executa os jobs num pool de processos, usando a própria
+tabela como fila. Jobs concluídos há menos de RESULTADO_TTL são reaproveitados para o
+mesmo (formato, período, versão do relatório) pelo JSON e pelas exportações; a página HTML
+não usa jobs (ver escola.report_sections).
+"""
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from escola import assincrono, exports, reports
+from escola.models.agendamento import Agendamento
+from escola.models.report_job import ReportJob
+
+logger = logging.getLogger(__name__)
+
+RESULTADO_TTL = timedelta(minutes=15)
+BLOCO_LEITURA = 64 * 1024
+# Jobs em execução há mais tempo que isso são tratados como órfãos (worker caiu) e voltam à fila.
+EXECUCAO_MAXIMA = timedelta(minutes=30)
+
+GERADORES = {
+    "xlsx": exports.xlsx_relatorio,
+    "csv": exports.csv_agendamentos,
+    "zip": exports.zip_csvs,
+}
+EXTENSOES = {"dados": "json", "xlsx": "xlsx", "csv": "csv", "zip": "zip"}
+CONTENT_TYPES = {
+    "dados": "application/json",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "zip": "application/zip",
+}
+
+
+def _periodo(start_date, end_date):
+    start_dt, end_dt, _, _ = reports.resolver_periodo(start_date, end_date)
+    return start_dt, end_dt
+
+
+def _reaproveitaveis(formato, inicio, fim):
+    return ReportJob.objects.filter(
+        Q(status__in=("PENDENTE", "EXECUTANDO")) | Q(status="CONCLUIDO", concluido_em__gte=timezone.now() - RESULTADO_TTL),
+        formato=formato,
+        inicio=inicio,
+        fim=fim,
+        versao=reports.VERSAO_RELATORIO,
+    )
+
+
+def solicitar(formato, start_date, end_date, user=None):
+    """Devolve um job reaproveitável (pendente, em execução ou concluído) ou enfileira um novo."""
+    inicio, fim = _periodo(start_date, end_date)
+    job = _reaproveitaveis(formato, inicio, fim).order_by("-criado_em").first()
+    if job is None:
+        job = ReportJob.objects.create(
+            formato=formato,
+            inicio=inicio,
+            fim=fim,
+            versao=reports.VERSAO_RELATORIO,
+            solicitado_por=user if user is not None and user.is_authenticated else None,
+        )
+    return job
+
+
+async def asolicitar(formato, start_date, end_date, user=None):
+    """solicitar() para views assíncronas (ORM assíncrono)."""
+    inicio, fim = _periodo(start_date, end_date)
+    job = await _reaproveitaveis(formato, inicio, fim).order_by("-criado_em").afirst()
+    if job is None:
+        job = await ReportJob.objects.acreate(
+            formato=formato,
+            inicio=inicio,
+            fim=fim,
+            versao=reports.VERSAO_RELATORIO,
+            solicitado_por=user if user is not None and user.is_authenticated else None,
+        )
+    return job
+
+
+async def adados(job):
+    """
+    Conteúdo (JSON) de um job 'dados' concluído, em blocos lidos do arquivo do resultado
+    no pool de escola.assincrono; nada do relatório fica na memória do processo web.
+    """
+    arquivo = await assincrono.em_thread(job.arquivo.open, "rb")
+    try:
+        while bloco := await assincrono.em_thread(arquivo.read, BLOCO_LEITURA):
+            yield bloco
+    finally:
+        await assincrono.em_thread(arquivo.close)
+
+
+def nome_arquivo(job):
+    return f"relatorio_agendamentos_{job.inicio}_{job.fim}.{EXTENSOES[job.formato]}"
+
+
+def reservar_proximo():
+    """Passa o job pendente mais antigo para EXECUTANDO e devolve seu pk (None se a fila estiver vazia)."""
+    pendentes = ReportJob.objects.filter(status="PENDENTE").order_by("criado_em").values_list("pk", flat=True)
+    for pk in pendentes[:10]:
+        # update condicional: com mais de um worker, só um consegue reservar o job
+        if ReportJob.objects.filter(pk=pk, status="PENDENTE").update(status="EXECUTANDO", iniciado_em=timezone.now(), progresso=0):
+            return pk
+    return None
+
+
+def recuperar_orfaos():
+    limite = timezone.now() - EXECUCAO_MAXIMA
+    return ReportJob.objects.filter(status="EXECUTANDO", iniciado_em__lt=limite).update(status="PENDENTE", progresso=0)
+
+
+def _escrever_dados(job, destino, progresso):
+    report = reports.gerar_relatorio(job.inicio, job.fim, incluir_linhas=False)
+    _, _, start_dt_dt, end_dt_dt = reports.resolver_periodo(job.inicio, job.fim)
+    linhas = []
+    for n, linha in enumerate(reports.iterar_linhas(start_dt_dt, end_dt_dt), start=1):
+        linhas.append(linha)
+        if n % exports.PROGRESSO_A_CADA == 0:
+            progresso(n)
+    report["agendamentos_rows"] = linhas
+    destino.write(json.dumps(report, cls=DjangoJSONEncoder).encode())
+
+
+def executar_job(job_id):
+    """Gera o resultado do job e o grava em `arquivo` (roda no processo do worker)."""
+    job = ReportJob.objects.get(pk=job_id)
+    job.iniciado_em = job.iniciado_em or timezone.now()
+    ReportJob.objects.filter(pk=job.pk).update(status="EXECUTANDO", iniciado_em=job.iniciado_em)
+
+    _, _, start_dt_dt, end_dt_dt = reports.resolver_periodo(job.inicio, job.fim)
+    total = Agendamento.objects.filter(inicio__gte=start_dt_dt, inicio__lte=end_dt_dt).count()
+
+    def progresso(n):
+        ReportJob.objects.filter(pk=job.pk).update(progresso=min(99, n * 100 // max(total, 1)))
+
+    try:
+        with tempfile.TemporaryFile() as destino:
+            if job.formato == "dados":
+                _escrever_dados(job, destino, progresso)
+            else:
+                for bloco in GERADORES[job.formato](job.inicio, job.fim, progresso):
+                    destino.write(bloco.encode() if isinstance(bloco, str) else bloco)
+            destino.seek(0)
+            job.arquivo.save(f"{job.pk}.{EXTENSOES[job.formato]}", File(destino), save=False)
+    except Exception as exc:
+        logger.exception("Falha no ReportJob %s", job.pk)
+        ReportJob.objects.filter(pk=job.pk).update(status="ERRO", erro=str(exc), concluido_em=timezone.now())
+        return job.pk
+
+    job.status = "CONCLUIDO"
+    job.progresso = 100
+    job.concluido_em = timezone.now()
+    job.save(update_fields=["arquivo", "status", "progresso", "concluido_em"])
+    return job.pk
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from escola import benchmarks
+
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede os caminhos quentes (escola.benchmarks) na base atual, sem alterá-la, e grava tempos e '
+        'número de queries em JSON para comparar entre commits. Gere volume antes com seed_synthetic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=5)
+        parser.add_argument('--casos', nargs='+', choices=sorted(benchmarks.CASOS), help='Só estes casos')
+        parser.add_argument('--saida', help='Arquivo JSON (padrão: benchmarks/<data>-<commit>.json)')
+        parser.add_argument('--comparar', metavar='JSON', help='Resultado anterior para comparar')
+
+    def handle(self, *args, **options):
+        anterior = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as arquivo:
+                    anterior = json.load(arquivo)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Não foi possível ler {options["comparar"]}: {exc}') from exc
+
+        try:
+            resultado = benchmarks.executar(repeticoes=options['repeticoes'], nomes=options['casos'])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        resultado['commit'] = _commit_atual()
+
+        saida = options['saida'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f'{timezone.now():%Y%m%d-%H%M%S}-{resultado["commit"] or "sem-commit"}.json'
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+        self.stdout.write(f'{"caso":<30} {"mediana":>10} {"min":>10} {"queries":>8} {"sql":>10}')
+        for nome, medida in resultado['casos'].items():
+            self.stdout.write(
+                f'{nome:<30} {medida["mediana_s"] * 1000:>8.1f}ms {medida["min_s"] * 1000:>8.1f}ms '
+                f'{medida["queries"]:>8} {medida["tempo_sql_s"] * 1000:>8.1f}ms'
+            )
+        if anterior:
+            self.stdout.write(f'\nComparação com {anterior.get("commit") or options["comparar"]}:')
+            for nome, antes, agora, razao, q_antes, q_agora in benchmarks.comparar(resultado, anterior):
+                variacao = f'{razao:5.2f}x' if razao else '-'
+                self.stdout.write(f'{nome:<30} {antes * 1000:>8.1f}ms -> {agora * 1000:>8.1f}ms {variacao:>7}  queries {q_antes} -> {q_agora}')
+        self.stdout.write(self.style.SUCCESS(f'Resultados gravados em {saida}'))
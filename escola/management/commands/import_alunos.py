@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from escola import roster_import
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa a lista de alunos de um CSV ou XLSX (colunas nome, serie, turno e, opcionalmente, '
+        'telefone e ativo), criando e atualizando em lote. Com erros, nada é gravado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--desativar-ausentes', action='store_true', help='Desativa alunos ativos que não estão no arquivo')
+        parser.add_argument('--simular', action='store_true', help='Só mostra a diferença, sem gravar')
+        parser.add_argument('--detalhes', type=int, default=20, help='Itens listados por seção')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = roster_import.importar(
+                    arquivo,
+                    options['arquivo'],
+                    desativar_ausentes=options['desativar_ausentes'],
+                    simular=options['simular'],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+        except roster_import.ErroImportacao as exc:
+            raise CommandError(str(exc)) from exc
+
+        limite = options['detalhes']
+        for item in resultado.criados[:limite]:
+            self.stdout.write(f'+ linha {item["linha"]}: {item["nome"]} ({item["serie"]}/{item["turno"]})')
+        for item in resultado.atualizados[:limite]:
+            mudancas = ', '.join(f'{campo}: {antes!r} -> {depois!r}' for campo, (antes, depois) in item['mudancas'].items())
+            self.stdout.write(f'~ linha {item["linha"]}: {item["nome"]} ({mudancas})')
+        for item in resultado.desativados[:limite]:
+            self.stdout.write(f'- {item["nome"]} ({item["serie"]}/{item["turno"]})')
+        for numero, erro in resultado.erros[:limite]:
+            self.stderr.write(f'! linha {numero}: {erro}')
+
+        resumo = ', '.join(f'{nome}: {valor}' for nome, valor in resultado.resumo().items())
+        if resultado.aplicado:
+            self.stdout.write(self.style.SUCCESS(resumo))
+        else:
+            self.stdout.write(self.style.WARNING(f'{resumo} (nada gravado)'))
@@ -0,0 +1,62 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from escola import carga
+
+PADRAO = ['/alunos/json/?serie=1&turno=M', '/agendamentos/feed/', '/relatorios/conteudos/json/resumo/']
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga dos endpoints JSON/polling contra um servidor já no ar (ver escola.carga). '
+        'Rode uma vez com workers síncronos e outra com core/gunicorn_asgi.py e compare com --comparar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', help=f'Caminhos ou URLs (padrão: {" ".join(PADRAO)})')
+        parser.add_argument('--base', default='http://127.0.0.1:8000')
+        parser.add_argument('--clientes', type=int, default=200)
+        parser.add_argument('--duracao', type=float, default=10.0, help='Segundos')
+        parser.add_argument('--usuario', help='Autentica os clientes com uma sessão deste usuário')
+        parser.add_argument('--saida', help='Grava o resultado em JSON')
+        parser.add_argument('--comparar', metavar='JSON', help='Resultado anterior para comparar')
+
+    def handle(self, *args, **options):
+        anterior = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as arquivo:
+                    anterior = json.load(arquivo)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Não foi possível ler {options["comparar"]}: {exc}') from exc
+
+        cookie = None
+        if options['usuario']:
+            try:
+                cookie = carga.cookie_de_sessao(User.objects.get(username=options['usuario']))
+            except User.DoesNotExist as exc:
+                raise CommandError(f'Usuário {options["usuario"]} não existe.') from exc
+
+        base = options['base'].rstrip('/')
+        urls = [url if '://' in url else base + url for url in options['urls'] or PADRAO]
+        if options['clientes'] < 1:
+            raise CommandError('--clientes deve ser positivo.')
+        resultado = carga.executar(urls, clientes=options['clientes'], duracao=options['duracao'], cookie=cookie)
+
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+        self.stdout.write(f'{"url":<50} {"req/s":>8} {"p50":>9} {"p95":>9} {"p99":>9} {"erros":>6}')
+        for nome, medida in [*resultado['urls'].items(), ('total', resultado['total'])]:
+            self.stdout.write(
+                f'{nome[-50:]:<50} {medida["por_segundo"]:>8.1f} {medida["p50_ms"]:>7.1f}ms '
+                f'{medida["p95_ms"]:>7.1f}ms {medida["p99_ms"]:>7.1f}ms {medida["erros"]:>6}'
+            )
+        if anterior:
+            antes, agora = anterior['total'], resultado['total']
+            self.stdout.write(f'\nComparação com {options["comparar"]} ({anterior["clientes"]} clientes):')
+            for chave in ('por_segundo', 'p50_ms', 'p95_ms', 'p99_ms', 'erros'):
+                self.stdout.write(f'{chave:<12} {antes[chave]:>10} -> {agora[chave]:<10}')
+        self.stdout.write(self.style.SUCCESS(f'{resultado["total"]["requisicoes"]} requisições em {resultado["duracao_s"]}s'))
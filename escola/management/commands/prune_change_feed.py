@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from escola import changefeed
+
+class Command(BaseCommand):
+    help = 'Apaga do registro do feed de mudanças o que for mais antigo que a retenção'
+
+    def handle(self, *args, **options):
+        total = changefeed.podar()
+        self.stdout.write(self.style.SUCCESS(f'Mudanças apagadas: {total}'))
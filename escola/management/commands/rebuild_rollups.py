@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from escola import rollups
+
+class Command(BaseCommand):
+    help = 'Reconstrói do zero a tabela de resumo diário (ResumoDiario) a partir dos agendamentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rollups.reconstruir(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Linhas de resumo diário geradas: {total}'))
@@ -0,0 +1,72 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+from escola import job_worker, jobs
+from escola.models.report_job import ReportJob
+
+
+class Command(BaseCommand):
+    help = 'Executa os ReportJobs pendentes num pool de processos (a fila é a própria tabela, sem broker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, default=2, help='0 executa os jobs neste mesmo processo')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre consultas à fila')
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e termina')
+
+    def handle(self, *args, **options):
+        recuperados = jobs.recuperar_orfaos()
+        if recuperados:
+            self.stdout.write(f'Jobs órfãos devolvidos à fila: {recuperados}')
+
+        if options['processos'] <= 0:
+            self._executar_inline(options)
+            return
+
+        # conexões não podem ser herdadas pelos processos filhos
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            max_workers=options['processos'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=job_worker.inicializar,
+        )
+        em_execucao = {}
+        try:
+            while True:
+                while len(em_execucao) < options['processos'] and (pk := jobs.reservar_proximo()) is not None:
+                    em_execucao[pool.submit(job_worker.executar, pk)] = pk
+                    self.stdout.write(f'Job {pk} iniciado')
+                if options['uma_vez'] and not em_execucao:
+                    break
+                if em_execucao:
+                    concluidos, _ = wait(em_execucao, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                    for futuro in concluidos:
+                        self._finalizar(em_execucao.pop(futuro), futuro)
+                else:
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            self.stdout.write('Encerrando; aguardando os jobs em execução...')
+        finally:
+            pool.shutdown(wait=True)
+
+    def _finalizar(self, pk, futuro):
+        # erros da geração já são gravados pelo job; aqui só sobram falhas do próprio processo
+        if futuro.exception() is not None:
+            ReportJob.objects.filter(pk=pk).update(status='ERRO', erro=str(futuro.exception()), concluido_em=timezone.now())
+            self.stderr.write(f'Job {pk} falhou: {futuro.exception()}')
+        else:
+            self.stdout.write(f'Job {pk} finalizado')
+
+    def _executar_inline(self, options):
+        while True:
+            pk = jobs.reservar_proximo()
+            if pk is not None:
+                jobs.executar_job(pk)
+                self.stdout.write(f'Job {pk} executado')
+            elif options['uma_vez']:
+                break
+            else:
+                time.sleep(options['intervalo'])
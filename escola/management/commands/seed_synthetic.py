@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from escola import synthetic
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos com volumes realistas (alunos, professores, conteúdos e anos de '
+        'agendamentos) para os benchmarks. Os registros levam o prefixo "[sint] ".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alunos', type=int, default=3000)
+        parser.add_argument('--professores', type=int, default=40)
+        parser.add_argument('--conteudos', type=int, default=30)
+        parser.add_argument('--dias', type=int, default=730, help='Dias de histórico (para trás a partir de hoje)')
+        parser.add_argument('--dias-futuros', type=int, default=60)
+        parser.add_argument('--aulas-por-dia', type=int, default=6, help='Aulas por professor por dia útil (máx. 10)')
+        parser.add_argument('--semente', type=int, default=0)
+        parser.add_argument('--limpar', action='store_true', help='Remove os dados sintéticos existentes antes de gerar')
+
+    def handle(self, *args, **options):
+        if options['limpar']:
+            self.stdout.write(f'Registros sintéticos removidos: {synthetic.limpar()}')
+        criados = synthetic.gerar(
+            alunos=options['alunos'],
+            professores=options['professores'],
+            conteudos=options['conteudos'],
+            dias=options['dias'],
+            dias_futuros=options['dias_futuros'],
+            aulas_por_dia=min(options['aulas_por_dia'], 10),
+            semente=options['semente'],
+        )
+        self.stdout.write(self.style.SUCCESS(', '.join(f'{nome}: {n}' for nome, n in criados.items())))
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+from escola import instrumentation
+
+
+class Command(BaseCommand):
+    help = (
+        'Lista as views mais lentas segundo as amostras da instrumentação por requisição '
+        '(InstrumentacaoMiddleware), com as queries mais repetidas de cada uma'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ordenar', choices=instrumentation.METRICAS, default='total_ms')
+        parser.add_argument('--limite', type=int, default=10)
+        parser.add_argument('--json', action='store_true', help='Saída em JSON')
+        parser.add_argument('--limpar', action='store_true', help='Apaga as amostras gravadas depois de listar')
+
+    def handle(self, *args, **options):
+        amostras = instrumentation.amostras()
+        piores = instrumentation.piores(amostras, ordenar=options['ordenar'], limite=options['limite'])
+        if options['json']:
+            self.stdout.write(json.dumps(piores, indent=2, ensure_ascii=False))
+        else:
+            self.stdout.write(f'{len(amostras)} amostras')
+            self.stdout.write(
+                f'{"view":<45} {"req":>5} {"total":>9} {"p95":>9} {"sql":>9} {"queries":>8} '
+                f'{"tpl":>9} {"q/tpl":>6} {"python":>9} {"dup":>5}'
+            )
+            for linha in piores:
+                self.stdout.write(
+                    f'{linha["view"][:45]:<45} {linha["requisicoes"]:>5} {linha["total_ms"]:>7.1f}ms '
+                    f'{linha["p95_total_ms"]:>7.1f}ms {linha["sql_ms"]:>7.1f}ms {linha["sql_count"]:>8.1f} '
+                    f'{linha["template_ms"]:>7.1f}ms {linha["template_sql_count"]:>6.1f} '
+                    f'{linha["python_ms"]:>7.1f}ms {linha["duplicadas"]:>5}'
+                )
+                for sql, vezes in linha['queries_repetidas']:
+                    self.stdout.write(f'    {vezes}x {sql[:150]}')
+        if options['limpar']:
+            instrumentation.limpar()
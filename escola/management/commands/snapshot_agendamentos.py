@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from escola import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Atualiza o arquivo colunar mensal dos agendamentos (escola.snapshots), regenerando só '
+        'os meses alterados desde a última execução. Pensado para rodar toda noite.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Regera todos os meses')
+        parser.add_argument(
+            '--parquet',
+            metavar='DIR',
+            help='Também grava DIR/mes=AAAA-MM/agendamentos.parquet dos meses regenerados (via pyarrow)',
+        )
+
+    def handle(self, *args, **options):
+        gerados, removidos = snapshots.sincronizar(completo=options['completo'])
+        for mes, linhas in gerados.items():
+            self.stdout.write(f'{mes:%Y-%m}: {linhas} linhas')
+            if options['parquet']:
+                self._gravar_parquet(mes, options['parquet'])
+        for mes in removidos:
+            self.stdout.write(f'{mes:%Y-%m}: removido (sem agendamentos)')
+        self.stdout.write(self.style.SUCCESS(f'Meses atualizados: {len(gerados)}; removidos: {len(removidos)}'))
+
+    def _gravar_parquet(self, mes, destino):
+        colunas, meta = snapshots.ler_colunas(mes)
+        if not colunas:
+            return
+        df = pd.DataFrame({
+            coluna: pd.Categorical.from_codes(colunas[coluna], meta['dicionarios'][coluna])
+            if coluna in snapshots.COLUNAS_TEXTO else colunas[coluna]
+            for coluna in snapshots.COLUNAS
+        })
+        pasta = os.path.join(destino, f'mes={mes:%Y-%m}')
+        os.makedirs(pasta, exist_ok=True)
+        try:
+            df.to_parquet(os.path.join(pasta, 'agendamentos.parquet'), index=False)
+        except ImportError as exc:
+            raise CommandError(f'Exportação Parquet indisponível: {exc}') from exc
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:49
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+
+
+def popular_resumo_diario(apps, schema_editor):
+    Agendamento = apps.get_model('escola', 'Agendamento')
+    ResumoDiario = apps.get_model('escola', 'ResumoDiario')
+    grupos = (
+        Agendamento.objects.annotate(
+            dia_local=TruncDate('inicio'),
+            mes_utc=TruncMonth('inicio', tzinfo=datetime.timezone.utc),
+        )
+        .values('dia_local', 'mes_utc', 'professor_id', 'conteudo_id', 'status', 'aluno__serie', 'aluno__turno')
+        .annotate(n=Count('id'), soma=Sum(Coalesce('duracao_minutos', 'conteudo__duracao_minutos')))
+        .order_by()
+    )
+    ResumoDiario.objects.bulk_create(
+        [
+            ResumoDiario(
+                dia=g['dia_local'],
+                mes=g['mes_utc'].date(),
+                professor_id=g['professor_id'],
+                conteudo_id=g['conteudo_id'],
+                serie=g['aluno__serie'] or '',
+                turno=g['aluno__turno'] or '',
+                status=g['status'],
+                total=g['n'],
+                minutos=g['soma'] or 0,
+            )
+            for g in grupos
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0005_aluno_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(help_text='Data local do início do agendamento')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês (UTC) usado no relatório mensal')),
+                ('serie', models.CharField(blank=True, max_length=10)),
+                ('turno', models.CharField(blank=True, max_length=10)),
+                ('status', models.CharField(choices=[('AGENDADO', 'Agendado'), ('CONCLUIDO', 'Concluído'), ('CANCELADO', 'Cancelado')], max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('minutos', models.BigIntegerField(default=0)),
+                ('conteudo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='escola.conteudo')),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='escola.professor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'dia'], name='escola_resu_status_2f5fe3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dia', 'mes', 'professor', 'conteudo', 'serie', 'turno', 'status'), name='escola_resumodiario_chave')],
+            },
+        ),
+        migrations.RunPython(popular_resumo_diario, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0006_resumodiario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aluno',
+            index=models.Index(fields=['is_active', 'serie', 'turno', 'nome'], name='escola_alun_is_acti_297f28_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0007_aluno_is_active_serie_turno_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['aluno', 'status', 'inicio'], name='escola_agen_aluno_i_fcf749_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['status', 'inicio'], name='escola_agen_status_2cc4ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluno',
+            index=models.Index(fields=['serie', 'turno', 'nome'], name='escola_alun_serie_d5a39e_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0008_indices_de_consulta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formato', models.CharField(choices=[('dados', 'Dados (HTML/JSON)'), ('xlsx', 'Excel (XLSX)'), ('csv', 'CSV'), ('zip', 'ZIP de CSVs')], max_length=10)),
+                ('inicio', models.DateField()),
+                ('fim', models.DateField()),
+                ('versao', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro')], default='PENDENTE', max_length=20)),
+                ('progresso', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('arquivo', models.FileField(blank=True, upload_to='relatorios/')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['formato', 'inicio', 'fim', 'versao', 'status'], name='escola_repo_formato_2af724_idx'), models.Index(fields=['status', 'criado_em'], name='escola_repo_status_126509_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0009_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgendamentoRemovido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('agendamento_id', models.BigIntegerField()),
+                ('professor_id', models.BigIntegerField(help_text='Professor em cuja agenda o agendamento estava')),
+                ('excluido', models.BooleanField(default=True, help_text='Falso quando só mudou de professor')),
+                ('removido_em', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['updated_at', 'id'], name='escola_agen_updated_941454_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['professor', 'updated_at', 'id'], name='escola_agen_profess_29a8c7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamentoremovido',
+            index=models.Index(fields=['professor_id', 'id'], name='escola_agen_profess_5a1050_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamentoremovido',
+            index=models.Index(fields=['removido_em'], name='escola_agen_removid_26f00a_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0010_feed_de_mudancas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='aluno',
+            name='escola_alun_is_acti_297f28_idx',
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('escola', '0011_remover_indice_aluno_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MudancaAgendamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('agendamento_id', models.BigIntegerField()),
+                ('professor_id', models.BigIntegerField(help_text='Professor em cuja agenda a mudança aparece')),
+                ('tipo', models.CharField(choices=[('ALTERADO', 'Criado ou alterado'), ('EXCLUIDO', 'Excluído'), ('SAIU', 'Trocado de professor')], max_length=10)),
+                ('registrada_em', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='AgendamentoRemovido',
+        ),
+        migrations.RemoveIndex(
+            model_name='agendamento',
+            name='escola_agen_updated_941454_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='agendamento',
+            name='escola_agen_profess_29a8c7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['professor', 'id'], name='escola_agen_profess_0beb96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mudancaagendamento',
+            index=models.Index(fields=['professor_id', 'id'], name='escola_muda_profess_799ae7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mudancaagendamento',
+            index=models.Index(fields=['registrada_em'], name='escola_muda_registr_5bbbf0_idx'),
+        ),
+    ]
@@ -37,6 +37,10 @@ class Agendamento(models.Model):
             models.Index(fields=['inicio']),
             models.Index(fields=['status']),
             models.Index(fields=['professor', 'inicio']),
+            models.Index(fields=['aluno', 'status', 'inicio']),
+            models.Index(fields=['status', 'inicio']),
+            # primeira sincronização do feed de mudanças (escola.changefeed), em ordem de pk
+            models.Index(fields=['professor', 'id']),
         ]
 
     def __str__(self):
@@ -51,26 +55,11 @@ class Agendamento(models.Model):
         if not self.duracao_minutos:
             self.duracao_minutos = self.conteudo.duracao_minutos
 
-        inicio = self.inicio
-        fim = self.fim  
+        from ..conflicts import conflitos_de
 
-        conflitos = Agendamento.objects.filter(
-            aluno=self.aluno,
-            status__in=[self.STATUS_AGENDADO, self.STATUS_CONCLUIDO],
-            inicio__lt=fim,
-            inicio__gt=inicio - timedelta(minutes=self.duracao_minutos)
-        ).exclude(pk=self.pk)
-
-        for other in conflitos:
-            other_dur = other.duracao_minutos or other.conteudo.duracao_minutos
-            other_start = other.inicio
-            other_end = other_start + timedelta(minutes=other_dur)
-
-            if (inicio < other_end) and (other_start < fim):
-                raise ValidationError(
-                    f"Este aluno já possui um atendimento nesse horário com o professor "
-                    f"{other.professor.nome} ({other_start.strftime('%H:%M')} - {other_end.strftime('%H:%M')})."
-                )
+        conflitos = conflitos_de(self)
+        if conflitos:
+            raise ValidationError([c.mensagem for c in conflitos])
 
     def save(self, *args, **kwargs):
         self.full_clean()
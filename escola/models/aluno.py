@@ -7,5 +7,10 @@ class Aluno(models.Model):
     telefone = models.CharField(max_length=20, blank=True, null=True)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['serie', 'turno', 'nome']),
+        ]
+
     def __str__(self):
         return self.nome
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class MudancaAgendamento(models.Model):
+    """
+    Registro do feed de mudanças (escola.changefeed), gravado depois do commit da
+    transação que alterou o agendamento: o id segue a ordem de término das transações.
+    ALTERADO vale para a agenda do professor atual; SAIU marca a agenda do professor
+    anterior numa troca de professor. `prune_change_feed` apaga os antigos.
+    """
+    ALTERADO = 'ALTERADO'
+    EXCLUIDO = 'EXCLUIDO'
+    SAIU = 'SAIU'
+    TIPO_CHOICES = [
+        (ALTERADO, 'Criado ou alterado'),
+        (EXCLUIDO, 'Excluído'),
+        (SAIU, 'Trocado de professor'),
+    ]
+
+    agendamento_id = models.BigIntegerField()
+    professor_id = models.BigIntegerField(help_text='Professor em cuja agenda a mudança aparece')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    registrada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['professor_id', 'id']),
+            models.Index(fields=['registrada_em']),
+        ]
+
+    def __str__(self):
+        return f"Agendamento {self.agendamento_id} {self.get_tipo_display().lower()} ({self.professor_id}) em {self.registrada_em}"
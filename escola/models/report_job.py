@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import models
+
+
+class ReportJob(models.Model):
+    """
+    Geração de relatório em segundo plano, executada pelo comando `run_report_worker`.
+    Jobs concluídos servem de cache para o mesmo (formato, período, versão do relatório).
+    """
+    FORMATO_CHOICES = [
+        ('dados', 'Dados (HTML/JSON)'),
+        ('xlsx', 'Excel (XLSX)'),
+        ('csv', 'CSV'),
+        ('zip', 'ZIP de CSVs'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('EXECUTANDO', 'Executando'),
+        ('CONCLUIDO', 'Concluído'),
+        ('ERRO', 'Erro'),
+    ]
+
+    formato = models.CharField(max_length=10, choices=FORMATO_CHOICES)
+    inicio = models.DateField()
+    fim = models.DateField()
+    versao = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    progresso = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    arquivo = models.FileField(upload_to='relatorios/', blank=True)
+    solicitado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['formato', 'inicio', 'fim', 'versao', 'status']),
+            models.Index(fields=['status', 'criado_em']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_formato_display()} {self.inicio} a {self.fim} ({self.get_status_display()})"
@@ -0,0 +1,33 @@
+from django.db import models
+from .agendamento import Agendamento
+from .conteudo import Conteudo
+from .professor import Professor
+
+class ResumoDiario(models.Model):
+    """
+    Totais diários de agendamentos por professor, conteúdo, série/turno do aluno e status.
+    Mantido pelos signals de Agendamento/Aluno; `rebuild_rollups` reconstrói do zero.
+    """
+    dia = models.DateField(help_text='Data local do início do agendamento')
+    mes = models.DateField(help_text='Primeiro dia do mês (UTC) usado no relatório mensal')
+    professor = models.ForeignKey(Professor, on_delete=models.CASCADE, related_name='+')
+    conteudo = models.ForeignKey(Conteudo, on_delete=models.CASCADE, related_name='+')
+    serie = models.CharField(max_length=10, blank=True)
+    turno = models.CharField(max_length=10, blank=True)
+    status = models.CharField(max_length=20, choices=Agendamento.STATUS_CHOICES)
+    total = models.IntegerField(default=0)
+    minutos = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'mes', 'professor', 'conteudo', 'serie', 'turno', 'status'],
+                name='escola_resumodiario_chave',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'dia']),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} - {self.professor_id}/{self.conteudo_id} - {self.status}: {self.total}"
@@ -0,0 +1,134 @@
+"""
+Paginação por cursor (keyset) sobre (inicio, id), apoiada nos índices de `inicio`.
+Cada página custa uma query com LIMIT, independente da profundidade; a contagem
+total é opcional e, no Postgres, estimada pelo planner.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+POR_PAGINA_MAXIMO = 100
+# Abaixo disso a estimativa do planner não compensa: conta de verdade.
+CONTAGEM_EXATA_ATE = 10000
+
+
+class PaginaKeyset:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def codificar_cursor(direcao, inicio, pk):
+    bruto = f"{direcao}|{inicio.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor):
+    """(direcao, inicio, pk) ou None se o cursor for inválido."""
+    if not cursor:
+        return None
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        direcao, inicio, pk = bruto.split("|")
+        if direcao not in ("n", "p"):
+            return None
+        return direcao, datetime.fromisoformat(inicio), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def contagem_aproximada(qs):
+    """Estimativa do planner no Postgres (sem varrer a tabela); contagem exata nos demais bancos."""
+    conexao = connections[qs.db]
+    if conexao.vendor != "postgresql":
+        return qs.count()
+    sql, params = qs.order_by().query.sql_with_params()
+    with conexao.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plano = cursor.fetchone()[0]
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]["Plan"]["Plan Rows"])
+
+
+class PaginatorEstimado(Paginator):
+    """
+    Paginator por página (admin) que usa a estimativa do planner no Postgres para listas
+    grandes, em vez de um COUNT(*) sobre a tabela inteira a cada página.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if connections[qs.db].vendor == "postgresql":
+            estimativa = contagem_aproximada(qs)
+            if estimativa >= CONTAGEM_EXATA_ATE:
+                return estimativa
+        return qs.count()
+
+
+def tamanho_da_pagina(valor, padrao=20):
+    """`por_pagina` vindo da query string: inteiro entre 1 e POR_PAGINA_MAXIMO; o padrão se inválido."""
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        valor = padrao
+    return max(1, min(valor, POR_PAGINA_MAXIMO))
+
+
+def paginar_keyset(qs, cursor=None, por_pagina=20, decrescente=True, contar=False):
+    """
+    Página de `qs` ordenada por (inicio, id) a partir do cursor recebido.
+    decrescente=True: mais recentes primeiro. contar=True inclui `total` (aproximado no Postgres).
+    """
+    por_pagina = tamanho_da_pagina(por_pagina)
+    posicao = decodificar_cursor(cursor)
+    voltando = posicao is not None and posicao[0] == "p"
+
+    # Para voltar uma página, percorremos na ordem inversa e depois desinvertemos.
+    descendo = decrescente != voltando
+    ordem = ("-inicio", "-id") if descendo else ("inicio", "id")
+    pagina_qs = qs.order_by(*ordem)
+    if posicao is not None:
+        _, inicio, pk = posicao
+        if descendo:
+            pagina_qs = pagina_qs.filter(Q(inicio__lt=inicio) | Q(inicio=inicio, id__lt=pk))
+        else:
+            pagina_qs = pagina_qs.filter(Q(inicio__gt=inicio) | Q(inicio=inicio, id__gt=pk))
+
+    itens = list(pagina_qs[: por_pagina + 1])
+    tem_mais = len(itens) > por_pagina
+    itens = itens[:por_pagina]
+    if voltando:
+        itens.reverse()
+
+    next_cursor = previous_cursor = None
+    if itens:
+        if tem_mais or voltando:
+            next_cursor = codificar_cursor("n", itens[-1].inicio, itens[-1].pk)
+        if (tem_mais and voltando) or (posicao is not None and not voltando):
+            previous_cursor = codificar_cursor("p", itens[0].inicio, itens[0].pk)
+
+    total = contagem_aproximada(qs) if contar else None
+    return PaginaKeyset(itens, next_cursor, previous_cursor, total)
@@ -0,0 +1,123 @@
+"""
+Relatório em seções para as abas da página: o resumo, cada quebra e cada página das
+linhas são calculados só quando pedidos e guardados em cache já serializados (orjson,
+quando instalado) e comprimidos (gzip, e brotli quando instalado), com ETag.
+A chave leva as versões de agendamentos e cadastros de escola.dashboard: salvar um
+agendamento (ou renomear aluno, professor, conteúdo) invalida todas as seções de uma vez.
+A página carrega o resumo primeiro e busca as outras abas ao abri-las.
+"""
+import gzip
+import hashlib
+import json
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from escola import dashboard, pagination, reports
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele, json da biblioteca padrão
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele, só gzip
+    brotli = None
+
+SECOES = ("resumo", *reports.QUEBRAS, "rows")
+LINHAS_POR_PAGINA = 50
+# Tempo que cada seção de um período fica em cache entre trocas de aba e de página.
+SECAO_CACHE_TIMEOUT = 5 * 60
+
+
+class Secao(NamedTuple):
+    corpo: bytes
+    comprimidos: dict  # Content-Encoding -> corpo comprimido
+    etag: str
+
+
+def _padrao(valor):
+    # agregações no Postgres podem voltar como Decimal
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def codificar(dados):
+    """JSON compacto em bytes."""
+    if orjson is not None:
+        return orjson.dumps(dados, default=_padrao)
+    return json.dumps(dados, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _comprimir(corpo):
+    comprimidos = {"gzip": gzip.compress(corpo, compresslevel=6)}
+    if brotli is not None:
+        comprimidos["br"] = brotli.compress(corpo)
+    return comprimidos
+
+
+def _linhas(start_dt_dt, end_dt_dt, cursor, por_pagina):
+    pagina = pagination.paginar_keyset(
+        reports.agendamentos_do_periodo(start_dt_dt, end_dt_dt),
+        cursor=cursor,
+        por_pagina=por_pagina,
+        decrescente=False,
+    )
+    return {
+        "results": [reports.linha_de(ag) for ag in pagina.object_list],
+        "next": pagina.next_cursor,
+        "previous": pagina.previous_cursor,
+    }
+
+
+def calcular(secao, start_date, end_date, cursor=None, por_pagina=LINHAS_POR_PAGINA):
+    """Dados de uma seção do período, sem calcular as demais."""
+    if secao == "resumo":
+        return reports.resumo(start_date, end_date)
+    if secao == "rows":
+        _, _, start_dt_dt, end_dt_dt = reports.resolver_periodo(start_date, end_date)
+        return _linhas(start_dt_dt, end_dt_dt, cursor, por_pagina)
+    if secao in reports.QUEBRAS:
+        return reports.quebra(secao, start_date, end_date)
+    raise ValueError(f"Seção inválida: {secao}")
+
+
+def obter(secao, start_date, end_date, cursor=None, por_pagina=LINHAS_POR_PAGINA):
+    """Seção pronta para resposta, em cache por (versões, seção, período[, página])."""
+    if secao not in SECOES:
+        raise ValueError(f"Seção inválida: {secao}")
+    start_dt, end_dt, _, _ = reports.resolver_periodo(start_date, end_date)
+    versao = f"{reports.VERSAO_RELATORIO}:{dashboard.versao_agendamentos()}:{dashboard.versao_cadastros()}"
+    identidade = f"{versao}:{secao}:{start_dt}:{end_dt}"
+    if secao == "rows":
+        identidade += f":{cursor or ''}:{por_pagina}"
+    key = "escola:relatorio:secao:" + hashlib.sha1(identidade.encode()).hexdigest()
+    item = cache.get(key)
+    if item is None:
+        corpo = codificar(calcular(secao, start_dt, end_dt, cursor, por_pagina))
+        item = Secao(corpo, _comprimir(corpo), f'"{hashlib.sha1(corpo).hexdigest()}"')
+        cache.set(key, item, SECAO_CACHE_TIMEOUT)
+    return item
+
+
+def resposta(request, item):
+    """HttpResponse com ETag (304 quando o cliente já tem a seção) e br/gzip se aceitos."""
+    response = get_conditional_response(request, etag=item.etag)
+    if response is None:
+        aceitas = request.headers.get("Accept-Encoding", "")
+        codificacao = next((c for c in ("br", "gzip") if c in item.comprimidos and c in aceitas), None)
+        if codificacao:
+            response = HttpResponse(item.comprimidos[codificacao], content_type="application/json")
+            response["Content-Encoding"] = codificacao
+        else:
+            response = HttpResponse(item.corpo, content_type="application/json")
+    response["ETag"] = item.etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,14 +1,346 @@
-from django.db.models import Count
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from typing import NamedTuple
+
+from django.db.models import Avg, Count, DateTimeField, DurationField, ExpressionWrapper, F, Func, QuerySet, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from escola.models.agendamento import Agendamento
+from escola.models.resumo_diario import ResumoDiario
+
+# Períodos a partir deste tamanho são lidos do ResumoDiario em vez dos agendamentos.
+ROLLUP_MIN_DIAS = 31
+# Incrementar quando o formato/conteúdo do relatório mudar: invalida os resultados guardados em ReportJob.
+VERSAO_RELATORIO = 1
+
+
+def _limite_de_dia(dt):
+    local = timezone.localtime(dt) if timezone.is_aware(dt) else dt
+    return local.date() if local.time() == time.min else None
+
 
 def concluido_por_conteudo(queryset, start_dt, end_dt):
     """
     Retorna uma lista com {'conteudo': nome, 'total': n} para agendamentos CONCLUIDOS
     dentro do período [start_dt, end_dt).
     queryset: Agendamento.objects.all() ou filtrado
+    Sem filtros no queryset e com limites à meia-noite, períodos longos vêm do ResumoDiario.
     """
+    dia_inicial, dia_final = _limite_de_dia(start_dt), _limite_de_dia(end_dt)
+    if (
+        queryset.model is Agendamento
+        and not queryset.query.has_filters()
+        and dia_inicial
+        and dia_final
+        and (dia_final - dia_inicial).days >= ROLLUP_MIN_DIAS
+    ):
+        qs = ResumoDiario.objects.filter(
+            status='CONCLUIDO',
+            dia__gte=dia_inicial,
+            dia__lt=dia_final,
+        ).values('conteudo__nome').annotate(total=Sum('total')).order_by('-total')
+        return list(qs)
+
     qs = queryset.filter(
         status='CONCLUIDO',
         inicio__gte=start_dt,
         inicio__lt=end_dt
     ).values('conteudo__nome').annotate(total=Count('id')).order_by('-total')
     return list(qs)
+
+
+def resolver_periodo(start_date, end_date):
+    """
+    Normaliza o período do relatório (padrão: últimos 30 dias).
+    Retorna (start_dt, end_dt, inicio_aware, fim_aware), onde os dois primeiros são
+    datetime.date e os dois últimos os limites inclusivos usados no filtro de `inicio`.
+    """
+    if not start_date and not end_date:
+        end_dt = timezone.localdate()
+        start_dt = end_dt - timedelta(days=30)
+    else:
+        end_dt = end_date or timezone.localdate()
+        start_dt = start_date or (end_dt - timedelta(days=30))
+
+    start_dt_dt = datetime.combine(start_dt, time.min)
+    end_dt_dt = datetime.combine(end_dt, time.max)
+
+    try:
+        start_dt_dt = timezone.make_aware(start_dt_dt)
+        end_dt_dt = timezone.make_aware(end_dt_dt)
+    except Exception:
+        pass
+
+    return start_dt, end_dt, start_dt_dt, end_dt_dt
+
+
+def duracao_efetiva():
+    """Duração do agendamento em minutos, usando a do conteúdo quando não informada."""
+    return Coalesce("duracao_minutos", "conteudo__duracao_minutos")
+
+
+class Minutos(Func):
+    """Converte minutos (inteiro) em duração, no SQLite (microssegundos) e no Postgres (interval)."""
+    output_field = DurationField()
+    template = "(%(expressions)s * 60000000)"
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="make_interval(mins => %(expressions)s)", **extra_context)
+
+
+def fim_efetivo():
+    """Horário de término do agendamento (início + duração efetiva), calculado no banco."""
+    return ExpressionWrapper(F("inicio") + Minutos(duracao_efetiva()), output_field=DateTimeField())
+
+
+def _mes_utc():
+    # O caminho em pandas sempre agrupou pelo mês do `inicio` em UTC
+    # (tz_localize(None) após a conversão); mantemos a mesma regra.
+    return TruncMonth("inicio", tzinfo=dt_timezone.utc)
+
+
+def _agrupar(qs, campo, chave, total=None, minutos=None):
+    linhas = (
+        qs.values(campo)
+        .annotate(
+            agendamentos=total or Count("id"),
+            minutos=minutos or Sum(duracao_efetiva()),
+        )
+        .order_by("-agendamentos", campo)
+    )
+    return [
+        {chave: linha[campo], "agendamentos": linha["agendamentos"], "horas": (linha["minutos"] or 0) / 60}
+        for linha in linhas
+    ]
+
+
+class Fonte(NamedTuple):
+    """De onde saem os totais de um período: os agendamentos ou o ResumoDiario."""
+    qs: QuerySet
+    agendamentos: QuerySet  # a quebra por aluno, que não existe no resumo, sempre vem daqui
+    total: object = None  # agregações de contagem/minutos (None = as de `_agrupar`)
+    minutos: object = None
+    resumo_diario: bool = False
+
+
+def _fonte_agendamentos(start_dt_dt, end_dt_dt):
+    qs = Agendamento.objects.filter(inicio__gte=start_dt_dt, inicio__lte=end_dt_dt)
+    return Fonte(qs, qs)
+
+
+def _fonte_resumo_diario(start_dt, end_dt, start_dt_dt, end_dt_dt):
+    return Fonte(
+        ResumoDiario.objects.filter(dia__gte=start_dt, dia__lte=end_dt),
+        Agendamento.objects.filter(inicio__gte=start_dt_dt, inicio__lte=end_dt_dt),
+        Sum("total"),
+        Sum("minutos"),
+        resumo_diario=True,
+    )
+
+
+def fonte(start_dt, end_dt, start_dt_dt, end_dt_dt):
+    """Períodos de ROLLUP_MIN_DIAS ou mais são lidos do ResumoDiario."""
+    if (end_dt - start_dt).days >= ROLLUP_MIN_DIAS:
+        return _fonte_resumo_diario(start_dt, end_dt, start_dt_dt, end_dt_dt)
+    return _fonte_agendamentos(start_dt_dt, end_dt_dt)
+
+
+def _totais(fonte):
+    if fonte.resumo_diario:
+        totais = fonte.qs.aggregate(total=Sum("total"), minutos=Sum("minutos"))
+        total = totais["total"] or 0
+        minutos = totais["minutos"] or 0
+        media = minutos / total if total else 0
+    else:
+        totais = fonte.qs.aggregate(
+            total=Count("id"),
+            minutos=Sum(duracao_efetiva()),
+            media=Avg(duracao_efetiva()),
+        )
+        total = totais["total"]
+        minutos = totais["minutos"] or 0
+        media = totais["media"] or 0
+    return {
+        "total_agendamentos": total,
+        "total_horas": round(float(minutos / 60), 2),
+        "media_duracao_min": round(float(media), 1),
+    }
+
+
+def _mensal(fonte):
+    if fonte.resumo_diario:
+        linhas = fonte.qs.values(mes_trunc=F("mes")).annotate(agendamentos=Sum("total"), minutos=Sum("minutos"))
+    else:
+        linhas = (
+            fonte.qs.annotate(mes_trunc=_mes_utc())
+            .values("mes_trunc")
+            .annotate(agendamentos=Count("id"), minutos=Sum(duracao_efetiva()))
+        )
+    return [
+        {
+            "mes": linha["mes_trunc"].strftime("%Y-%m"),
+            "agendamentos": linha["agendamentos"],
+            "horas": (linha["minutos"] or 0) / 60,
+        }
+        for linha in linhas.order_by("mes_trunc")
+    ]
+
+
+# Quebras do relatório: cada uma é uma query independente sobre a fonte do período.
+QUEBRAS = {
+    "by_professor": lambda f: _agrupar(f.qs, "professor__nome", "professor", f.total, f.minutos),
+    "by_aluno": lambda f: _agrupar(f.agendamentos, "aluno__nome", "aluno"),
+    "by_conteudo": lambda f: _agrupar(f.qs, "conteudo__nome", "conteudo", f.total, f.minutos),
+    "monthly": _mensal,
+}
+
+
+def _agregar(fonte):
+    return {**_totais(fonte), **{nome: quebra(fonte) for nome, quebra in QUEBRAS.items()}}
+
+
+def agregar_relatorio(start_dt_dt, end_dt_dt):
+    """
+    Calcula resumo e quebras (professor, aluno, conteúdo, mês) direto no banco,
+    com GROUP BY — o consumo de memória não depende do tamanho do período.
+    """
+    return _agregar(_fonte_agendamentos(start_dt_dt, end_dt_dt))
+
+
+def agregar_relatorio_resumo_diario(start_dt, end_dt, start_dt_dt, end_dt_dt):
+    """
+    Mesmo resultado de `agregar_relatorio`, lendo os totais do ResumoDiario
+    (dias locais de start_dt a end_dt). Só a quebra por aluno, que não existe
+    no resumo, é agregada sobre os agendamentos.
+    """
+    return _agregar(_fonte_resumo_diario(start_dt, end_dt, start_dt_dt, end_dt_dt))
+
+
+def resumo(start_date, end_date):
+    """Só os totais do período (a seção `resumo`), sem as quebras."""
+    start_dt, end_dt, start_dt_dt, end_dt_dt = resolver_periodo(start_date, end_date)
+    return {
+        "periodo_inicial": start_dt,
+        "periodo_final": end_dt,
+        **_totais(fonte(start_dt, end_dt, start_dt_dt, end_dt_dt)),
+    }
+
+
+def quebra(nome, start_date, end_date):
+    """Uma das QUEBRAS do período, calculada sozinha."""
+    start_dt, end_dt, start_dt_dt, end_dt_dt = resolver_periodo(start_date, end_date)
+    return QUEBRAS[nome](fonte(start_dt, end_dt, start_dt_dt, end_dt_dt))
+
+
+LINHA_CAMPOS = (
+    "id",
+    "inicio",
+    "duracao",
+    "status",
+    "aluno__nome",
+    "aluno__serie",
+    "aluno__turno",
+    "professor__nome",
+    "professor__especialidade",
+    "conteudo__nome",
+    "conteudo__descritor",
+)
+
+
+def montar_linha(pk, inicio, duracao, status, aluno, serie, turno, prof, especialidade, conteudo, descritor):
+    inicio_utc = inicio.astimezone(dt_timezone.utc).replace(tzinfo=None) if inicio.tzinfo else inicio
+    duracao = duracao or 0
+    return {
+        "id": pk,
+        "inicio": inicio_utc,
+        "duracao_minutos": duracao,
+        "status": status,
+        "aluno": aluno or "",
+        "serie": serie or "",
+        "turno": turno or "",
+        "professor": prof or "",
+        "especialidade": especialidade or "",
+        "conteudo": conteudo or "",
+        "descritor": descritor or "",
+        "duracao_horas": duracao / 60,
+        "mes": inicio_utc.strftime("%Y-%m"),
+    }
+
+
+def consultar_linhas(**filtros):
+    """values_list com os campos de LINHA_CAMPOS (na ordem de `montar_linha`) dos agendamentos filtrados."""
+    return Agendamento.objects.filter(**filtros).annotate(duracao=duracao_efetiva()).values_list(*LINHA_CAMPOS)
+
+
+def iterar_linhas(start_dt_dt, end_dt_dt):
+    """
+    Itera as linhas detalhadas do período, no mesmo formato de `agendamentos_rows`
+    (`inicio` sem fuso, em UTC; nulos viram ""), sem materializar o queryset.
+    Meses fechados com snapshot (ver escola.snapshots) são lidos do arquivo, não do banco.
+    """
+    from escola import snapshots
+
+    for inicio, fim, fim_incluso, mes in snapshots.segmentos(start_dt_dt, end_dt_dt):
+        if mes is not None:
+            yield from snapshots.ler_linhas(mes, inicio, fim, fim_incluso)
+            continue
+        filtro_fim = {"inicio__lte" if fim_incluso else "inicio__lt": fim}
+        for valores in consultar_linhas(inicio__gte=inicio, **filtro_fim).order_by("inicio").iterator():
+            yield montar_linha(*valores)
+
+
+def agendamentos_do_periodo(start_dt_dt, end_dt_dt):
+    """
+    Queryset preguiçoso dos agendamentos do período, para paginar as linhas detalhadas
+    no banco; cada objeto vira linha com `linha_de`.
+    """
+    return (
+        Agendamento.objects.filter(inicio__gte=start_dt_dt, inicio__lte=end_dt_dt)
+        .select_related("aluno", "professor", "conteudo")
+        .only(
+            "id", "inicio", "status", "duracao_minutos",
+            "aluno__nome", "aluno__serie", "aluno__turno",
+            "professor__nome", "professor__especialidade",
+            "conteudo__nome", "conteudo__descritor",
+        )
+        .annotate(duracao=duracao_efetiva())
+    )
+
+
+def linha_de(ag):
+    """Linha detalhada (formato de `agendamentos_rows`) de um objeto de `agendamentos_do_periodo`."""
+    return montar_linha(
+        ag.pk, ag.inicio, ag.duracao, ag.status,
+        ag.aluno.nome, ag.aluno.serie, ag.aluno.turno,
+        ag.professor.nome, ag.professor.especialidade,
+        ag.conteudo.nome, ag.conteudo.descritor,
+    )
+
+
+def linhas_agendamentos(start_dt_dt, end_dt_dt):
+    """Lista com as linhas detalhadas do período (ver `iterar_linhas`)."""
+    return list(iterar_linhas(start_dt_dt, end_dt_dt))
+
+
+def gerar_relatorio(start_date, end_date, incluir_linhas=True):
+    """
+    Gera o relatório completo (resumo, quebras e linhas) a partir das agregações no banco;
+    períodos de ROLLUP_MIN_DIAS ou mais usam o ResumoDiario.
+    Mesmo formato de saída de `_generate_report_data`; com incluir_linhas=False a chave
+    `agendamentos_rows` é omitida (para quem vai iterar as linhas por conta própria).
+    """
+    start_dt, end_dt, start_dt_dt, end_dt_dt = resolver_periodo(start_date, end_date)
+    agregados = _agregar(fonte(start_dt, end_dt, start_dt_dt, end_dt_dt))
+
+    resumo = {
+        "periodo_inicial": start_dt,
+        "periodo_final": end_dt,
+        "total_agendamentos": agregados.pop("total_agendamentos"),
+        "total_horas": agregados.pop("total_horas"),
+        "media_duracao_min": agregados.pop("media_duracao_min"),
+    }
+
+    report = {"resumo": resumo, **agregados}
+    if incluir_linhas:
+        report["agendamentos_rows"] = linhas_agendamentos(start_dt_dt, end_dt_dt)
+    return report
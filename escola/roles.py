@@ -0,0 +1,73 @@
+"""
+Resolução do papel do usuário (Diretoria / Coordenação / Professor) e do perfil de Professor.
+Resolvido uma vez por request (memorizado no objeto user) e guardado no cache entre requests;
+os signals de User.groups e Professor invalidam a entrada do usuário.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from escola.models.professor import Professor
+
+GRUPO_DIRETORIA = 'Diretoria'
+GRUPO_COORDENACAO = 'Coordenação'
+GRUPO_PROFESSOR = 'Professor'
+
+# Rede de segurança para caches locais por processo (LocMemCache), onde a
+# invalidação feita em um worker não chega aos outros.
+PAPEL_CACHE_TIMEOUT = 300
+
+
+class Papel:
+    def __init__(self, is_superuser=False, grupos=(), professor=None):
+        self.is_superuser = is_superuser
+        self.grupos = frozenset(grupos)
+        self.professor = professor
+
+    @property
+    def eh_diretoria(self):
+        return GRUPO_DIRETORIA in self.grupos
+
+    @property
+    def eh_coordenacao(self):
+        return GRUPO_COORDENACAO in self.grupos
+
+    @property
+    def eh_professor(self):
+        return GRUPO_PROFESSOR in self.grupos
+
+
+def _cache_key(user_id):
+    return f'escola:papel:{user_id}'
+
+
+def _carregar(user):
+    grupos = list(user.groups.values_list('name', flat=True))
+    professor = Professor.objects.filter(user=user).first()
+    if professor is None and GRUPO_PROFESSOR in grupos:
+        # perfis antigos, criados sem vínculo com o usuário
+        professor = Professor.objects.filter(nome__iexact=user.get_full_name() or user.username).first()
+    return {'grupos': grupos, 'professor': professor}
+
+
+def papel_de(user):
+    """Papel do usuário; no máximo duas queries, e nenhuma com o cache quente."""
+    if user is None or not user.is_authenticated:
+        return Papel()
+    papel = getattr(user, '_escola_papel', None)
+    if papel is None:
+        dados = cache.get(_cache_key(user.pk))
+        if dados is None:
+            dados = _carregar(user)
+            cache.set(_cache_key(user.pk), dados, PAPEL_CACHE_TIMEOUT)
+        papel = Papel(user.is_superuser, dados['grupos'], dados['professor'])
+        user._escola_papel = papel
+    return papel
+
+
+async def apapel_de(user):
+    """papel_de() para views assíncronas: cache e queries rodam fora do event loop."""
+    return await sync_to_async(papel_de)(user)
+
+
+def invalidar(*user_ids):
+    cache.delete_many([_cache_key(pk) for pk in user_ids if pk is not None])
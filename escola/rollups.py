@@ -0,0 +1,185 @@
+"""
+Manutenção incremental da tabela ResumoDiario a partir dos agendamentos.
+Cada agendamento contribui com (1, minutos) para a linha da sua chave:
+dia local × mês UTC × professor × conteúdo × série/turno do aluno × status.
+Os signals mantêm o resumo em save()/delete() de instâncias, e os caminhos em massa do projeto
+(transitions, scheduling, synthetic) o acertam explicitamente. Um queryset.update() ou
+bulk_update fora deles não passa por aqui: o resumo fica desatualizado até reconstruir()
+(comando rebuild_rollups).
+"""
+from datetime import timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from escola.models.agendamento import Agendamento
+from escola.models.resumo_diario import ResumoDiario
+from escola.reports import duracao_efetiva
+
+
+def _chave(inicio, professor_id, conteudo_id, serie, turno, status):
+    return {
+        "dia": timezone.localtime(inicio).date(),
+        "mes": inicio.astimezone(dt_timezone.utc).date().replace(day=1),
+        "professor_id": professor_id,
+        "conteudo_id": conteudo_id,
+        "serie": serie or "",
+        "turno": turno or "",
+        "status": status,
+    }
+
+
+def estado_de(agendamento):
+    """(chave, minutos) com que o agendamento em memória contribui para o resumo."""
+    aluno = agendamento.aluno
+    minutos = agendamento.duracao_minutos or agendamento.conteudo.duracao_minutos
+    chave = _chave(
+        agendamento.inicio,
+        agendamento.professor_id,
+        agendamento.conteudo_id,
+        aluno.serie,
+        aluno.turno,
+        agendamento.status,
+    )
+    return chave, minutos
+
+
+# Campos (de um .values() anotado com duracao=duracao_efetiva()) que definem a contribuição.
+CAMPOS_ESTADO = ("inicio", "professor_id", "conteudo_id", "aluno__serie", "aluno__turno", "status", "duracao")
+
+
+def estado_da_linha(linha, status=None):
+    """(chave, minutos) de uma linha com CAMPOS_ESTADO; `status` substitui o da linha."""
+    chave = _chave(
+        linha["inicio"],
+        linha["professor_id"],
+        linha["conteudo_id"],
+        linha["aluno__serie"],
+        linha["aluno__turno"],
+        status or linha["status"],
+    )
+    return chave, linha["duracao"] or 0
+
+
+def estado_salvo(pk):
+    """(chave, minutos) do agendamento como está no banco, ou None."""
+    linha = (
+        Agendamento.objects.filter(pk=pk)
+        .annotate(duracao=duracao_efetiva())
+        .values(*CAMPOS_ESTADO)
+        .first()
+    )
+    if linha is None:
+        return None
+    return estado_da_linha(linha)
+
+
+def _aplicar(chave, total, minutos):
+    atualizados = ResumoDiario.objects.filter(**chave).update(
+        total=F("total") + total, minutos=F("minutos") + minutos
+    )
+    if not atualizados:
+        obj, criado = ResumoDiario.objects.get_or_create(**chave, defaults={"total": total, "minutos": minutos})
+        if not criado:
+            ResumoDiario.objects.filter(pk=obj.pk).update(total=F("total") + total, minutos=F("minutos") + minutos)
+    if total < 0:
+        ResumoDiario.objects.filter(**chave, total__lte=0).delete()
+
+
+def substituir(antigo, novo):
+    """Troca a contribuição `antigo` por `novo` (qualquer um pode ser None)."""
+    if antigo == novo:
+        return
+    with transaction.atomic():
+        if antigo is not None:
+            _aplicar(antigo[0], -1, -antigo[1])
+        if novo is not None:
+            _aplicar(novo[0], 1, novo[1])
+
+
+def _somar(contribuicoes):
+    """Aplica (chave, total, minutos) agrupando as chaves iguais: uma rodada de queries por chave."""
+    por_chave = {}
+    for chave, total, minutos in contribuicoes:
+        congelada = tuple(chave.items())
+        anterior_total, anterior_soma = por_chave.get(congelada, (0, 0))
+        por_chave[congelada] = (anterior_total + total, anterior_soma + minutos)
+    with transaction.atomic():
+        for chave, (total, soma) in por_chave.items():
+            if total or soma:
+                _aplicar(dict(chave), total, soma)
+
+
+def registrar_lote(agendamentos):
+    """Soma ao resumo agendamentos inseridos sem signals (ex.: bulk_create)."""
+    _somar((chave, 1, minutos) for chave, minutos in map(estado_de, agendamentos))
+
+
+def trocar_status(linhas, status):
+    """Move para `status` as contribuições de linhas (CAMPOS_ESTADO) alteradas por um UPDATE em massa."""
+    def contribuicoes():
+        for linha in linhas:
+            chave, minutos = estado_da_linha(linha)
+            yield chave, -1, -minutos
+            chave, minutos = estado_da_linha(linha, status)
+            yield chave, 1, minutos
+
+    _somar(contribuicoes())
+
+
+def _grupos(qs, *campos):
+    return (
+        qs.annotate(dia_local=TruncDate("inicio"), mes_utc=TruncMonth("inicio", tzinfo=dt_timezone.utc))
+        .values("dia_local", "mes_utc", "professor_id", "conteudo_id", "status", *campos)
+        .annotate(n=Count("id"), soma=Sum(duracao_efetiva()))
+        .order_by()
+    )
+
+
+def _mes(valor):
+    return valor.date() if hasattr(valor, "date") else valor
+
+
+def mover_aluno(aluno_id, serie_antiga, turno_antigo, serie, turno):
+    """Move as contribuições de um aluno que mudou de série/turno."""
+    with transaction.atomic():
+        for g in _grupos(Agendamento.objects.filter(aluno_id=aluno_id)):
+            base = {
+                "dia": g["dia_local"],
+                "mes": _mes(g["mes_utc"]),
+                "professor_id": g["professor_id"],
+                "conteudo_id": g["conteudo_id"],
+                "status": g["status"],
+            }
+            _aplicar({**base, "serie": serie_antiga or "", "turno": turno_antigo or ""}, -g["n"], -(g["soma"] or 0))
+            _aplicar({**base, "serie": serie or "", "turno": turno or ""}, g["n"], g["soma"] or 0)
+
+
+@transaction.atomic
+def reconstruir(batch_size=1000):
+    """Apaga e recalcula todo o ResumoDiario com uma única agregação. Retorna o nº de linhas."""
+    ResumoDiario.objects.all().delete()
+    total = 0
+    lote = []
+    for g in _grupos(Agendamento.objects.all(), "aluno__serie", "aluno__turno").iterator():
+        lote.append(
+            ResumoDiario(
+                dia=g["dia_local"],
+                mes=_mes(g["mes_utc"]),
+                professor_id=g["professor_id"],
+                conteudo_id=g["conteudo_id"],
+                serie=g["aluno__serie"] or "",
+                turno=g["aluno__turno"] or "",
+                status=g["status"],
+                total=g["n"],
+                minutos=g["soma"] or 0,
+            )
+        )
+        if len(lote) >= batch_size:
+            ResumoDiario.objects.bulk_create(lote)
+            total += len(lote)
+            lote = []
+    ResumoDiario.objects.bulk_create(lote)
+    return total + len(lote)
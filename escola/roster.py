@@ -0,0 +1,95 @@
+"""
+Cache versionado da lista de alunos usada pelos endpoints de busca (load_alunos / alunos_json).
+Cada (serie, turno, is_active) guarda o JSON pronto e já comprimido com gzip; salvar ou
+excluir um Aluno troca a versão e invalida todas as entradas de uma vez.
+"""
+import gzip
+import hashlib
+import json
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from escola import versoes
+from escola.models.aluno import Aluno
+
+VERSAO_KEY = 'escola:alunos:versao'
+# Curto como dashboard.PAINEL_CACHE_TIMEOUT: limita o atraso se uma troca de versão não chegar ao processo.
+ROSTER_CACHE_TIMEOUT = 5 * 60
+
+
+class Roster(NamedTuple):
+    corpo: bytes
+    corpo_gzip: bytes
+    etag: str
+    modificado: int  # timestamp (s) da última troca de versão
+
+
+def versao():
+    """Número da versão atual da lista de alunos (ver escola.versoes)."""
+    return versoes.numero(VERSAO_KEY)
+
+
+def invalidar():
+    versoes.trocar(VERSAO_KEY)
+
+
+def _chave(versao, serie, turno, is_active):
+    return f'escola:alunos:{versao.numero}:{serie or ""}:{turno or ""}:{is_active}'
+
+
+def _filtrar(serie, turno, is_active):
+    qs = Aluno.objects.all()
+    if is_active is not None:
+        qs = qs.filter(is_active=is_active)
+    if serie:
+        qs = qs.filter(serie=serie)
+    if turno:
+        qs = qs.filter(turno=turno)
+    return qs.order_by('nome').values('id', 'nome')
+
+
+def _montar(alunos, versao):
+    corpo = json.dumps(alunos, ensure_ascii=False, separators=(',', ':')).encode()
+    return Roster(corpo, gzip.compress(corpo), f'"{hashlib.sha1(corpo).hexdigest()}"', versao.modificado)
+
+
+def consultar(serie=None, turno=None, is_active=None):
+    """Lista [{id, nome}] ordenada por nome; filtros None não são aplicados."""
+    atual = versoes.obter(VERSAO_KEY)
+    key = _chave(atual, serie, turno, is_active)
+    roster = cache.get(key)
+    if roster is None:
+        roster = _montar(list(_filtrar(serie, turno, is_active)), atual)
+        cache.set(key, roster, ROSTER_CACHE_TIMEOUT)
+    return roster
+
+
+async def aconsultar(serie=None, turno=None, is_active=None):
+    """consultar() para views assíncronas, com o cache e o ORM assíncronos."""
+    atual = await versoes.aobter(VERSAO_KEY)
+    key = _chave(atual, serie, turno, is_active)
+    roster = await cache.aget(key)
+    if roster is None:
+        roster = _montar([aluno async for aluno in _filtrar(serie, turno, is_active).aiterator()], atual)
+        await cache.aset(key, roster, ROSTER_CACHE_TIMEOUT)
+    return roster
+
+
+def resposta(request, roster):
+    """HttpResponse com ETag/Last-Modified (304 quando o cliente já tem a versão) e gzip se aceito."""
+    response = get_conditional_response(request, etag=roster.etag, last_modified=roster.modificado)
+    if response is None:
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(roster.corpo_gzip, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(roster.corpo, content_type='application/json')
+    response['ETag'] = roster.etag
+    response['Last-Modified'] = http_date(roster.modificado)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,214 @@
+"""
+Importação em lote da lista de alunos (CSV ou XLSX).
+O arquivo é lido em streaming e validado em lotes; os alunos existentes são carregados
+uma única vez e casados pela chave (nome, série, turno), sem diferenciar maiúsculas nem
+espaços repetidos. Novos e alterados entram por bulk_create(update_conflicts=True) em
+lotes; opcionalmente os alunos ativos ausentes do arquivo são desativados. Série e turno
+fazem parte da chave, então nenhum aluno muda de turma e o ResumoDiario não é afetado.
+Com qualquer linha inválida nada é gravado: o resultado serve de relatório (dry-run).
+"""
+import csv
+import io
+from itertools import chain, islice
+
+from django.db import transaction
+
+from escola import roster, snapshots
+from escola.models.aluno import Aluno
+
+LOTE = 1000
+# cabeçalho aceito -> campo do Aluno
+CABECALHOS = {
+    "nome": "nome",
+    "aluno": "nome",
+    "serie": "serie",
+    "série": "serie",
+    "turno": "turno",
+    "telefone": "telefone",
+    "ativo": "is_active",
+    "is_active": "is_active",
+}
+VERDADEIROS = {"1", "s", "sim", "true", "ativo", "x"}
+FALSOS = {"0", "n", "nao", "não", "false", "inativo"}
+CAMPOS_ATUALIZADOS = ["nome", "telefone", "is_active"]
+
+
+class ErroImportacao(ValueError):
+    """Arquivo ilegível ou sem as colunas obrigatórias."""
+
+
+class Resultado:
+    """Diferença entre o arquivo e o cadastro; `aplicado` diz se ela foi gravada."""
+
+    def __init__(self):
+        self.criados = []
+        self.atualizados = []
+        self.desativados = []
+        self.inalterados = 0
+        self.erros = []
+        self.aplicado = False
+
+    def resumo(self):
+        return {
+            "criados": len(self.criados),
+            "atualizados": len(self.atualizados),
+            "desativados": len(self.desativados),
+            "inalterados": self.inalterados,
+            "erros": len(self.erros),
+            "aplicado": self.aplicado,
+        }
+
+
+def chave(nome, serie, turno):
+    return (" ".join(nome.split()).casefold(), serie.strip().casefold(), turno.strip().casefold())
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _linhas_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    primeira = texto.readline()
+    delimitador = ";" if primeira.count(";") > primeira.count(",") else ","
+    return csv.reader(chain([primeira], texto), delimiter=delimitador)
+
+
+def _linhas_xlsx(arquivo):
+    from openpyxl import load_workbook
+
+    try:
+        planilha = load_workbook(arquivo, read_only=True, data_only=True).active
+    except Exception as exc:
+        raise ErroImportacao(f"Planilha ilegível: {exc}") from exc
+    return planilha.iter_rows(values_only=True)
+
+
+def ler_linhas(arquivo, nome_arquivo):
+    """(nº da linha, {campo: texto}) de um CSV (UTF-8, ',' ou ';') ou XLSX, sem carregar o arquivo todo."""
+    linhas = _linhas_xlsx(arquivo) if nome_arquivo.lower().endswith(".xlsx") else _linhas_csv(arquivo)
+    cabecalho = next(linhas, None) or ()
+    campos = [CABECALHOS.get(_texto(coluna).casefold()) for coluna in cabecalho]
+    if "nome" not in campos:
+        raise ErroImportacao("O arquivo precisa de uma coluna 'nome' (e, de preferência, 'serie' e 'turno').")
+    for numero, valores in enumerate(linhas, start=2):
+        dados = {campo: _texto(valor) for campo, valor in zip(campos, valores) if campo}
+        if any(dados.values()):
+            yield numero, dados
+
+
+def validar(dados):
+    """Campos normalizados da linha, ou a mensagem de erro."""
+    limpos = {
+        "nome": " ".join(dados.get("nome", "").split()),
+        "serie": dados.get("serie", ""),
+        "turno": dados.get("turno", ""),
+        "telefone": dados.get("telefone") or None,
+    }
+    if not limpos["nome"]:
+        return None, "nome em branco"
+    for campo, valor in limpos.items():
+        limite = Aluno._meta.get_field(campo).max_length
+        if valor and len(valor) > limite:
+            return None, f"{campo} com mais de {limite} caracteres"
+    ativo = dados.get("is_active", "").casefold()
+    if ativo and ativo not in VERDADEIROS | FALSOS:
+        return None, f"valor de ativo inválido: {dados['is_active']!r}"
+    limpos["is_active"] = ativo not in FALSOS
+    return limpos, None
+
+
+def _cadastro():
+    """Uma query: {chave: linha} dos alunos existentes (o menor pk vence) e todas as linhas."""
+    linhas = list(Aluno.objects.order_by("pk").values("pk", "nome", "serie", "turno", "telefone", "is_active"))
+    por_chave = {}
+    for linha in linhas:
+        por_chave.setdefault(chave(linha["nome"], linha["serie"], linha["turno"]), linha)
+    return por_chave, linhas
+
+
+def _planejar_lote(lote, por_chave, vistos, resultado):
+    """Objetos a gravar (novos sem pk, alterados com pk) para um lote de linhas."""
+    gravar = []
+    for numero, dados in lote:
+        limpos, erro = validar(dados)
+        if erro:
+            resultado.erros.append((numero, erro))
+            continue
+        k = chave(limpos["nome"], limpos["serie"], limpos["turno"])
+        if k in vistos:
+            resultado.erros.append((numero, f"aluno repetido no arquivo (linha {vistos[k]})"))
+            continue
+        vistos[k] = numero
+
+        existente = por_chave.get(k)
+        if existente is None:
+            resultado.criados.append({"linha": numero, **limpos})
+            gravar.append(Aluno(**limpos))
+            continue
+        novo = {
+            "nome": limpos["nome"],
+            # telefone em branco no arquivo não apaga o cadastrado
+            "telefone": limpos["telefone"] or existente["telefone"],
+            "is_active": limpos["is_active"],
+        }
+        mudancas = {campo: (existente[campo], valor) for campo, valor in novo.items() if existente[campo] != valor}
+        if not mudancas:
+            resultado.inalterados += 1
+            continue
+        resultado.atualizados.append({"linha": numero, "pk": existente["pk"], **limpos, "mudancas": mudancas})
+        gravar.append(Aluno(pk=existente["pk"], serie=existente["serie"], turno=existente["turno"], **novo))
+    return gravar
+
+
+def _proximo_lote(linhas):
+    try:
+        return list(islice(linhas, LOTE))
+    except UnicodeDecodeError as exc:
+        raise ErroImportacao("O CSV deve estar em UTF-8.") from exc
+
+
+def importar(arquivo, nome_arquivo, desativar_ausentes=False, simular=False):
+    """Compara o arquivo com o cadastro e, se não for simulação nem houver erros, grava a diferença."""
+    resultado = Resultado()
+    por_chave, existentes = _cadastro()
+    vistos = {}
+    linhas = ler_linhas(arquivo, nome_arquivo)
+
+    with transaction.atomic():
+        while lote := _proximo_lote(linhas):
+            gravar = _planejar_lote(lote, por_chave, vistos, resultado)
+            if gravar and not simular and not resultado.erros:
+                Aluno.objects.bulk_create(
+                    gravar,
+                    update_conflicts=True,
+                    unique_fields=["id"],
+                    update_fields=CAMPOS_ATUALIZADOS,
+                    batch_size=LOTE,
+                )
+
+        if desativar_ausentes:
+            presentes = set(vistos)
+            resultado.desativados = [
+                linha for linha in existentes
+                if linha["is_active"] and chave(linha["nome"], linha["serie"], linha["turno"]) not in presentes
+            ]
+            if not simular and not resultado.erros:
+                pks = [linha["pk"] for linha in resultado.desativados]
+                for inicio in range(0, len(pks), LOTE):
+                    Aluno.objects.filter(pk__in=pks[inicio:inicio + LOTE]).update(is_active=False)
+
+        if simular or resultado.erros:
+            transaction.set_rollback(True)
+        else:
+            resultado.aplicado = True
+            # bulk_create/update não disparam os signals do Aluno (a troca de versão espera o commit)
+            roster.invalidar()
+            snapshots.invalidar_cadastro(
+                "aluno", [linha["pk"] for linha in resultado.atualizados if "nome" in linha["mudancas"]],
+            )
+    return resultado
@@ -3,9 +3,14 @@ from ..views.home_view import (AgendamentoCreateView,
                                AgendamentoDeleteView,
                                AgendamentoDetailView,
                                alterar_status_agendamento,
+                               alterar_status_em_lote,
                                AgendamentoUpdateView,
                                AgendamentoListView,
+                               agendamentos_json,
                                home)
+from ..views.agendamento_lote_view import agendamento_lote
+from ..views.disponibilidade_view import horarios_disponiveis
+from ..views.feed_view import agendamentos_eventos, agendamentos_feed
 
 
 app_name = 'agendamentos'
@@ -13,7 +18,13 @@ app_name = 'agendamentos'
 urlpatterns = [
     path('', home, name='home'),
     path('list/', AgendamentoListView.as_view(), name='list'),
+    path('json/', agendamentos_json, name='json'),
+    path('feed/', agendamentos_feed, name='feed'),
+    path('feed/eventos/', agendamentos_eventos, name='feed_eventos'),
     path('novo/', AgendamentoCreateView.as_view(), name='create'),
+    path('lote/', agendamento_lote, name='lote'),
+    path('status/', alterar_status_em_lote, name='alterar_status_em_lote'),
+    path('disponibilidade/', horarios_disponiveis, name='disponibilidade'),
     path('<int:pk>/editar/', AgendamentoUpdateView.as_view(), name='update'),
     path('<int:pk>/excluir/', AgendamentoDeleteView.as_view(), name='delete'),
     path('<int:pk>/', AgendamentoDetailView.as_view(), name='detail'),
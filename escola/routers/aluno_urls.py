@@ -1,12 +1,14 @@
 from django.urls import path
-from ..views.aluno_view import aluno_create,aluno_edit,alunos_list
+from ..views.aluno_view import aluno_create,aluno_edit,alunos_list,alunos_json,alunos_importar
 from ..views.ajax import load_alunos
 
 app_name = 'alunos'
 
 urlpatterns = [
     path("ajax/load-alunos/", load_alunos, name="ajax_load_alunos"),
+    path("json/", alunos_json, name="alunos_json"),
     path('', alunos_list, name='alunos_list'),
     path('novo/', aluno_create, name='aluno_create'),
+    path('importar/', alunos_importar, name='alunos_importar'),
     path('editar/<int:pk>/', aluno_edit, name='aluno_edit'),
 ]
\ No newline at end of file
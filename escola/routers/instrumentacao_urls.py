@@ -0,0 +1,8 @@
+from django.urls import path
+from ..views.instrumentacao_view import instrumentacao_piores
+
+app_name = 'instrumentacao'
+
+urlpatterns = [
+    path('', instrumentacao_piores, name='piores'),
+]
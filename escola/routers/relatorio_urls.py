@@ -5,5 +5,8 @@ app_name = "relatorios"
 urlpatterns = [
     path("conteudos/", relatorio_view.relatorio_conteudos, name="relatorio_conteudos"),
     path("conteudos/json/", relatorio_view.relatorio_conteudos_json, name="relatorio_conteudos_json"),
+    path("conteudos/json/<str:secao>/", relatorio_view.relatorio_conteudos_secao, name="relatorio_conteudos_secao"),
     path("conteudos/export/", relatorio_view.export_relatorio_excel, name="export_relatorio_excel"),
+    path("jobs/<int:pk>/", relatorio_view.relatorio_job_status, name="relatorio_job_status"),
+    path("jobs/<int:pk>/download/", relatorio_view.relatorio_job_download, name="relatorio_job_download"),
 ]
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Agendamento em lote: expande uma recorrência semanal para uma lista de alunos,
+verifica todos os candidatos de uma vez (escola.conflicts) e grava os válidos com
+bulk_create em uma única transação.
+"""
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from escola import changefeed, conflicts, dashboard, rollups, snapshots
+from escola.models.agendamento import Agendamento
+from escola.models.mudanca_agendamento import MudancaAgendamento
+
+
+def expandir_recorrencia(data_inicial, data_final, dias_semana, horario, intervalo_semanas=1):
+    """
+    Datas/horas (com fuso) entre data_inicial e data_final, inclusive, nos dias da
+    semana informados (0 = segunda), a cada `intervalo_semanas` semanas contadas a
+    partir da semana de data_inicial.
+    """
+    dias_semana = {int(d) for d in dias_semana}
+    semana_zero = data_inicial - timedelta(days=data_inicial.weekday())
+    horarios = []
+    dia = data_inicial
+    while dia <= data_final:
+        semanas = (dia - semana_zero).days // 7
+        if dia.weekday() in dias_semana and semanas % intervalo_semanas == 0:
+            horarios.append(timezone.make_aware(datetime.combine(dia, horario)))
+        dia += timedelta(days=1)
+    return horarios
+
+
+def montar_candidatos(alunos, conteudo, professor, horarios, duracao_minutos=None, observacoes="", escalonar=False):
+    """
+    Um Agendamento (não salvo) por aluno × horário. Com `escalonar`, os alunos são
+    atendidos em sequência a partir do horário, um após o outro; sem ele, o professor
+    teria vários alunos no mesmo horário, o que a verificação de conflitos recusa.
+    """
+    if len(alunos) > 1 and not escalonar:
+        raise ValueError("Vários alunos no mesmo horário exigem `escalonar`.")
+    duracao = duracao_minutos or conteudo.duracao_minutos
+    candidatos = []
+    for horario in horarios:
+        for i, aluno in enumerate(alunos):
+            inicio = horario + timedelta(minutes=duracao * i) if escalonar else horario
+            candidatos.append(
+                Agendamento(
+                    aluno=aluno,
+                    conteudo=conteudo,
+                    professor=professor,
+                    inicio=inicio,
+                    duracao_minutos=duracao,
+                    observacoes=observacoes,
+                )
+            )
+    return candidatos
+
+
+def agendar_em_lote(candidatos, tudo_ou_nada=False, batch_size=500):
+    """
+    Verifica conflitos de todos os candidatos em uma passada e insere os válidos.
+    Com `tudo_ou_nada`, nada é gravado se algum candidato conflitar.
+    A verificação e a gravação ocorrem na mesma transação, com os professores e alunos
+    do lote travados: dois lotes concorrentes não reservam o mesmo horário.
+    Retorna (criados, relatorio), com uma entrada no relatório por candidato.
+    """
+    criados = []
+    with transaction.atomic():
+        conflicts.travar(candidatos)
+        resultado = conflicts.verificar_lote(conflicts.ocupacao_de(c) for c in candidatos)
+        validos = [c for c, conflitos in zip(candidatos, resultado) if not conflitos]
+        if validos and not (tudo_ou_nada and len(validos) != len(candidatos)):
+            criados = Agendamento.objects.bulk_create(validos, batch_size=batch_size)
+            rollups.registrar_lote(criados)
+    if criados:
+        dashboard.invalidar_agendamentos(c.professor_id for c in criados)
+        snapshots.invalidar(snapshots.mes_de(c.inicio) for c in criados)
+        changefeed.registrar((c.pk, c.professor_id, MudancaAgendamento.ALTERADO) for c in criados)
+
+    relatorio = [
+        {
+            "aluno": c.aluno_id,
+            "aluno_nome": c.aluno.nome,
+            "inicio": c.inicio,
+            "criado": c.pk is not None,
+            "id": c.pk,
+            "conflitos": [cf.mensagem for cf in conflitos],
+        }
+        for c, conflitos in zip(candidatos, resultado)
+    ]
+    return criados, relatorio
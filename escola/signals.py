@@ -0,0 +1,168 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+from . import acessos, changefeed, dashboard, roles, rollups, roster, snapshots
+from .models.agendamento import Agendamento
+from .models.aluno import Aluno
+from .models.conteudo import Conteudo
+from .models.mudanca_agendamento import MudancaAgendamento
+from .models.professor import Professor
+from .models.report_job import ReportJob
+
+@receiver(post_migrate)
+def criar_grupos_e_permissoes(sender, **kwargs):
+    if sender.name != 'escola':
+        return
+
+    acessos.sincronizar_grupos()
+
+    print("Grupos (Diretoria, Coordenação, Professor) verificados/criados e permissões atribuídas.")
+
+
+@receiver(post_save, sender=Professor)
+def on_professor_saved(sender, instance, created, **kwargs):
+    if instance.user:
+        prof_group, _ = Group.objects.get_or_create(name='Professor')
+        instance.user.groups.add(prof_group)
+
+
+@receiver(post_save, sender=User)
+def ensure_professor_for_user(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created:
+        # grupos só são ligados depois do primeiro save
+        roles.invalidar(instance.pk)
+        return
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        # login só atualiza last_login: papel e perfil não mudam
+        return
+    papel = roles.papel_de(instance)
+    if papel.eh_professor and (papel.professor is None or papel.professor.user_id != instance.pk):
+        Professor.objects.create(user=instance, nome=instance.get_full_name() or instance.username)
+        instance.__dict__.pop('_escola_papel', None)
+
+
+@receiver(pre_save, sender=Agendamento)
+def guardar_resumo_anterior(sender, instance, raw=False, **kwargs):
+    instance._resumo_anterior = None
+    if not raw and not instance._state.adding:
+        instance._resumo_anterior = rollups.estado_salvo(instance.pk)
+
+
+@receiver(post_save, sender=Agendamento)
+def atualizar_resumo_diario(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    rollups.substituir(getattr(instance, '_resumo_anterior', None), rollups.estado_de(instance))
+
+
+@receiver(post_delete, sender=Agendamento)
+def remover_do_resumo_diario(sender, instance, **kwargs):
+    rollups.substituir(rollups.estado_de(instance), None)
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_delete, sender=Agendamento)
+def invalidar_paineis(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_resumo_anterior', None)
+    dashboard.invalidar_agendamentos([instance.professor_id, anterior and anterior[0]['professor_id']])
+
+
+@receiver(post_save, sender=Agendamento)
+@receiver(post_delete, sender=Agendamento)
+def invalidar_snapshot(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_resumo_anterior', None)
+    snapshots.invalidar([snapshots.mes_de(instance.inicio), anterior and anterior[0]['mes']])
+
+
+@receiver(post_save, sender=Agendamento)
+def registrar_alteracao_no_feed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mudancas = [(instance.pk, instance.professor_id, MudancaAgendamento.ALTERADO)]
+    anterior = getattr(instance, '_resumo_anterior', None)
+    if anterior is not None and anterior[0]['professor_id'] != instance.professor_id:
+        mudancas.append((instance.pk, anterior[0]['professor_id'], MudancaAgendamento.SAIU))
+    changefeed.registrar(mudancas)
+
+
+@receiver(post_delete, sender=Agendamento)
+def registrar_exclusao_no_feed(sender, instance, **kwargs):
+    changefeed.registrar([(instance.pk, instance.professor_id, MudancaAgendamento.EXCLUIDO)])
+
+
+@receiver(pre_save, sender=Aluno)
+@receiver(pre_save, sender=Professor)
+@receiver(pre_save, sender=Conteudo)
+def guardar_cadastro_anterior(sender, instance, raw=False, **kwargs):
+    instance._cadastro_anterior = None
+    if not raw and not instance._state.adding:
+        campos = snapshots.CAMPOS_DO_CADASTRO[sender._meta.model_name]
+        instance._cadastro_anterior = sender.objects.filter(pk=instance.pk).values(*campos).first()
+
+
+@receiver(post_save, sender=Aluno)
+@receiver(post_save, sender=Professor)
+@receiver(post_save, sender=Conteudo)
+def invalidar_snapshot_do_cadastro(sender, instance, raw=False, **kwargs):
+    anterior = getattr(instance, '_cadastro_anterior', None)
+    if raw or anterior is None or all(getattr(instance, campo) == valor for campo, valor in anterior.items()):
+        return
+    snapshots.invalidar_cadastro(sender._meta.model_name, [instance.pk])
+
+
+@receiver(post_save, sender=Aluno)
+def mover_resumo_do_aluno(sender, instance, raw=False, **kwargs):
+    anterior = getattr(instance, '_cadastro_anterior', None)
+    if raw or anterior is None or (anterior['serie'], anterior['turno']) == (instance.serie, instance.turno):
+        return
+    rollups.mover_aluno(instance.pk, anterior['serie'], anterior['turno'], instance.serie, instance.turno)
+
+
+@receiver(post_save, sender=Aluno)
+@receiver(post_delete, sender=Aluno)
+def invalidar_lista_de_alunos(sender, **kwargs):
+    roster.invalidar()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_papel_por_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            roles.invalidar(instance.pk)
+            instance.__dict__.pop('_escola_papel', None)
+    elif action == 'pre_clear':
+        roles.invalidar(*instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        roles.invalidar(*pk_set)
+
+
+@receiver(pre_save, sender=Professor)
+def guardar_usuario_anterior(sender, instance, raw=False, **kwargs):
+    instance._user_anterior = None
+    if not raw and not instance._state.adding:
+        instance._user_anterior = Professor.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender=Professor)
+@receiver(post_delete, sender=Professor)
+def invalidar_papel_do_professor(sender, instance, **kwargs):
+    roles.invalidar(instance.user_id, getattr(instance, '_user_anterior', None))
+
+
+@receiver(post_save, sender=Conteudo)
+@receiver(post_delete, sender=Conteudo)
+@receiver(post_save, sender=Professor)
+@receiver(post_delete, sender=Professor)
+def invalidar_cadastros_dos_paineis(sender, raw=False, **kwargs):
+    if not raw:
+        dashboard.invalidar_cadastros()
+
+
+@receiver(post_delete, sender=ReportJob)
+def remover_arquivo_do_job(sender, instance, **kwargs):
+    if instance.arquivo:
+        instance.arquivo.delete(save=False)
@@ -0,0 +1,303 @@
+"""
+Arquivo histórico dos agendamentos em formato colunar, particionado por mês (UTC).
+Cada partição é um diretório com um .npy por coluna (textos codificados por dicionário,
+como no Arrow) e um meta.json. A leitura usa np.load(mmap_mode='r'), então só as páginas
+do intervalo pedido saem do disco.
+
+O comando `snapshot_agendamentos` regenera só os meses alterados desde a última geração
+(`updated_at` mais novo ou número de linhas diferente). `reports.iterar_linhas` lê os meses
+fechados daqui em vez do banco. Salvar ou excluir um agendamento remove a partição do mês
+dele (signals e caminhos em massa chamam `invalidar`): até a próxima execução o mês volta
+a vir do banco, e as linhas batem com as agregações, que são sempre do banco. Renomear
+ou mudar de turma um aluno, professor ou conteúdo (campos de CAMPOS_DO_CADASTRO) remove as
+partições dos meses em que ele tem agendamentos (`invalidar_cadastro`, pelos signals e pela
+importação de alunos), e a próxima execução as regera com os valores novos.
+
+A leitura usa os .npy, que só precisam do numpy; `snapshot_agendamentos --parquet` exporta
+também em Parquet (pyarrow, declarado no pyproject) para ferramentas externas.
+"""
+import itertools
+import json
+import os
+import shutil
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+COLUNAS_TEXTO = ("status", "aluno", "serie", "turno", "professor", "especialidade", "conteudo", "descritor")
+COLUNAS = ("id", "inicio", "duracao_minutos") + COLUNAS_TEXTO
+TIPOS = {"id": "int64", "inicio": "datetime64[us]", "duracao_minutos": "int64"}
+CHUNK_LINHAS = 5000
+# campos dos cadastros copiados para as colunas (duracao_minutos do conteúdo entra na duração efetiva)
+CAMPOS_DO_CADASTRO = {
+    "aluno": ("nome", "serie", "turno"),
+    "professor": ("nome", "especialidade"),
+    "conteudo": ("nome", "descritor", "duracao_minutos"),
+}
+LOTE_INVALIDACAO = 500
+
+
+def _raiz():
+    return os.path.join(settings.ESCOLA_SNAPSHOT_DIR, "agendamentos")
+
+
+def _diretorio(mes):
+    return os.path.join(_raiz(), mes.strftime("%Y-%m"))
+
+
+def _proximo_mes(mes):
+    return date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1)
+
+
+def _limites(mes):
+    """Início e fim (exclusivo) do mês em UTC, com fuso."""
+    proximo = _proximo_mes(mes)
+    return (
+        datetime(mes.year, mes.month, 1, tzinfo=dt_timezone.utc),
+        datetime(proximo.year, proximo.month, 1, tzinfo=dt_timezone.utc),
+    )
+
+
+def _utc_sem_fuso(dt):
+    return dt.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+
+def ler_meta(mes):
+    try:
+        with open(os.path.join(_diretorio(mes), "meta.json"), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return None
+
+
+def particao_fechada(mes):
+    """Meta da partição do mês se ela existir e tiver sido gerada depois do fim do mês."""
+    meta = ler_meta(mes)
+    if meta is None or not meta["fechado"]:
+        return None
+    return meta
+
+
+def mes_de(inicio):
+    """Mês (UTC) da partição de um agendamento com esse `inicio`."""
+    return inicio.astimezone(dt_timezone.utc).date().replace(day=1)
+
+
+def invalidar(meses):
+    """Remove as partições desses meses: eles voltam a ser lidos do banco até a próxima geração."""
+    for mes in set(meses):
+        if mes is not None and os.path.isdir(_diretorio(mes)):
+            remover_particao(mes)
+
+
+def invalidar_cadastro(modelo, pks):
+    """
+    Remove as partições dos meses com agendamentos desses alunos, professores ou conteúdos
+    (`modelo` é uma chave de CAMPOS_DO_CADASTRO).
+    """
+    pks = list(pks)
+    if not pks or not meses_com_particao():
+        return
+    from escola.models.agendamento import Agendamento
+
+    meses = set()
+    for inicio in range(0, len(pks), LOTE_INVALIDACAO):
+        meses.update(
+            Agendamento.objects.filter(**{f"{modelo}_id__in": pks[inicio:inicio + LOTE_INVALIDACAO]})
+            .annotate(mes=TruncMonth("inicio", tzinfo=dt_timezone.utc))
+            .values_list("mes", flat=True)
+            .distinct()
+            .order_by()
+        )
+    invalidar(_como_data(mes) for mes in meses)
+
+
+def _como_data(mes):
+    """TruncMonth devolve datetime em alguns bancos e date em outros."""
+    return mes.date() if isinstance(mes, datetime) else mes
+
+
+def meses_com_particao():
+    if not os.path.isdir(_raiz()):
+        return []
+    return sorted(
+        datetime.strptime(nome, "%Y-%m").date()
+        for nome in os.listdir(_raiz())
+        if len(nome) == 7 and os.path.isfile(os.path.join(_raiz(), nome, "meta.json"))
+    )
+
+
+# ESCRITA
+
+def _gravar_npy(caminho, bruto, dtype, linhas):
+    """Monta o .npy a partir dos bytes já gravados em `bruto`, copiando em blocos."""
+    import numpy as np
+
+    with open(caminho, "wb") as destino, open(bruto, "rb") as origem:
+        np.lib.format.write_array_header_1_0(
+            destino, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (linhas,)},
+        )
+        shutil.copyfileobj(origem, destino)
+    os.remove(bruto)
+
+
+def gravar_particao(mes):
+    """
+    Regrava a partição do mês a partir do banco; devolve o número de linhas.
+    As colunas são gravadas em blocos de CHUNK_LINHAS conforme a query é lida; na memória
+    ficam só o bloco atual e os dicionários dos textos.
+    """
+    import numpy as np
+
+    from escola import reports
+
+    gerado_em = timezone.now()  # antes da leitura: o que mudar durante ela entra na próxima execução
+    inicio, fim = _limites(mes)
+    qs = reports.consultar_linhas(inicio__gte=inicio, inicio__lt=fim).order_by("inicio", "id")
+
+    temporario = _diretorio(mes) + ".tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    tipos = {coluna: np.dtype(TIPOS.get(coluna, "int32")) for coluna in COLUNAS}
+    brutos = {coluna: os.path.join(temporario, f"{coluna}.bin") for coluna in COLUNAS}
+    dicionarios = {coluna: {} for coluna in COLUNAS_TEXTO}
+    linhas = 0
+
+    arquivos = {coluna: open(caminho, "wb") for coluna, caminho in brutos.items()}
+    try:
+        fonte = qs.iterator(chunk_size=CHUNK_LINHAS)
+        while bloco := list(itertools.islice(fonte, CHUNK_LINHAS)):
+            pks, inicios, duracoes, *textos = zip(*bloco)
+            colunas = {
+                "id": pks,
+                "inicio": [_utc_sem_fuso(valor) for valor in inicios],
+                "duracao_minutos": [duracao or 0 for duracao in duracoes],
+            }
+            for coluna, valores_texto in zip(COLUNAS_TEXTO, textos):
+                dicionario = dicionarios[coluna]
+                colunas[coluna] = [dicionario.setdefault(valor or "", len(dicionario)) for valor in valores_texto]
+            for coluna, valores_coluna in colunas.items():
+                np.asarray(valores_coluna, dtype=tipos[coluna]).tofile(arquivos[coluna])
+            linhas += len(bloco)
+    finally:
+        for arquivo in arquivos.values():
+            arquivo.close()
+
+    for coluna in COLUNAS:
+        _gravar_npy(os.path.join(temporario, f"{coluna}.npy"), brutos[coluna], tipos[coluna], linhas)
+    meta = {
+        "mes": mes.strftime("%Y-%m"),
+        "linhas": linhas,
+        "gerado_em": gerado_em.isoformat(),
+        "fechado": gerado_em >= fim,
+        "dicionarios": {coluna: list(valores) for coluna, valores in dicionarios.items()},
+    }
+    with open(os.path.join(temporario, "meta.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(meta, arquivo, ensure_ascii=False)
+
+    remover_particao(mes)
+    os.replace(temporario, _diretorio(mes))
+    return meta["linhas"]
+
+
+def remover_particao(mes):
+    shutil.rmtree(_diretorio(mes), ignore_errors=True)
+
+
+def meses_desatualizados(completo=False):
+    """
+    (meses a regenerar, meses a remover). Um mês é regenerado se não tem partição, se algum
+    agendamento mudou depois da geração, se o número de linhas mudou (exclusões) ou se
+    terminou depois da última geração.
+    """
+    from escola.models.agendamento import Agendamento
+
+    no_banco = {
+        _como_data(item["mes"]): item
+        for item in Agendamento.objects.annotate(mes=TruncMonth("inicio", tzinfo=dt_timezone.utc))
+        .values("mes")
+        .annotate(linhas=Count("id"), atualizado=Max("updated_at"))
+        .order_by()
+    }
+    gerar = []
+    for mes, item in sorted(no_banco.items()):
+        meta = None if completo else ler_meta(mes)
+        if (
+            meta is None
+            or meta["linhas"] != item["linhas"]
+            or item["atualizado"] > datetime.fromisoformat(meta["gerado_em"])
+            or not meta["fechado"]
+        ):
+            gerar.append(mes)
+    remover = [mes for mes in meses_com_particao() if mes not in no_banco]
+    return gerar, remover
+
+
+def sincronizar(completo=False):
+    """Atualiza o arquivo; devolve {mes: linhas} dos meses regenerados e a lista dos removidos."""
+    gerar, remover = meses_desatualizados(completo)
+    for mes in remover:
+        remover_particao(mes)
+    return {mes: gravar_particao(mes) for mes in gerar}, remover
+
+
+# LEITURA
+
+def ler_colunas(mes):
+    """Colunas da partição como arrays mapeados em memória (textos ainda como códigos) e o meta."""
+    import numpy as np
+
+    meta = ler_meta(mes)
+    if meta is None or not meta["linhas"]:
+        return {}, meta
+    return {coluna: np.load(os.path.join(_diretorio(mes), f"{coluna}.npy"), mmap_mode="r") for coluna in COLUNAS}, meta
+
+
+def ler_linhas(mes, inicio, fim, fim_incluso=False):
+    """Linhas (formato de `reports.iterar_linhas`) da partição com `inicio` no intervalo, em ordem."""
+    import numpy as np
+
+    from escola import reports
+
+    colunas, meta = ler_colunas(mes)
+    if not colunas:
+        return
+    datas = colunas["inicio"]
+    primeira = np.searchsorted(datas, np.datetime64(_utc_sem_fuso(inicio), "us"), side="left")
+    ultima = np.searchsorted(datas, np.datetime64(_utc_sem_fuso(fim), "us"), side="right" if fim_incluso else "left")
+    dicionarios = meta["dicionarios"]
+    for i in range(primeira, ultima):
+        yield reports.montar_linha(
+            int(colunas["id"][i]),
+            datas[i].item(),
+            int(colunas["duracao_minutos"][i]),
+            *(dicionarios[coluna][colunas[coluna][i]] for coluna in COLUNAS_TEXTO),
+        )
+
+
+def segmentos(inicio, fim):
+    """
+    Divide [inicio, fim] em trechos (inicio, fim, fim_incluso, mes): `mes` é a partição
+    fechada que cobre o trecho, ou None para trechos que devem vir do banco (consecutivos
+    são unidos numa query só).
+    """
+    if not os.path.isdir(_raiz()):
+        return [(inicio, fim, True, None)]
+
+    trechos = []
+    mes = date(*_utc_sem_fuso(inicio).timetuple()[:2], 1)
+    atual = inicio
+    while True:
+        _, fim_mes = _limites(mes)
+        fim_trecho, incluso = (fim, True) if fim < fim_mes else (fim_mes, False)
+        origem = mes if particao_fechada(mes) else None
+        if trechos and origem is None and trechos[-1][3] is None:
+            trechos[-1] = (trechos[-1][0], fim_trecho, incluso, None)
+        else:
+            trechos.append((atual, fim_trecho, incluso, origem))
+        if incluso:
+            return trechos
+        atual, mes = fim_mes, _proximo_mes(mes)
@@ -2,6 +2,7 @@ document.addEventListener("DOMContentLoaded", function () {
   const form = document.getElementById("relatorio-form");
   const loading = document.getElementById("loading");
   const exportBtn = document.getElementById("export-btn");
+  const detalheLink = document.getElementById("detalhe-link");
 
   form.addEventListener("submit", function (e) {
     e.preventDefault();
@@ -17,15 +18,81 @@ document.addEventListener("DOMContentLoaded", function () {
     gerarRelatorio(start, end);
   });
 
+  // Relatórios são gerados em segundo plano: 202 traz o job, que é consultado até concluir.
+  function aguardarJob(job) {
+    const texto = loading.querySelector("p");
+    return new Promise((resolve, reject) => {
+      const consultar = () => {
+        fetch(job.status_url)
+          .then((response) => response.json())
+          .then((status) => {
+            if (status.status === "CONCLUIDO") {
+              texto.textContent = "Gerando relatório...";
+              resolve(status);
+            } else if (status.status === "ERRO") {
+              reject(new Error(status.erro));
+            } else {
+              texto.textContent = `Gerando relatório... ${status.progresso}%`;
+              setTimeout(consultar, 1500);
+            }
+          })
+          .catch(reject);
+      };
+      consultar();
+    });
+  }
+
+  // Cada aba é uma seção do relatório (escola.report_sections): o resumo vem primeiro
+  // e as demais são buscadas só quando a aba é aberta, uma vez por período.
+  const abas = document.getElementById("relatorioTabsContent");
+  let periodo = abas.dataset.start ? { start: abas.dataset.start, end: abas.dataset.end } : null;
+
+  function urlSecao(secao) {
+    const base = abas.dataset.secaoUrl.replace("SECAO", secao);
+    return `${base}?start=${periodo.start}&end=${periodo.end}`;
+  }
+
+  function buscarSecao(secao) {
+    return fetch(urlSecao(secao)).then((response) => {
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      return response.json();
+    });
+  }
+
+  function carregarAba(container) {
+    if (!periodo || !container || !container.dataset.secao) return;
+    const chave = `${periodo.start}:${periodo.end}`;
+    if (container.dataset.carregado === chave) return;
+    container.dataset.carregado = chave;
+    container.innerHTML = "<p class='text-muted'>Carregando...</p>";
+    buscarSecao(container.dataset.secao)
+      .then((lista) => renderTabela(container.id, lista, container.dataset.colunas.split(",")))
+      .catch((err) => {
+        delete container.dataset.carregado;
+        console.error("Erro ao carregar aba:", err);
+        container.innerHTML = "<p class='text-danger'>Erro ao carregar. Abra a aba novamente.</p>";
+      });
+  }
+
+  document.querySelectorAll('#relatorioTabs [data-bs-toggle="tab"]').forEach((botao) => {
+    botao.addEventListener("shown.bs.tab", () => {
+      carregarAba(document.querySelector(`${botao.dataset.bsTarget} [data-secao]`));
+    });
+  });
+
   function gerarRelatorio(start, end) {
     loading.style.display = "block";
+    periodo = { start, end };
 
-    fetch(`/relatorios/conteudos/json/?start=${start}&end=${end}`)
-      .then((response) => response.json())
-      .then((data) => {
+    buscarSecao("resumo")
+      .then((resumo) => {
         loading.style.display = "none";
-        atualizarConteudo(data);
+        renderResumo(resumo);
         exportBtn.href = `/relatorios/conteudos/export/?start=${start}&end=${end}`;
+        detalheLink.href = `?start=${start}&end=${end}`;
+        detalheLink.style.display = "";
+        // a aba aberta (se não for o resumo) é recarregada para o novo período
+        carregarAba(abas.querySelector(".tab-pane.active [data-secao]"));
       })
       .catch((err) => {
         loading.style.display = "none";
@@ -34,8 +101,32 @@ document.addEventListener("DOMContentLoaded", function () {
       });
   }
 
-  function atualizarConteudo(data) {
-    const r = data.resumo;
+  exportBtn.addEventListener("click", function (e) {
+    if (exportBtn.getAttribute("href") === "#") return;
+    e.preventDefault();
+    loading.style.display = "block";
+
+    fetch(exportBtn.href)
+      .then((response) => {
+        if (response.status === 202) {
+          return response.json().then(aguardarJob).then((status) => {
+            window.location = status.download_url;
+          });
+        }
+        // arquivo já pronto: cancela esta leitura e deixa o navegador baixar
+        if (response.body) response.body.cancel();
+        window.location = exportBtn.href;
+      })
+      .catch((err) => {
+        console.error("Erro ao exportar relatório:", err);
+        alert("Erro ao exportar relatório. Tente novamente.");
+      })
+      .finally(() => {
+        loading.style.display = "none";
+      });
+  });
+
+  function renderResumo(r) {
     document.getElementById("resumo-content").innerHTML = `
       <div class="card card-body shadow-sm">
         <p><strong>Período:</strong> ${r.periodo_inicial} a ${r.periodo_final}</p>
@@ -44,11 +135,6 @@ document.addEventListener("DOMContentLoaded", function () {
         <p><strong>Média de Duração (min):</strong> ${r.media_duracao_min}</p>
       </div>
     `;
-
-    renderTabela("professor-content", data.by_professor, ["professor", "agendamentos", "horas"]);
-    renderTabela("aluno-content", data.by_aluno, ["aluno", "agendamentos", "horas"]);
-    renderTabela("conteudo-content", data.by_conteudo, ["conteudo", "agendamentos", "horas"]);
-    renderTabela("mensal-content", data.monthly, ["mes", "agendamentos", "horas"]);
   }
 
   function renderTabela(containerId, lista, colunas) {
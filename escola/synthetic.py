@@ -0,0 +1,152 @@
+"""
+Gerador de dados sintéticos com volumes realistas (alunos por série/turno, professores,
+conteúdos e anos de agendamentos com mistura de status), para medir desempenho.
+Os agendamentos entram por bulk_create (e saem sem signals); por isso o ResumoDiario é
+reconstruído e a lista de alunos, os painéis e os snapshots invalidados no final.
+"""
+import random
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from escola import dashboard, rollups, roster, snapshots
+from escola.models.agendamento import Agendamento
+from escola.models.aluno import Aluno
+from escola.models.conteudo import Conteudo
+from escola.models.professor import Professor
+
+# Marca os registros gerados, para poderem ser removidos sem tocar nos dados reais.
+PREFIXO = "[sint] "
+SERIES = ("1", "2", "3", "4", "5")
+HORARIOS = {"Manhã": range(7, 12), "Tarde": range(13, 18)}
+ESPECIALIDADES = ("Exatas", "Linguagens", "Humanas", "Natureza", None)
+DURACOES = (45, 50, 60)
+# (status, peso) para aulas já passadas e futuras
+MISTURA_PASSADO = ((Agendamento.STATUS_CONCLUIDO, 80), (Agendamento.STATUS_CANCELADO, 12), (Agendamento.STATUS_AGENDADO, 8))
+MISTURA_FUTURO = ((Agendamento.STATUS_AGENDADO, 92), (Agendamento.STATUS_CANCELADO, 8))
+BATCH_SIZE = 5000
+
+
+def limpar():
+    """
+    Remove os registros sintéticos e refaz o resumo diário uma vez. Saem só os agendamentos
+    de alunos sintéticos, com DELETE direto no banco, sem signals: nada de acertar o resumo
+    linha a linha nem de registrar exclusões no feed de mudanças para dados que só
+    existiam para medição (gerar() também não os registra). Professores e conteúdos sintéticos ainda usados por agendamentos
+    reais ficam.
+    """
+    q = connection.ops.quote_name
+    alunos = f"SELECT {q('id')} FROM {q(Aluno._meta.db_table)} WHERE {q('nome')} LIKE %s"
+    prefixo = PREFIXO + "%"
+    with transaction.atomic():
+        removidos = _remover(Agendamento, f"{q('aluno_id')} IN ({alunos})", [prefixo])
+        # o resumo aponta para professores e conteúdos: refeito antes de removê-los
+        rollups.reconstruir()
+        removidos += _remover(Aluno, f"{q('nome')} LIKE %s", [prefixo])
+        for modelo, fk in ((Professor, "professor_id"), (Conteudo, "conteudo_id")):
+            em_uso = f"SELECT {q(fk)} FROM {q(Agendamento._meta.db_table)}"
+            removidos += _remover(modelo, f"{q('nome')} LIKE %s AND {q('id')} NOT IN ({em_uso})", [prefixo])
+    _invalidar_derivados()
+    return removidos
+
+
+def _remover(modelo, where, params):
+    """DELETE direto na tabela do modelo: sem o collect() do ORM nem signals por linha."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {connection.ops.quote_name(modelo._meta.db_table)} WHERE {where}", params)
+        return cursor.rowcount
+
+
+def _invalidar_derivados():
+    roster.invalidar()
+    dashboard.invalidar_cadastros()
+    dashboard.invalidar_agendamentos()
+    snapshots.invalidar(snapshots.meses_com_particao())
+
+
+def _sortear_status(rnd, mistura):
+    return rnd.choices([s for s, _ in mistura], weights=[p for _, p in mistura])[0]
+
+
+def gerar(alunos=3000, professores=40, conteudos=30, dias=730, dias_futuros=60, aulas_por_dia=6, semente=0):
+    """
+    Cria os cadastros e agendamentos de `dias` úteis para trás até `dias_futuros` à frente.
+    Cada professor dá até `aulas_por_dia` aulas de hora cheia por dia útil, para alunos do turno
+    do horário, sem repetir aluno no mesmo horário (as durações não passam de uma hora). Retorna a contagem do que foi criado.
+    """
+    rnd = random.Random(semente)
+    with transaction.atomic():
+        novos_alunos = Aluno.objects.bulk_create(
+            [
+                Aluno(
+                    nome=f"{PREFIXO}Aluno {i:05d}",
+                    serie=rnd.choice(SERIES),
+                    turno=rnd.choice(tuple(HORARIOS)),
+                    is_active=rnd.random() > 0.05,
+                )
+                for i in range(alunos)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        novos_profs = Professor.objects.bulk_create(
+            [
+                Professor(nome=f"{PREFIXO}Professor {i:03d}", especialidade=rnd.choice(ESPECIALIDADES))
+                for i in range(professores)
+            ]
+        )
+        novos_conteudos = Conteudo.objects.bulk_create(
+            [
+                Conteudo(
+                    nome=f"{PREFIXO}Conteúdo {i:03d}",
+                    descricao="Gerado por seed_synthetic",
+                    duracao_minutos=rnd.choice(DURACOES),
+                    descritor=f"D{i % 12 + 1}" if i % 4 else None,
+                )
+                for i in range(conteudos)
+            ]
+        )
+
+        por_turno = {turno: [a for a in novos_alunos if a.turno == turno] for turno in HORARIOS}
+        agora = timezone.now()
+        hoje = timezone.localdate()
+        lote, total = [], 0
+        for deslocamento in range(-dias, dias_futuros + 1):
+            dia = hoje + timedelta(days=deslocamento)
+            if dia.weekday() >= 5:
+                continue
+            ocupados = set()
+            for prof in novos_profs:
+                for turno, hora in rnd.sample([(t, h) for t, horas in HORARIOS.items() for h in horas], aulas_por_dia):
+                    if not por_turno[turno]:
+                        continue
+                    aluno = rnd.choice(por_turno[turno])
+                    if (aluno.pk, hora) in ocupados:
+                        continue
+                    ocupados.add((aluno.pk, hora))
+                    conteudo = rnd.choice(novos_conteudos)
+                    inicio = timezone.make_aware(datetime.combine(dia, time(hora)))
+                    lote.append(
+                        Agendamento(
+                            aluno=aluno,
+                            professor=prof,
+                            conteudo=conteudo,
+                            inicio=inicio,
+                            duracao_minutos=conteudo.duracao_minutos,
+                            status=_sortear_status(rnd, MISTURA_PASSADO if inicio < agora else MISTURA_FUTURO),
+                        )
+                    )
+            if len(lote) >= BATCH_SIZE:
+                total += len(Agendamento.objects.bulk_create(lote))
+                lote = []
+        total += len(Agendamento.objects.bulk_create(lote))
+
+        # bulk_create não dispara signals: refaz o resumo diário e invalida os caches derivados
+        rollups.reconstruir()
+    _invalidar_derivados()
+    return {
+        "alunos": len(novos_alunos),
+        "professores": len(novos_profs),
+        "conteudos": len(novos_conteudos),
+        "agendamentos": total,
+    }
@@ -0,0 +1,91 @@
+"""Testes da sincronização em lote de grupos, permissões e perfis (escola.acessos).
+Cenários:
+ - permissões dos grupos iguais às desejadas; segunda execução sem escrita
+ - professores e usuários do grupo sincronizados com número fixo de queries
+ - comando sync_professional_groups idempotente
+ - login (update de last_login) sem queries de grupo/perfil
+"""
+import pytest
+from io import StringIO
+from django.contrib.auth.models import Group, Permission, User, update_last_login
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from escola import acessos, roles
+from escola.models.professor import Professor
+
+
+def _escritas(ctx):
+    return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+
+
+def _povoar(n):
+    """n usuários: um terço no grupo sem perfil, um terço com perfil fora do grupo, um terço sem nada."""
+    grupo = Group.objects.get(name=roles.GRUPO_PROFESSOR)
+    User.objects.bulk_create([User(username=f'u{i}', first_name=f'Nome{i}') for i in range(n)])
+    usuarios = list(User.objects.filter(username__startswith='u').order_by('pk'))
+    User.groups.through.objects.bulk_create(
+        [User.groups.through(user_id=u.pk, group_id=grupo.pk) for u in usuarios[0::3]]
+    )
+    Professor.objects.bulk_create([Professor(user=u, nome=u.username) for u in usuarios[1::3]])
+    return usuarios
+
+
+@pytest.mark.django_db
+class TestAcessos:
+
+    def test_permissoes_dos_grupos(self):
+        coord = Group.objects.get(name=roles.GRUPO_COORDENACAO)
+        coord.permissions.add(Permission.objects.get(codename='delete_conteudo'))
+        resultado = acessos.sincronizar_grupos()
+        assert resultado.permissoes_removidas == 1 and resultado.grupos_criados == 0
+
+        esperadas = set(acessos.PERMISSOES_POR_GRUPO[roles.GRUPO_COORDENACAO])
+        assert set(coord.permissions.values_list('codename', flat=True)) == esperadas
+        diretoria = Group.objects.get(name=roles.GRUPO_DIRETORIA)
+        assert diretoria.permissions.count() == Permission.objects.count()
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert acessos.sincronizar_grupos() == (0, 0, 0)
+        assert not _escritas(ctx)
+
+    def test_professores_em_lote(self):
+        poucos = _povoar(9)
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = acessos.sincronizar_professores()
+        assert resultado == (3, 3)
+        consultas = len(ctx.captured_queries)
+
+        assert Professor.objects.get(user=poucos[0]).nome == 'Nome0'
+        assert set(User.objects.filter(groups__name=roles.GRUPO_PROFESSOR).values_list('pk', flat=True)) == {
+            u.pk for u in poucos[0::3] + poucos[1::3]
+        }
+        papel = roles.papel_de(User.objects.get(pk=poucos[0].pk))
+        assert papel.eh_professor and papel.professor.user_id == poucos[0].pk
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert acessos.sincronizar_professores() == (0, 0)
+        assert not _escritas(ctx)
+
+        User.objects.filter(username__startswith='u').delete()
+        _povoar(300)
+        with CaptureQueriesContext(connection) as ctx:
+            assert acessos.sincronizar_professores() == (100, 100)
+        assert len(ctx.captured_queries) == consultas
+
+    def test_comando(self):
+        _povoar(6)
+        saida = StringIO()
+        call_command('sync_professional_groups', permissoes=True, stdout=saida)
+        assert 'Professor objects created for users in group: 2' in saida.getvalue()
+        saida = StringIO()
+        call_command('sync_professional_groups', stdout=saida)
+        assert 'Professor objects created for users in group: 0' in saida.getvalue()
+
+    def test_login_sem_queries_de_papel(self):
+        u = User.objects.create_user(username='prof', password='pass')
+        u.groups.add(Group.objects.get(name=roles.GRUPO_PROFESSOR))
+        u.save()
+        with CaptureQueriesContext(connection) as ctx:
+            update_last_login(None, u)
+        assert [q['sql'].split()[0] for q in ctx.captured_queries] == ['UPDATE']
@@ -0,0 +1,75 @@
+"""Testes do admin (core.admin.admin_site com os ModelAdmins de escola.admin).
+Cenários:
+ - lista de agendamentos com número fixo de queries, sem depender da quantidade de linhas
+ - sem o COUNT(*) da tabela inteira (show_full_result_count=False)
+ - formulário de agendamento com autocomplete em vez de <select> com todos os alunos
+ - autocomplete de professor sem uma query de usuário por resultado, em ordem de nome
+"""
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola.models import aluno, conteudo, professor, agendamento
+
+Agendamento = agendamento.Agendamento
+
+
+@pytest.mark.django_db
+class TestAdmin:
+
+    @pytest.fixture
+    def admin_client(self, client):
+        client.force_login(User.objects.create_superuser(username='admin', password='pass', email='a@a.com'))
+        return client
+
+    def _criar(self, n, de=0):
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=60)
+        inicio = timezone.now() + timedelta(days=1)
+        for i in range(de, de + n):
+            a = aluno.Aluno.objects.create(nome=f'Aluno{i}', serie='1', turno='Manhã')
+            u = User.objects.create_user(username=f'prof{i}', password='pass')
+            p = professor.Professor.objects.create(nome=f'Prof{i}', user=u)
+            Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=inicio + timedelta(hours=i))
+
+    def _queries(self, client, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            resposta = client.get(url, params)
+        assert resposta.status_code == 200
+        return [q['sql'] for q in ctx.captured_queries]
+
+    def test_lista_com_queries_fixas(self, admin_client):
+        url = reverse('admin:escola_agendamento_changelist')
+        self._criar(2)
+        poucas = self._queries(admin_client, url)
+        self._criar(8, de=2)
+        muitas = self._queries(admin_client, url)
+        assert len(muitas) == len(poucas)
+        contagens = [sql for sql in muitas if 'COUNT(*)' in sql and 'escola_agendamento' in sql]
+        assert len(contagens) == 1
+
+        filtrada = self._queries(admin_client, url, inicio__year=str(timezone.localdate().year))
+        assert len(filtrada) <= len(muitas)
+
+    def test_formulario_com_autocomplete(self, admin_client):
+        self._criar(3)
+        ag = Agendamento.objects.first()
+        conteudo_html = admin_client.get(reverse('admin:escola_agendamento_change', args=[ag.pk])).content.decode()
+        assert 'admin-autocomplete' in conteudo_html
+        outros = aluno.Aluno.objects.exclude(pk=ag.aluno_id).values_list('nome', flat=True)
+        assert not any(f'>{nome}</option>' in conteudo_html for nome in outros)
+
+    @pytest.mark.filterwarnings('error::django.core.paginator.UnorderedObjectListWarning')
+    def test_autocomplete_de_professor(self, admin_client):
+        self._criar(6)
+        url = reverse('admin:autocomplete')
+        params = {'app_label': 'escola', 'model_name': 'agendamento', 'field_name': 'professor', 'term': 'Prof'}
+        with CaptureQueriesContext(connection) as ctx:
+            data = admin_client.get(url, params).json()
+        assert len(data['results']) == 6 and data['results'][0]['text'].startswith('Prof')
+        textos = [r['text'] for r in data['results']]
+        assert textos == sorted(textos)
+        # só a do usuário da sessão
+        assert len([q for q in ctx.captured_queries if 'FROM "auth_user"' in q['sql'] and '"auth_user"."id" =' in q['sql']]) == 1
@@ -0,0 +1,125 @@
+"""Testes do agendamento recorrente/em lote.
+Cenários:
+ - expansão da recorrência semanal
+ - lote escalonado cria tudo, mantém o resumo diário e não escala em queries
+ - conflitos reportados por item; tudo_ou_nada não grava nada
+ - vários alunos no mesmo horário sem escalonar são recusados
+ - endpoint JSON
+"""
+import pytest
+from datetime import date, datetime, time
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import rollups, scheduling
+from escola.models import aluno, conteudo, professor, agendamento
+from escola.models.resumo_diario import ResumoDiario
+
+
+@pytest.mark.django_db
+class TestAgendamentoLote:
+
+    @pytest.fixture
+    def base_objs(self):
+        alunos = [aluno.Aluno.objects.create(nome=f'Aluno {i:02d}', serie='3', turno='Tarde') for i in range(12)]
+        c = conteudo.Conteudo.objects.create(nome='Reforço', duracao_minutos=30, descricao='d')
+        p = professor.Professor.objects.create(nome='Prof Lote')
+        return alunos, c, p
+
+    def test_expandir_recorrencia(self):
+        # 2025-03-04 é uma terça-feira
+        horarios = scheduling.expandir_recorrencia(date(2025, 3, 1), date(2025, 3, 31), ['1'], time(14, 0))
+        assert [h.day for h in horarios] == [4, 11, 18, 25]
+        assert timezone.localtime(horarios[0]).hour == 14
+        quinzenal = scheduling.expandir_recorrencia(date(2025, 3, 3), date(2025, 3, 31), ['1', '3'], time(9, 0), 2)
+        assert [h.day for h in quinzenal] == [4, 6, 18, 20]
+
+    def _lote(self, alunos, c, p, **kwargs):
+        horarios = scheduling.expandir_recorrencia(date(2025, 3, 1), date(2025, 6, 30), ['1'], time(13, 0))
+        return scheduling.montar_candidatos(alunos, c, p, horarios, **kwargs)
+
+    def test_lote_escalonado(self, base_objs):
+        alunos, c, p = base_objs
+        candidatos = self._lote(alunos[:2], c, p, escalonar=True)
+        with CaptureQueriesContext(connection) as poucos:
+            criados, relatorio = scheduling.agendar_em_lote(candidatos)
+        assert len(criados) == len(candidatos) == agendamento.Agendamento.objects.count()
+        assert all(item['criado'] and not item['conflitos'] for item in relatorio)
+
+        agendamento.Agendamento.objects.all().delete()
+        candidatos = self._lote(alunos, c, p, escalonar=True)
+        with CaptureQueriesContext(connection) as muitos:
+            criados, _ = scheduling.agendar_em_lote(candidatos)
+        assert len(criados) == len(candidatos)
+        assert len(muitos) <= len(poucos) + 2
+
+        incremental = sorted(ResumoDiario.objects.values_list('dia', 'status', 'total', 'minutos'))
+        rollups.reconstruir()
+        assert sorted(ResumoDiario.objects.values_list('dia', 'status', 'total', 'minutos')) == incremental
+
+    def test_conflitos_por_item(self, base_objs):
+        alunos, c, p = base_objs
+        outro = professor.Professor.objects.create(nome='Outro')
+        existente = agendamento.Agendamento.objects.create(
+            aluno=alunos[0], conteudo=c, professor=outro,
+            inicio=timezone.make_aware(datetime(2025, 3, 4, 13, 15)),
+        )
+        candidatos = self._lote(alunos[:3], c, p, escalonar=True)
+        criados, relatorio = scheduling.agendar_em_lote(candidatos)
+        com_conflito = [item for item in relatorio if item['conflitos']]
+        assert len(com_conflito) == 1
+        assert com_conflito[0]['aluno'] == alunos[0].pk and not com_conflito[0]['criado']
+        assert 'Outro' in com_conflito[0]['conflitos'][0]
+        assert len(criados) == len(candidatos) - 1
+
+        agendamento.Agendamento.objects.exclude(pk=existente.pk).delete()
+        criados, _ = scheduling.agendar_em_lote(self._lote(alunos[:3], c, p, escalonar=True), tudo_ou_nada=True)
+        assert criados == []
+        assert agendamento.Agendamento.objects.count() == 1
+
+    def test_turma_sem_escalonar(self, base_objs):
+        alunos, c, p = base_objs
+        with pytest.raises(ValueError):
+            self._lote(alunos[:3], c, p)
+        assert len(self._lote(alunos[:1], c, p)) == 17
+
+    def test_endpoint(self, client, base_objs):
+        alunos, c, p = base_objs
+        u = User.objects.create_user(username='coord', password='pass')
+        u.user_permissions.add(Permission.objects.get(codename='add_agendamento'))
+        client.force_login(u)
+        assert client.get(reverse('agendamentos:lote')).status_code == 200
+        resp = client.post(reverse('agendamentos:lote'), {
+            'alunos': [a.pk for a in alunos[:3]],
+            'conteudo': c.pk,
+            'professor': p.pk,
+            'data_inicial': '2025-03-01',
+            'data_final': '2025-03-31',
+            'dias_semana': ['1'],
+            'horario': '14:00',
+            'intervalo_semanas': 1,
+            'escalonar': 'on',
+        })
+        assert resp.status_code == 201
+        data = resp.json()
+        assert data['total'] == data['criados'] == 12 and data['conflitos'] == 0
+
+        # sem escalonar, o mesmo professor não pode atender os três no mesmo horário
+        resp = client.post(reverse('agendamentos:lote'), {
+            'alunos': [a.pk for a in alunos[3:6]],
+            'conteudo': c.pk,
+            'professor': p.pk,
+            'data_inicial': '2025-04-01',
+            'data_final': '2025-04-30',
+            'dias_semana': ['1'],
+            'horario': '14:00',
+            'intervalo_semanas': 1,
+        })
+        assert resp.status_code == 400
+        assert 'em sequência' in resp.json()['errors']['__all__'][0]
+        assert agendamento.Agendamento.objects.count() == 12
+
+        resp = client.post(reverse('agendamentos:lote'), {'alunos': [], 'dias_semana': ['1']})
+        assert resp.status_code == 400
@@ -0,0 +1,143 @@
+"""Testes das views assíncronas e do perfil ASGI (escola.assincrono, escola.carga).
+Cenários:
+ - endpoints JSON/polling são corrotinas e nenhum middleware obriga a rodar em thread
+ - arquivo estático servido pelo WhiteNoise sob ASGI (lista pronta e autorefresh)
+ - alunos_json e mudança de status pelo AsyncClient (professor só nos seus agendamentos)
+ - seção do relatório calculada no pool de threads, com dados commitados
+ - teste de carga contra um servidor local: contagem, status e percentis
+"""
+import json
+import threading
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.test import AsyncClient
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from escola import assincrono, carga, report_sections
+from escola.models import aluno, conteudo, professor, agendamento
+
+Agendamento = agendamento.Agendamento
+
+
+def test_views_e_middlewares_assincronos():
+    for url in ['/alunos/json/', '/alunos/ajax/load-alunos/', '/agendamentos/feed/', '/agendamentos/1/status/',
+                '/relatorios/conteudos/json/', '/relatorios/conteudos/json/resumo/']:
+        assert iscoroutinefunction(resolve(url).func), url
+    for caminho in settings.MIDDLEWARE:
+        assert getattr(import_string(caminho), 'async_capable', False), caminho
+
+
+@pytest.mark.parametrize('autorefresh', [False, True])
+def test_estatico_sob_asgi(settings, autorefresh):
+    # ArquivosEstaticosMiddleware usa a busca interna do WhiteNoise (files/find_file);
+    # este teste segura a versão fixada no pyproject.toml
+    settings.WHITENOISE_USE_FINDERS = True
+    settings.WHITENOISE_AUTOREFRESH = autorefresh
+
+    resposta = async_to_sync(AsyncClient().get)('/static/admin/css/base.css')
+    corpo = b''.join(resposta.streaming_content)
+    assert resposta.status_code == 200
+    assert resposta['Content-Type'].startswith('text/css')
+    assert int(resposta['Content-Length']) == len(corpo) > 0
+
+
+@pytest.mark.django_db
+class TestViewsAssincronas:
+
+    @pytest.fixture
+    def base_objs(self):
+        a = aluno.Aluno.objects.create(nome='Ana', serie='1', turno='M')
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=60)
+        u = User.objects.create_user(username='prof', password='pass')
+        u.groups.add(Group.objects.get(name='Professor'))
+        p = professor.Professor.objects.create(nome='P', user=u)
+        outro = professor.Professor.objects.create(nome='Outro')
+        amanha = timezone.now() + timedelta(days=1)
+        return {
+            'user': u,
+            'meu': Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=amanha),
+            'alheio': Agendamento.objects.create(aluno=a, conteudo=c, professor=outro, inicio=amanha + timedelta(hours=2)),
+        }
+
+    def test_alunos_e_status(self, base_objs):
+        client = AsyncClient()
+        client.force_login(base_objs['user'])
+
+        @async_to_sync
+        async def chamar():
+            alunos = await client.get(reverse('alunos:alunos_json'), {'serie': '1', 'turno': 'M'})
+            meu = await client.post(
+                reverse('agendamentos:alterar_status_agendamento', args=[base_objs['meu'].pk]),
+                {'status': Agendamento.STATUS_CONCLUIDO},
+            )
+            alheio = await client.post(
+                reverse('agendamentos:alterar_status_agendamento', args=[base_objs['alheio'].pk]),
+                {'status': Agendamento.STATUS_CANCELADO},
+            )
+            return alunos, meu, alheio
+
+        alunos, meu, alheio = chamar()
+        assert [a['nome'] for a in json.loads(alunos.content)] == ['Ana']
+        assert meu.status_code == 302 and alheio.status_code == 302
+        base_objs['meu'].refresh_from_db()
+        base_objs['alheio'].refresh_from_db()
+        assert base_objs['meu'].status == Agendamento.STATUS_CONCLUIDO
+        assert base_objs['alheio'].status == Agendamento.STATUS_AGENDADO
+
+
+@pytest.mark.django_db(transaction=True)
+def test_secao_no_pool_de_threads(client, settings, monkeypatch):
+    settings.ESCOLA_THREADS_RELATORIO = 2
+    threads = []
+    obter = report_sections.obter
+
+    def obter_registrando(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return obter(*args, **kwargs)
+
+    monkeypatch.setattr(report_sections, 'obter', obter_registrando)
+    a = aluno.Aluno.objects.create(nome='Ana', serie='1', turno='M')
+    c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=60)
+    p = professor.Professor.objects.create(nome='P')
+    Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=timezone.now() - timedelta(days=1))
+    client.force_login(User.objects.create_superuser(username='admin', password='pass', email='a@a.com'))
+
+    resposta = client.get(reverse('relatorios:relatorio_conteudos_secao', args=['resumo']))
+    assert resposta.status_code == 200
+    assert threads and threads[0].startswith('escola-relatorio')
+    assert assincrono.pool()._max_workers == 2
+
+
+class _Servidor(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        corpo = b'{}' if self.path == '/ok' else b'erro'
+        self.send_response(200 if self.path == '/ok' else 503)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_carga_contra_servidor_local():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Servidor)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{servidor.server_port}'
+    try:
+        resultado = carga.executar([f'{base}/ok', f'{base}/falha'], clientes=4, duracao=0.3)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    total = resultado['total']
+    assert total['requisicoes'] > 4 and set(total['status']) == {'200', '503'}
+    assert total['erros'] == total['status']['503'] == resultado['urls'][f'{base}/falha']['requisicoes']
+    assert 0 < total['p50_ms'] <= total['p95_ms'] <= total['p99_ms']
+    assert carga.percentil([1.0, 2.0, 3.0, 4.0], 50) == 2.5
@@ -0,0 +1,93 @@
+"""Testes do gerador de dados sintéticos e da suíte de benchmarks.
+Cenários:
+ - seed_synthetic cria volumes pedidos, resumo diário consistente e sem choque de horário do aluno
+ - --limpar remove só os registros sintéticos, sem signals por linha nem marcas no feed;
+   agendamentos reais com professor ou conteúdo sintético ficam
+ - benchmark grava JSON com tempos e queries de todos os casos e não altera a base
+ - comparação com um resultado anterior
+"""
+import json
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from escola import benchmarks, synthetic
+from escola.models import aluno, agendamento, conteudo, professor
+from escola.models.mudanca_agendamento import MudancaAgendamento
+from escola.models.report_job import ReportJob
+from escola.models.resumo_diario import ResumoDiario
+
+SEED = dict(alunos=40, professores=3, conteudos=4, dias=20, dias_futuros=5, aulas_por_dia=4, stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestSeedSynthetic:
+
+    def test_gera_volumes(self):
+        call_command('seed_synthetic', **SEED)
+        assert aluno.Aluno.objects.filter(nome__startswith=synthetic.PREFIXO).count() == 40
+        total = agendamento.Agendamento.objects.count()
+        assert total > 0
+        assert ResumoDiario.objects.aggregate(t=Sum('total'))['t'] == total
+        status = set(agendamento.Agendamento.objects.values_list('status', flat=True))
+        assert {'CONCLUIDO', 'AGENDADO'} <= status
+        repetidos = agendamento.Agendamento.objects.values('aluno', 'inicio').annotate(n=Count('id')).filter(n__gt=1)
+        assert not repetidos.exists()
+
+    def test_limpar(self):
+        real = aluno.Aluno.objects.create(nome='Aluno real', serie='1', turno='Manhã')
+        call_command('seed_synthetic', **SEED)
+        call_command('seed_synthetic', limpar=True, **{**SEED, 'alunos': 5})
+        assert aluno.Aluno.objects.filter(nome__startswith=synthetic.PREFIXO).count() == 5
+        assert aluno.Aluno.objects.filter(pk=real.pk).exists()
+
+    def test_limpar_sem_signals(self, django_capture_on_commit_callbacks):
+        call_command('seed_synthetic', **SEED)
+        assert agendamento.Agendamento.objects.count() > 20
+        with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as consultas:
+            synthetic.limpar()
+        assert len(consultas) < 20
+        assert not agendamento.Agendamento.objects.exists() and not ResumoDiario.objects.exists()
+        assert not MudancaAgendamento.objects.exists()
+
+    def test_limpar_preserva_agendamento_real(self):
+        call_command('seed_synthetic', **SEED)
+        prof = professor.Professor.objects.filter(nome__startswith=synthetic.PREFIXO).first()
+        cont = conteudo.Conteudo.objects.filter(nome__startswith=synthetic.PREFIXO).first()
+        real = agendamento.Agendamento.objects.create(
+            aluno=aluno.Aluno.objects.create(nome='Aluno real', serie='1', turno='Manhã'),
+            professor=prof, conteudo=cont, inicio=timezone.now() + timedelta(days=400),
+        )
+        synthetic.limpar()
+        assert list(agendamento.Agendamento.objects.values_list('pk', flat=True)) == [real.pk]
+        assert list(professor.Professor.objects.all()) == [prof]
+        assert list(conteudo.Conteudo.objects.all()) == [cont]
+        assert ResumoDiario.objects.aggregate(t=Sum('total'))['t'] == 1
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+
+    def test_grava_json_sem_alterar_a_base(self, tmp_path, settings):
+        settings.MEDIA_ROOT = str(tmp_path / 'media')
+        call_command('seed_synthetic', **SEED)
+        antes = (agendamento.Agendamento.objects.count(), User.objects.count(), ReportJob.objects.count())
+
+        saida = tmp_path / 'resultado.json'
+        call_command('benchmark', repeticoes=1, saida=str(saida), stdout=StringIO())
+        resultado = json.loads(saida.read_text())
+
+        assert set(resultado['casos']) == set(benchmarks.CASOS)
+        assert resultado['volumes']['agendamentos'] == antes[0]
+        assert all(medida['queries'] > 0 for medida in resultado['casos'].values())
+        assert (agendamento.Agendamento.objects.count(), User.objects.count(), ReportJob.objects.count()) == antes
+        assert not list((tmp_path / 'media' / 'relatorios').glob('*'))
+
+        out = StringIO()
+        call_command('benchmark', repeticoes=1, casos=['home_professor'], saida=str(tmp_path / 'b.json'), comparar=str(saida), stdout=out)
+        assert 'home_professor' in out.getvalue().split('Comparação')[1]
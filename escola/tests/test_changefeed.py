@@ -0,0 +1,221 @@
+"""Testes do feed de mudanças dos agendamentos (escola.changefeed).
+Cenários:
+ - primeira sincronização só com os agendamentos do professor; depois só o que mudou
+ - exclusão e troca de professor viram "delete" (a troca não aparece para a Coordenação)
+ - paginação com has_more, na ordem do registro, e primeira sincronização paginada
+ - transação longa: a mudança com updated_at antigo chega depois do commit, mesmo para
+   cursores entregues enquanto ela estava aberta
+ - transições de status e agendamentos em lote entram no registro
+ - custo fixo por consulta com cursor, independente do tamanho da tabela
+ - NDJSON, cursor inválido (400), expirado ou de formato antigo (410), usuário sem papel (403)
+ - Server-Sent Events com o cursor no id do evento e long-poll sem mudanças
+"""
+import base64
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from datetime import timedelta
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import changefeed, scheduling, transitions
+from escola.models import aluno, conteudo, professor, agendamento
+from escola.models.mudanca_agendamento import MudancaAgendamento
+
+Agendamento = agendamento.Agendamento
+
+
+@pytest.fixture(autouse=True)
+def _sem_atraso(monkeypatch):
+    monkeypatch.setattr(changefeed, 'ATRASO_ESTAVEL', timedelta(0))
+    monkeypatch.setattr(changefeed, 'INTERVALO_CONSULTA', 0.01)
+
+
+@async_to_sync
+async def _ler(resposta):
+    return b''.join([parte async for parte in resposta.streaming_content]).decode()
+
+
+def _ops(eventos):
+    return [(e['op'], e['id']) for e in eventos]
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+
+    @pytest.fixture
+    def base_objs(self):
+        alunos = [aluno.Aluno.objects.create(nome=f'A{i}', serie='1', turno='Manhã') for i in range(3)]
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=60)
+        u = User.objects.create_user(username='prof', password='pass')
+        p = professor.Professor.objects.create(nome='P', user=u)
+        outro = professor.Professor.objects.create(nome='Outro')
+        amanha = timezone.now() + timedelta(days=1)
+        ags = [
+            Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=amanha + timedelta(hours=2 * i))
+            for i, a in enumerate(alunos)
+        ]
+        alheio = Agendamento.objects.create(aluno=alunos[0], conteudo=c, professor=outro, inicio=amanha + timedelta(days=1))
+        return {'professor': p, 'outro': outro, 'ags': ags, 'alheio': alheio}
+
+    def test_sincronizacao_incremental(self, base_objs, django_capture_on_commit_callbacks):
+        p, ags = base_objs['professor'], base_objs['ags']
+        inicial = changefeed.lote(p.pk)
+        assert _ops(inicial.eventos) == [('upsert', ag.pk) for ag in ags] and not inicial.has_more
+        assert inicial.eventos[0]['fim'] == ags[0].inicio + timedelta(minutes=60)
+        assert changefeed.lote(p.pk, inicial.cursor).eventos == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ags[1].observacoes = 'mudou'
+            ags[1].save()
+            base_objs['alheio'].observacoes = 'de outro professor'
+            base_objs['alheio'].save()
+        mudancas = changefeed.lote(p.pk, inicial.cursor)
+        assert _ops(mudancas.eventos) == [('upsert', ags[1].pk)]
+        assert mudancas.eventos[0]['observacoes'] == 'mudou'
+
+    def test_exclusao_e_troca_de_professor(self, base_objs, django_capture_on_commit_callbacks):
+        p, outro, ags = base_objs['professor'], base_objs['outro'], base_objs['ags']
+        do_professor = changefeed.lote(p.pk).cursor
+        da_coordenacao = changefeed.lote(None).cursor
+
+        excluido_pk = ags[0].pk
+        with django_capture_on_commit_callbacks(execute=True):
+            ags[0].delete()
+            ags[2].professor = outro
+            ags[2].save()
+
+        depois_da_troca = changefeed.lote(p.pk, do_professor)
+        assert _ops(depois_da_troca.eventos) == [('delete', excluido_pk), ('delete', ags[2].pk)]
+        assert _ops(changefeed.lote(outro.pk, changefeed.lote(outro.pk).cursor).eventos) == []
+        assert _ops(changefeed.lote(None, da_coordenacao).eventos) == [('delete', excluido_pk), ('upsert', ags[2].pk)]
+
+        # o agendamento volta: no mesmo lote vale só a última mudança dele
+        with django_capture_on_commit_callbacks(execute=True):
+            ags[2].professor = p
+            ags[2].save()
+        assert _ops(changefeed.lote(p.pk, depois_da_troca.cursor).eventos) == [('upsert', ags[2].pk)]
+        assert _ops(changefeed.lote(p.pk, do_professor).eventos) == [('delete', excluido_pk), ('upsert', ags[2].pk)]
+
+        MudancaAgendamento.objects.update(registrada_em=timezone.now() - changefeed.RETENCAO - timedelta(days=1))
+        assert changefeed.podar() == 5
+
+    def test_paginacao(self, base_objs, django_capture_on_commit_callbacks):
+        p, ags = base_objs['professor'], base_objs['ags']
+        primeira = changefeed.lote(p.pk, limite=2)
+        assert _ops(primeira.eventos) == [('upsert', ags[0].pk), ('upsert', ags[1].pk)] and primeira.has_more
+        segunda = changefeed.lote(p.pk, primeira.cursor, limite=2)
+        assert _ops(segunda.eventos) == [('upsert', ags[2].pk)] and not segunda.has_more
+
+        cursor = segunda.cursor
+        with django_capture_on_commit_callbacks(execute=True):
+            ags[0].observacoes = 'x'
+            ags[0].save()
+            excluido_pk = ags[1].pk
+            ags[1].delete()
+            ags[2].observacoes = 'y'
+            ags[2].save()
+
+        vistos = []
+        while True:
+            resultado = changefeed.lote(p.pk, cursor, limite=2)
+            vistos += _ops(resultado.eventos)
+            cursor = resultado.cursor
+            if not resultado.has_more:
+                break
+        assert vistos == [('upsert', ags[0].pk), ('delete', excluido_pk), ('upsert', ags[2].pk)]
+        assert changefeed.lote(p.pk, cursor).eventos == []
+
+    def test_transacao_longa(self, base_objs, django_capture_on_commit_callbacks):
+        p, ags = base_objs['professor'], base_objs['ags']
+        antes = changefeed.lote(p.pk).cursor
+        with django_capture_on_commit_callbacks(execute=True):
+            # updated_at é definido antes do commit: a transação "começou" há uma hora
+            ags[1].observacoes = 'demorou'
+            ags[1].save()
+            Agendamento.objects.filter(pk=ags[1].pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            durante = changefeed.lote(p.pk, antes)
+            assert durante.eventos == []
+        depois = changefeed.lote(p.pk, durante.cursor)
+        assert _ops(depois.eventos) == [('upsert', ags[1].pk)]
+        assert depois.eventos[0]['observacoes'] == 'demorou'
+
+    def test_caminhos_sem_signals(self, base_objs, django_capture_on_commit_callbacks):
+        p, ags = base_objs['professor'], base_objs['ags']
+        cursor = changefeed.lote(p.pk).cursor
+        with django_capture_on_commit_callbacks(execute=True):
+            transitions.alterar_status(ags[0], Agendamento.STATUS_CONCLUIDO)
+            transitions.alterar_status_em_lote(Agendamento.objects.filter(pk=ags[1].pk), Agendamento.STATUS_CANCELADO)
+            criados, _ = scheduling.agendar_em_lote([Agendamento(
+                aluno=ags[0].aluno, conteudo=ags[0].conteudo, professor=p, inicio=ags[0].inicio + timedelta(days=7),
+            )])
+        eventos = changefeed.lote(p.pk, cursor).eventos
+        assert _ops(eventos) == [('upsert', ags[0].pk), ('upsert', ags[1].pk), ('upsert', criados[0].pk)]
+        assert [e['status'] for e in eventos] == ['CONCLUIDO', 'CANCELADO', 'AGENDADO']
+
+    def test_custo_nao_depende_da_tabela(self, base_objs):
+        p = base_objs['professor']
+        cursor = changefeed.lote(p.pk).cursor
+        c = conteudo.Conteudo.objects.get()
+        alunos = [aluno.Aluno.objects.create(nome=f'Extra{i}', serie='1', turno='Manhã') for i in range(30)]
+        inicio = timezone.now() + timedelta(days=10)
+        Agendamento.objects.bulk_create(
+            Agendamento(aluno=a, conteudo=c, professor=base_objs['outro'], inicio=inicio) for a in alunos
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            assert changefeed.lote(p.pk, cursor).eventos == []
+        assert len(ctx.captured_queries) == 1
+        assert all('LIMIT' in q['sql'] for q in ctx.captured_queries)
+
+    def test_endpoint_formatos_e_erros(self, client, base_objs, django_capture_on_commit_callbacks):
+        p, ags = base_objs['professor'], base_objs['ags']
+        url = reverse('agendamentos:feed')
+        client.force_login(p.user)
+
+        data = client.get(url).json()
+        assert [e['id'] for e in data['results']] == [ag.pk for ag in ags] and data['has_more'] is False
+
+        excluido_pk = ags[0].pk
+        with django_capture_on_commit_callbacks(execute=True):
+            ags[0].delete()
+        resposta = client.get(url, {'cursor': data['cursor'], 'formato': 'ndjson'})
+        assert resposta['Content-Type'] == 'application/x-ndjson'
+        linhas = [json.loads(linha) for linha in resposta.content.decode().splitlines()]
+        assert linhas[0] == {'op': 'delete', 'id': excluido_pk} and 'cursor' in linhas[-1]
+
+        assert client.get(url, {'cursor': 'lixo'}).status_code == 400
+        assert client.get(url, {'limite': '0'}).status_code == 400
+        antigo = changefeed.codificar_cursor(changefeed.Cursor(
+            timezone.now() - changefeed.RETENCAO - timedelta(days=1), 0, None,
+        ))
+        assert client.get(url, {'cursor': antigo}).status_code == 410
+        agora = timezone.now().isoformat()
+        formato_anterior = base64.urlsafe_b64encode(f'{agora}|{agora}|0|0'.encode()).decode()
+        assert client.get(url, {'cursor': formato_anterior}).status_code == 410
+
+        # long-poll sem mudanças: devolve vazio com o cursor renovado
+        data = client.get(url, {'cursor': linhas[-1]['cursor'], 'esperar': '0.05'}).json()
+        assert data['results'] == [] and data['cursor']
+
+        client.force_login(User.objects.create_user(username='sem_papel', password='pass'))
+        assert client.get(url).status_code == 403
+        coord = User.objects.create_user(username='coord', password='pass')
+        coord.groups.add(Group.objects.get(name='Coordenação'))
+        client.force_login(coord)
+        assert len(client.get(url).json()['results']) == 3
+
+    def test_server_sent_events(self, client, base_objs, monkeypatch):
+        monkeypatch.setattr(changefeed, 'DURACAO_SSE', 0)
+        client.force_login(base_objs['professor'].user)
+        resposta = client.get(reverse('agendamentos:feed_eventos'))
+        assert resposta['Content-Type'] == 'text/event-stream'
+        corpo = _ler(resposta)
+        evento = corpo.split('\n\n')[1]
+        cursor = evento.split('\n')[0].removeprefix('id: ')
+        dados = json.loads(evento.split('\n')[2].removeprefix('data: '))
+        assert len(dados['results']) == 3
+
+        resposta = client.get(reverse('agendamentos:feed_eventos'), HTTP_LAST_EVENT_ID=cursor)
+        assert 'event: mudancas' not in _ler(resposta)
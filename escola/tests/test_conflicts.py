@@ -0,0 +1,73 @@
+"""Testes do serviço de detecção de conflitos.
+Cenários:
+ - professor com dois atendimentos no mesmo horário -> ValidationError
+ - todos os agendamentos em conflito são reportados
+ - agendamento anterior mais longo que o novo também conflita
+ - agendamentos cancelados não ocupam horário
+ - lote verificado contra o banco e entre os próprios itens, em uma query
+"""
+import pytest
+from datetime import datetime, timedelta
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from escola import conflicts
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+@pytest.mark.django_db
+class TestConflicts:
+
+    @pytest.fixture
+    def base_objs(self):
+        a1 = aluno.Aluno.objects.create(nome='Aluno 1')
+        a2 = aluno.Aluno.objects.create(nome='Aluno 2')
+        c = conteudo.Conteudo.objects.create(nome='Conteudo', duracao_minutos=60, descricao='desc')
+        p1 = professor.Professor.objects.create(nome='Professor 1')
+        p2 = professor.Professor.objects.create(nome='Professor 2')
+        inicio = timezone.make_aware(datetime(2025, 5, 5, 14, 0))
+        return a1, a2, c, p1, p2, inicio
+
+    def test_professor_ocupado(self, base_objs):
+        a1, a2, c, p1, _, inicio = base_objs
+        agendamento.Agendamento.objects.create(aluno=a1, conteudo=c, professor=p1, inicio=inicio)
+        novo = agendamento.Agendamento(aluno=a2, conteudo=c, professor=p1, inicio=inicio + timedelta(minutes=15))
+        with pytest.raises(ValidationError) as exc:
+            novo.full_clean()
+        assert 'Este professor já possui um atendimento' in str(exc.value)
+
+    def test_reporta_todos_os_conflitos(self, base_objs):
+        a1, a2, c, p1, p2, inicio = base_objs
+        agendamento.Agendamento.objects.create(aluno=a1, conteudo=c, professor=p1, inicio=inicio)
+        agendamento.Agendamento.objects.create(aluno=a2, conteudo=c, professor=p2, inicio=inicio + timedelta(minutes=30))
+        novo = agendamento.Agendamento(aluno=a1, conteudo=c, professor=p2, inicio=inicio + timedelta(minutes=20))
+        encontrados = conflicts.conflitos_de(novo)
+        assert sorted(cf.tipo for cf in encontrados) == ['aluno', 'professor']
+        with pytest.raises(ValidationError) as exc:
+            novo.full_clean()
+        assert len(exc.value.messages) == 2
+
+    def test_agendamento_anterior_longo(self, base_objs):
+        a1, _, c, p1, p2, inicio = base_objs
+        agendamento.Agendamento.objects.create(aluno=a1, conteudo=c, professor=p1, inicio=inicio, duracao_minutos=180)
+        novo = agendamento.Agendamento(aluno=a1, conteudo=c, professor=p2, inicio=inicio + timedelta(hours=2), duracao_minutos=30)
+        assert [cf.tipo for cf in conflicts.conflitos_de(novo)] == ['aluno']
+
+    def test_cancelado_nao_ocupa(self, base_objs):
+        a1, _, c, p1, _, inicio = base_objs
+        agendamento.Agendamento.objects.create(aluno=a1, conteudo=c, professor=p1, inicio=inicio, status='CANCELADO')
+        novo = agendamento.Agendamento.objects.create(aluno=a1, conteudo=c, professor=p1, inicio=inicio)
+        assert novo.pk is not None
+
+    def test_lote_em_uma_query(self, base_objs, django_assert_num_queries):
+        a1, a2, c, p1, p2, inicio = base_objs
+        agendamento.Agendamento.objects.create(aluno=a1, conteudo=c, professor=p1, inicio=inicio)
+        fim = inicio + timedelta(hours=1)
+        candidatos = [
+            conflicts.Ocupacao(inicio, fim, None, a1.pk, p2.pk),
+            conflicts.Ocupacao(inicio, fim, None, a2.pk, p2.pk),
+            conflicts.Ocupacao(inicio + timedelta(minutes=30), fim, None, a2.pk, p1.pk),
+            conflicts.Ocupacao(fim, fim + timedelta(hours=1), None, a1.pk, p1.pk),
+        ]
+        with django_assert_num_queries(1):
+            resultado = conflicts.verificar_lote(candidatos)
+        assert [[cf.tipo for cf in r] for r in resultado] == [['aluno'], [], ['aluno', 'professor'], []]
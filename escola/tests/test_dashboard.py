@@ -0,0 +1,165 @@
+"""Testes do cache dos painéis da home (escola.dashboard).
+Cenários:
+ - segunda visita sem queries de agendamentos e com 304 para If-None-Match
+ - mudança de um agendamento re-renderiza só a linha dele
+ - mudar agendamento de outro professor não invalida o painel do professor
+ - nome de aluno e mudança de status (serviço de transições) invalidam o painel
+ - linhas em cache sem token CSRF e <select> só com as transições permitidas
+ - versões trocadas só no commit (ninguém guarda painel antigo sob a versão nova)
+ - ETag do painel sai do conteúdo: painel refeito sob a mesma versão (troca que não chegou
+   ao processo) não é confirmado por 304
+ - cache compartilhado entre processos em produção e no perfil ASGI
+"""
+import os
+import subprocess
+import sys
+import pytest
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.signals import template_rendered
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import dashboard, transitions, versoes
+from escola.models import aluno, conteudo, professor, agendamento
+
+Agendamento = agendamento.Agendamento
+
+
+def _tabela(resposta):
+    return resposta.content.decode().split('<tbody>')[1].split('</tbody>')[0]
+
+
+def _consultas_de_agendamentos(ctx):
+    return [q['sql'] for q in ctx.captured_queries if 'FROM "escola_agendamento"' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestDashboard:
+
+    @pytest.fixture
+    def base_objs(self):
+        alunos = [aluno.Aluno.objects.create(nome=f'A{i}', serie='1', turno='Manhã') for i in range(3)]
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=60)
+        u = User.objects.create_user(username='prof', password='pass')
+        p = professor.Professor.objects.create(nome='P', user=u)
+        outro = professor.Professor.objects.create(nome='Outro')
+        amanha = timezone.now() + timedelta(days=1)
+        ags = [
+            Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=amanha + timedelta(hours=2 * i))
+            for i, a in enumerate(alunos)
+        ]
+        alheio = Agendamento.objects.create(aluno=alunos[0], conteudo=c, professor=outro, inicio=amanha + timedelta(days=1))
+        return {'alunos': alunos, 'professor': p, 'ags': ags, 'alheio': alheio}
+
+    @pytest.fixture
+    def coordenacao(self, client):
+        u = User.objects.create_user(username='coord', password='pass')
+        u.groups.add(Group.objects.get(name='Coordenação'))
+        client.force_login(u)
+        return u
+
+    def test_segunda_visita_e_304(self, client, base_objs, coordenacao, django_capture_on_commit_callbacks):
+        url = reverse('agendamentos:home')
+        primeira = client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            segunda = client.get(url)
+        assert not _consultas_de_agendamentos(ctx)
+        assert _tabela(segunda) == _tabela(primeira)
+        assert client.get(url, HTTP_IF_NONE_MATCH=segunda['ETag']).status_code == 304
+
+        with django_capture_on_commit_callbacks(execute=True):
+            transitions.alterar_status(
+                Agendamento.objects.select_related('aluno', 'conteudo', 'professor').get(pk=base_objs['ags'][0].pk),
+                Agendamento.STATUS_CANCELADO,
+            )
+        resposta = client.get(url, HTTP_IF_NONE_MATCH=segunda['ETag'])
+        assert resposta.status_code == 200 and 'Cancelado' in resposta.content.decode()
+
+    def test_so_a_linha_alterada_e_renderizada(self, client, base_objs, coordenacao, django_capture_on_commit_callbacks):
+        url = reverse('agendamentos:home')
+        client.get(url)
+        ag = base_objs['ags'][1]
+        ag.observacoes = 'mudou'
+        with django_capture_on_commit_callbacks(execute=True):
+            ag.save()
+
+        linhas = []
+
+        def contar(sender, template, context, **kwargs):
+            if template.name == 'home/_linha_coordenacao.html':
+                linhas.append(context['ag'].pk)
+
+        template_rendered.connect(contar)
+        try:
+            client.get(url)
+        finally:
+            template_rendered.disconnect(contar)
+        assert linhas == [ag.pk]
+
+    def test_painel_do_professor(self, client, base_objs, django_capture_on_commit_callbacks):
+        client.force_login(base_objs['professor'].user)
+        url = reverse('agendamentos:home')
+        client.get(url)
+
+        alheio = base_objs['alheio']
+        alheio.observacoes = 'de outro professor'
+        with django_capture_on_commit_callbacks(execute=True):
+            alheio.save()
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(url)
+        assert not _consultas_de_agendamentos(ctx)
+
+        a = base_objs['alunos'][2]
+        a.nome = 'Novo Nome'
+        with django_capture_on_commit_callbacks(execute=True):
+            a.save()
+        resposta = client.get(url)
+        assert 'Novo Nome' in _tabela(resposta)
+
+        # linhas em cache não carregam token; a página injeta o seu ao enviar
+        assert 'csrfmiddlewaretoken' not in _tabela(resposta)
+        assert 'csrfmiddlewaretoken' in resposta.content.decode()
+
+    def test_opcoes_de_status(self, client, base_objs):
+        ag = base_objs['ags'][0]
+        Agendamento.objects.filter(pk=ag.pk).update(status=Agendamento.STATUS_CANCELADO)
+        ag.refresh_from_db()
+        assert [valor for valor, _ in dashboard.opcoes_de_status(ag)] == ['AGENDADO', 'CANCELADO']
+
+    def test_versao_trocada_so_no_commit(self, base_objs, django_capture_on_commit_callbacks):
+        antes = (dashboard.versao_cadastros(), versoes.numero(dashboard.AGENDAMENTOS_KEY))
+        with django_capture_on_commit_callbacks(execute=True):
+            ag = base_objs['ags'][0]
+            ag.observacoes = 'mudou'
+            ag.save()
+            base_objs['alunos'][0].save()
+            transitions.alterar_status_em_lote(Agendamento.objects.filter(pk=ag.pk), Agendamento.STATUS_CONCLUIDO)
+            assert (dashboard.versao_cadastros(), versoes.numero(dashboard.AGENDAMENTOS_KEY)) == antes
+        depois = (dashboard.versao_cadastros(), versoes.numero(dashboard.AGENDAMENTOS_KEY))
+        assert depois[0] != antes[0] and depois[1] > antes[1]
+
+
+def test_etag_do_conteudo(monkeypatch):
+    monkeypatch.setattr(dashboard, 'PAINEL_CACHE_TIMEOUT', 0)  # vence na hora
+    antes = dashboard.painel('coordenacao', {}, lambda: '<tr>antiga</tr>')
+    depois = dashboard.painel('coordenacao', {}, lambda: '<tr>nova</tr>')
+    assert depois.html == '<tr>nova</tr>' and depois.etag != antes.etag
+    assert dashboard.PAINEL_CACHE_TIMEOUT <= 5 * 60 and dashboard.LINHA_CACHE_TIMEOUT <= 5 * 60
+
+
+@pytest.mark.parametrize('env, backend', [
+    ({}, 'LocMemCache'),
+    ({'ESCOLA_CACHE_COMPARTILHADO': '1'}, 'DatabaseCache'),
+    ({'RENDER': '1'}, 'DatabaseCache'),
+    ({'REDIS_URL': 'redis://localhost:6379/0'}, 'RedisCache'),
+])
+def test_cache_compartilhado(env, backend):
+    base = {k: v for k, v in os.environ.items() if k not in ('ESCOLA_CACHE_COMPARTILHADO', 'RENDER', 'REDIS_URL')}
+    saida = subprocess.run(
+        [sys.executable, '-c', 'from core import settings; print(settings.CACHES["default"]["BACKEND"])'],
+        cwd=settings.BASE_DIR, env={**base, **env}, capture_output=True, text=True, check=True,
+    ).stdout
+    assert saida.strip().endswith(backend)
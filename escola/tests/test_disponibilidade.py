@@ -0,0 +1,113 @@
+"""Testes da busca de horários livres (escola.availability).
+Cenários:
+ - união de intervalos ocupados
+ - horários pulam ocupações do professor e do aluno, respeitam expediente, grade e fim de semana
+ - agendamentos cancelados não ocupam
+ - uma query por pessoa, independente do tamanho da janela
+ - janela cortada em JANELA_MAXIMA
+ - endpoint JSON e professor restrito à própria agenda
+"""
+import pytest
+from datetime import datetime, time, timedelta
+from django.contrib.auth.models import Group, Permission, User
+from django.urls import reverse
+from django.utils import timezone
+from escola import availability
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+def _local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+@pytest.mark.django_db
+class TestDisponibilidade:
+
+    @pytest.fixture
+    def base_objs(self):
+        return {
+            'aluno': aluno.Aluno.objects.create(nome='Aluno D', serie='1', turno='M'),
+            'outro_aluno': aluno.Aluno.objects.create(nome='Outro', serie='1', turno='M'),
+            'conteudo': conteudo.Conteudo.objects.create(nome='Física', descricao='d', duracao_minutos=60),
+            'professor': professor.Professor.objects.create(nome='Prof D'),
+            'outro_prof': professor.Professor.objects.create(nome='Prof E'),
+        }
+
+    def _agendar(self, base_objs, inicio, aluno_obj=None, prof=None, **kwargs):
+        return agendamento.Agendamento.objects.create(
+            aluno=aluno_obj or base_objs['aluno'], conteudo=base_objs['conteudo'],
+            professor=prof or base_objs['professor'], inicio=inicio, **kwargs,
+        )
+
+    def test_unir(self):
+        h = lambda n: _local(2030, 1, 7, n)
+        assert availability.unir([(h(8), h(9)), (h(12), h(13))], [(h(9), h(10)), (h(12), h(12))]) == [(h(8), h(10)), (h(12), h(13))]
+
+    def test_horarios_livres(self, base_objs):
+        # segunda 2030-01-07: professor ocupado 08:00-09:00 (com outro aluno), aluno ocupado 09:30-10:30
+        self._agendar(base_objs, _local(2030, 1, 7, 8, 0), aluno_obj=base_objs['outro_aluno'])
+        self._agendar(base_objs, _local(2030, 1, 7, 9, 30), prof=base_objs['outro_prof'])
+        cancelado = self._agendar(base_objs, _local(2030, 1, 7, 11, 0))
+        cancelado.status = agendamento.Agendamento.STATUS_CANCELADO
+        cancelado.save()
+
+        livres = availability.horarios_livres(
+            base_objs['professor'].pk, base_objs['aluno'].pk, timedelta(minutes=60),
+            _local(2030, 1, 7, 7, 10), _local(2030, 1, 14), quantidade=4,
+            hora_inicial=time(7, 0), hora_final=time(12, 0),
+        )
+        assert [(ini.hour, ini.minute) for ini, _ in livres] == [(10, 30), (11, 0)] + [(7, 0), (7, 30)]
+        assert livres[2][0].date() == datetime(2030, 1, 8).date()
+
+    def test_fim_de_semana(self, base_objs):
+        livres = availability.horarios_livres(
+            base_objs['professor'].pk, base_objs['aluno'].pk, timedelta(minutes=60),
+            _local(2030, 1, 11, 17, 0), _local(2030, 1, 20), quantidade=2,
+        )
+        assert [ini for ini, _ in livres] == [_local(2030, 1, 11, 17, 0), _local(2030, 1, 14, 7, 0)]
+
+    def test_uma_query_por_pessoa(self, base_objs, django_assert_num_queries):
+        inicio = _local(2030, 2, 4, 7, 0)
+        for dia in range(20):
+            self._agendar(base_objs, inicio + timedelta(days=dia), aluno_obj=base_objs['outro_aluno'])
+            self._agendar(base_objs, inicio + timedelta(days=dia, hours=2), prof=base_objs['outro_prof'])
+        with django_assert_num_queries(2):
+            livres = availability.horarios_livres(
+                base_objs['professor'].pk, base_objs['aluno'].pk, timedelta(minutes=60),
+                inicio, inicio + timedelta(days=31), quantidade=50,
+            )
+        assert len(livres) == 50
+        assert all(ini.minute in (0, 30) for ini, _ in livres)
+
+    def test_janela_maxima(self, base_objs):
+        inicio = _local(2030, 1, 7, 7, 0)
+        livres = availability.horarios_livres(
+            base_objs['professor'].pk, base_objs['aluno'].pk, timedelta(minutes=60),
+            inicio, inicio + timedelta(days=365), quantidade=10_000, passo=timedelta(hours=12),
+        )
+        assert livres and livres[-1][1] <= inicio + availability.JANELA_MAXIMA
+
+    def test_endpoint(self, client, base_objs):
+        u = User.objects.create_user(username='coord', password='pass')
+        u.user_permissions.add(Permission.objects.get(codename='view_agendamento'))
+        client.force_login(u)
+        params = {
+            'professor': base_objs['professor'].pk, 'aluno': base_objs['aluno'].pk,
+            'conteudo': base_objs['conteudo'].pk, 'data_inicial': '2030-01-07', 'quantidade': 3,
+        }
+        data = client.get(reverse('agendamentos:disponibilidade'), params).json()
+        assert data['duracao_minutos'] == 60
+        assert [h['inicio'] for h in data['horarios']] == [
+            '2030-01-07T07:00:00-03:00', '2030-01-07T07:30:00-03:00', '2030-01-07T08:00:00-03:00',
+        ]
+        assert client.get(reverse('agendamentos:disponibilidade'), {'aluno': 1}).status_code == 400
+
+    def test_professor_so_a_propria_agenda(self, client, base_objs):
+        u = User.objects.create_user(username='prof', password='pass')
+        u.groups.add(Group.objects.get_or_create(name='Professor')[0])
+        u.save()
+        client.force_login(u)
+        params = {'professor': base_objs['professor'].pk, 'aluno': base_objs['aluno'].pk, 'conteudo': base_objs['conteudo'].pk}
+        assert client.get(reverse('agendamentos:disponibilidade'), params).status_code == 403
+        params['professor'] = u.professor_profile.pk
+        assert client.get(reverse('agendamentos:disponibilidade'), params).status_code == 200
@@ -0,0 +1,117 @@
+"""Testes da importação em lote de alunos (escola.roster_import).
+Cenários:
+ - cria novos, atualiza telefone/ativo dos existentes (nome sem diferenciar maiúsculas/espaços) e conta inalterados
+ - CSV com ';' e BOM, e XLSX
+ - linha inválida ou repetida: nada é gravado
+ - desativação dos ausentes, simulada e aplicada, com invalidação da lista de alunos
+ - 10 mil linhas em número limitado de queries
+ - página de importação (permissão e simulação) e comando import_alunos
+"""
+import io
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from openpyxl import Workbook
+from escola import roster, roster_import
+from escola.models import aluno
+
+
+def _csv(texto):
+    return io.BytesIO(texto.encode('utf-8'))
+
+
+@pytest.mark.django_db
+class TestImportarAlunos:
+
+    @pytest.fixture
+    def existentes(self):
+        return {
+            'ana': aluno.Aluno.objects.create(nome='Ana Souza', serie='1', turno='Manhã', telefone='111'),
+            'beto': aluno.Aluno.objects.create(nome='Beto Lima', serie='2', turno='Tarde', is_active=False),
+            'caio': aluno.Aluno.objects.create(nome='Caio Reis', serie='1', turno='Manhã'),
+        }
+
+    def test_cria_atualiza_e_inalterados(self, existentes):
+        arquivo = _csv(
+            'nome,serie,turno,telefone\n'
+            'ana  souza,1,Manhã,\n'          # mesmo aluno, telefone em branco não apaga
+            'Beto Lima,2,Tarde,222\n'        # reativado e com telefone
+            'Caio Reis,1,Manhã,\n'
+            'Dora Nunes,3,Tarde,333\n'
+        )
+        resultado = roster_import.importar(arquivo, 'alunos.csv')
+        assert resultado.resumo() == {'criados': 1, 'atualizados': 2, 'desativados': 0, 'inalterados': 1, 'erros': 0, 'aplicado': True}
+
+        existentes['ana'].refresh_from_db()
+        existentes['beto'].refresh_from_db()
+        assert (existentes['ana'].nome, existentes['ana'].telefone) == ('ana souza', '111')
+        assert (existentes['beto'].is_active, existentes['beto'].telefone) == (True, '222')
+        assert aluno.Aluno.objects.get(nome='Dora Nunes').telefone == '333'
+        assert aluno.Aluno.objects.count() == 4
+
+    def test_csv_ponto_e_virgula_e_xlsx(self, existentes):
+        resultado = roster_import.importar(io.BytesIO('﻿Nome;Série;Turno;Ativo\nEva;4;Manhã;não\n'.encode()), 'a.csv')
+        assert resultado.aplicado and not aluno.Aluno.objects.get(nome='Eva').is_active
+
+        planilha = Workbook()
+        planilha.active.append(['nome', 'serie', 'turno'])
+        planilha.active.append(['Fabio', 5, 'Tarde'])
+        conteudo = io.BytesIO()
+        planilha.save(conteudo)
+        conteudo.seek(0)
+        roster_import.importar(conteudo, 'a.xlsx')
+        assert aluno.Aluno.objects.get(nome='Fabio').serie == '5'
+
+    def test_erros_nao_gravam_nada(self, existentes):
+        arquivo = _csv('nome,serie,turno,ativo\nNovo,1,Manhã,\nNovo,1,Manhã,\n,2,Tarde,\nOutro,1,Manhã,talvez\n')
+        resultado = roster_import.importar(arquivo, 'a.csv', desativar_ausentes=True)
+        assert [numero for numero, _ in resultado.erros] == [3, 4, 5]
+        assert not resultado.aplicado
+        assert aluno.Aluno.objects.count() == 3
+        assert aluno.Aluno.objects.filter(is_active=True).count() == 2
+
+        with pytest.raises(roster_import.ErroImportacao):
+            roster_import.importar(_csv('serie,turno\n1,Manhã\n'), 'a.csv')
+
+    def test_desativar_ausentes(self, existentes, django_capture_on_commit_callbacks):
+        arquivo = 'nome,serie,turno\nAna Souza,1,Manhã\n'
+        simulado = roster_import.importar(_csv(arquivo), 'a.csv', desativar_ausentes=True, simular=True)
+        assert [item['nome'] for item in simulado.desativados] == ['Caio Reis']
+        assert aluno.Aluno.objects.filter(is_active=True).count() == 2
+
+        versao = roster.versao()
+        with django_capture_on_commit_callbacks(execute=True):
+            roster_import.importar(_csv(arquivo), 'a.csv', desativar_ausentes=True)
+        assert list(aluno.Aluno.objects.filter(is_active=True).values_list('nome', flat=True)) == ['Ana Souza']
+        assert roster.versao() > versao
+
+    def test_dez_mil_linhas(self, existentes, django_assert_max_num_queries):
+        linhas = ''.join(f'Aluno {i},{i % 5 + 1},{("Manhã", "Tarde")[i % 2]},\n' for i in range(10_000))
+        # no SQLite o limite de 999 parâmetros quebra cada lote de 1000 em ~5 INSERTs
+        with django_assert_max_num_queries(80):
+            resultado = roster_import.importar(_csv('nome,serie,turno,telefone\n' + linhas), 'a.csv', desativar_ausentes=True)
+        assert resultado.resumo()['criados'] == 10_000
+        assert aluno.Aluno.objects.filter(is_active=True).count() == 10_000
+
+    def test_pagina_e_comando(self, client, existentes, tmp_path):
+        u = User.objects.create_user(username='coord', password='pass')
+        client.force_login(u)
+        url = reverse('alunos:alunos_importar')
+        assert client.get(url).status_code == 403
+
+        u.user_permissions.add(*Permission.objects.filter(codename__in=['add_aluno', 'change_aluno']))
+        arquivo = SimpleUploadedFile('a.csv', 'nome,serie,turno\nGabi,1,Manhã\n'.encode())
+        resposta = client.post(url, {'arquivo': arquivo, 'simular': 'on'})
+        assert resposta.status_code == 200
+        assert resposta.context['resultado'].resumo()['criados'] == 1
+        assert not aluno.Aluno.objects.filter(nome='Gabi').exists()
+
+        caminho = tmp_path / 'alunos.csv'
+        caminho.write_text('nome,serie,turno\nGabi,1,Manhã\n', encoding='utf-8')
+        out = io.StringIO()
+        call_command('import_alunos', str(caminho), stdout=out)
+        assert '+ linha 2: Gabi' in out.getvalue()
+        assert aluno.Aluno.objects.filter(nome='Gabi').exists()
+
@@ -0,0 +1,101 @@
+"""Testes da instrumentação por requisição (escola.instrumentation / InstrumentacaoMiddleware).
+Cenários:
+ - fingerprint ignora literais e tamanho de listas IN
+ - queries repetidas, SQL disparado de dentro do template e tempo de template
+ - middleware amostra conforme a taxa e registra a view
+ - amostras de outros processos lidas dos arquivos
+ - endpoint só para staff e comando slow_requests
+"""
+import json
+import os
+import pytest
+from io import StringIO
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.urls import reverse
+from escola import instrumentation
+from escola.models import aluno
+
+
+@pytest.fixture
+def amostrar_tudo(settings):
+    settings.ESCOLA_INSTRUMENTACAO_TAXA = 1.0
+
+
+def test_fingerprint():
+    a = instrumentation.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND nome = 'x' LIMIT 21")
+    b = instrumentation.fingerprint("SELECT * FROM t WHERE id IN (%s) AND nome = 'y''z' LIMIT 5")
+    assert a == b == "SELECT * FROM t WHERE id IN (...) AND nome = ? LIMIT ?"
+
+
+@pytest.mark.django_db
+class TestInstrumentacao:
+
+    @pytest.fixture
+    def alunos(self):
+        return [aluno.Aluno.objects.create(nome=f'Aluno {i}', serie='1', turno='Manhã') for i in range(3)]
+
+    def test_repetidas_e_sql_no_template(self, amostrar_tudo, alunos):
+        instrumentation.instrumentar_templates()  # feito pelo middleware ao ser carregado
+        medicao = instrumentation.iniciar()
+        template = engines['django'].from_string('{% for a in alunos %}{{ a.nome }}{% endfor %}')
+        with connection.execute_wrapper(medicao):
+            for a in alunos:
+                aluno.Aluno.objects.get(pk=a.pk)
+            template.render({'alunos': aluno.Aluno.objects.all()})
+        instrumentation.finalizar(medicao, 'teste', 'GET', 200)
+
+        [amostra] = instrumentation.amostras()
+        assert amostra['sql_count'] == 4
+        assert amostra['template_sql_count'] == 1
+        assert amostra['template_ms'] > 0
+        [[sql, vezes]] = amostra['duplicadas']
+        assert vezes == 3 and 'escola_aluno' in sql
+        assert instrumentation.piores()[0]['duplicadas'] == 2
+
+    def test_middleware(self, client, amostrar_tudo, settings):
+        u = User.objects.create_user(username='coord', password='pass')
+        u.groups.add(Group.objects.get(name='Coordenação'))
+        client.force_login(u)
+        client.get(reverse('agendamentos:home'))
+        [amostra] = instrumentation.amostras()
+        assert amostra['view'] == 'agendamentos:home'
+        assert amostra['status'] == 200
+        assert amostra['sql_count'] > 0 and amostra['template_ms'] > 0
+        assert amostra['total_ms'] >= amostra['sql_ms'] + amostra['template_ms']
+
+        settings.ESCOLA_INSTRUMENTACAO_TAXA = 0
+        client.get(reverse('agendamentos:home'))
+        assert len(instrumentation.amostras()) == 1
+
+    def test_amostras_de_outros_processos(self, settings):
+        os.makedirs(settings.ESCOLA_INSTRUMENTACAO_DIR)
+        outro = {'view': 'x', 'metodo': 'GET', 'status': 200, 'em': 0, 'total_ms': 9, 'sql_count': 1, 'sql_ms': 1,
+                 'template_ms': 1, 'template_sql_count': 0, 'python_ms': 7, 'duplicadas': []}
+        with open(os.path.join(settings.ESCOLA_INSTRUMENTACAO_DIR, '99999999.json'), 'w') as arquivo:
+            json.dump([outro], arquivo)
+        instrumentation.registrar({**outro, 'view': 'y'})
+        instrumentation.gravar()
+        assert sorted(a['view'] for a in instrumentation.amostras()) == ['x', 'y']
+        instrumentation.limpar()
+        assert instrumentation.amostras() == []
+
+    def test_endpoint_e_comando(self, client, amostrar_tudo, alunos):
+        u = User.objects.create_user(username='u', password='pass')
+        client.force_login(u)
+        assert client.get(reverse('instrumentacao:piores')).status_code == 403
+
+        u.is_staff = True
+        u.save()
+        client.get(reverse('alunos:alunos_json'), {'serie': '1', 'turno': 'Manhã'})
+        data = client.get(reverse('instrumentacao:piores'), {'ordenar': 'sql_count', 'recentes': 5}).json()
+        assert 'alunos:alunos_json' in [linha['view'] for linha in data['piores']]
+        assert data['recentes']
+        assert client.get(reverse('instrumentacao:piores'), {'ordenar': 'x'}).status_code == 400
+
+        out = StringIO()
+        call_command('slow_requests', limpar=True, stdout=out)
+        assert 'alunos:alunos_json' in out.getvalue()
+        assert instrumentation.amostras() == []
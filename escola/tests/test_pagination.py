@@ -0,0 +1,89 @@
+"""Testes da paginação por cursor (keyset).
+Cenários:
+ - percorrer todas as páginas para frente e para trás, com empates em `inicio`
+ - lista de agendamentos sem COUNT(*) e endpoint JSON com total opcional
+ - cursor inválido volta à primeira página
+ - por_pagina não numérico usa o tamanho padrão em vez de erro 500
+"""
+import pytest
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola.pagination import paginar_keyset
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+@pytest.mark.django_db
+class TestPaginacaoKeyset:
+
+    @pytest.fixture
+    def agendamentos(self):
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=30)
+        p = professor.Professor.objects.create(nome='P')
+        alunos = aluno.Aluno.objects.bulk_create([aluno.Aluno(nome=f'A{i}') for i in range(3)])
+        base = timezone.make_aware(datetime(2030, 1, 1, 8, 0))
+        # três agendamentos por horário para forçar empates em `inicio`
+        return agendamento.Agendamento.objects.bulk_create([
+            agendamento.Agendamento(aluno=alunos[i % 3], conteudo=c, professor=p, inicio=base + timedelta(hours=i // 3))
+            for i in range(47)
+        ])
+
+    def test_percorre_todas_as_paginas(self, agendamentos):
+        qs = agendamento.Agendamento.objects.all()
+        esperado = [ag.pk for ag in qs.order_by('-inicio', '-id')]
+
+        vistos, paginas, cursor = [], [], None
+        while True:
+            pagina = paginar_keyset(qs, cursor=cursor, por_pagina=10)
+            paginas.append([ag.pk for ag in pagina])
+            vistos += paginas[-1]
+            if not pagina.has_next:
+                break
+            cursor = pagina.next_cursor
+        assert vistos == esperado
+        assert len(paginas) == 5
+
+        for anterior in reversed(paginas[:-1]):
+            pagina = paginar_keyset(qs, cursor=pagina.previous_cursor, por_pagina=10)
+            assert [ag.pk for ag in pagina] == anterior
+        assert not pagina.has_previous
+
+    def test_ordem_crescente(self, agendamentos):
+        qs = agendamento.Agendamento.objects.all()
+        primeira = paginar_keyset(qs, por_pagina=20, decrescente=False)
+        segunda = paginar_keyset(qs, cursor=primeira.next_cursor, por_pagina=20, decrescente=False)
+        assert [ag.pk for ag in primeira] + [ag.pk for ag in segunda] == [ag.pk for ag in qs.order_by('inicio', 'id')[:40]]
+
+    def test_lista_sem_count(self, client, agendamentos):
+        su = User.objects.create_superuser(username='su', password='pass')
+        client.force_login(su)
+        resp = client.get(reverse('agendamentos:list'))
+        cursor = resp.context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse('agendamentos:list'), {'cursor': cursor})
+        assert resp.status_code == 200
+        assert len(resp.context['agendamentos']) == 20
+        assert not any('COUNT(' in q['sql'] for q in ctx.captured_queries)
+
+    def test_endpoint_json(self, client, agendamentos):
+        su = User.objects.create_superuser(username='su', password='pass')
+        client.force_login(su)
+        data = client.get(reverse('agendamentos:json'), {'por_pagina': 5, 'contar': '1'}).json()
+        assert len(data['results']) == 5 and data['count'] == 47 and data['previous'] is None
+        seguinte = client.get(reverse('agendamentos:json'), {'por_pagina': 5, 'cursor': data['next']}).json()
+        assert seguinte['count'] is None
+        assert {r['id'] for r in seguinte['results']}.isdisjoint(r['id'] for r in data['results'])
+
+        invalido = client.get(reverse('agendamentos:json'), {'por_pagina': 5, 'cursor': 'xx'}).json()
+        assert invalido['results'] == data['results']
+
+    def test_por_pagina_invalido_usa_o_padrao(self, client, agendamentos):
+        client.force_login(User.objects.create_superuser(username='su', password='pass'))
+        data = client.get(reverse('agendamentos:json'), {'por_pagina': 'abc'}).json()
+        assert len(data['results']) == 20
+        assert len(client.get(reverse('agendamentos:json'), {'por_pagina': '0'}).json()['results']) == 1
+        assert client.get(reverse('agendamentos:list'), {'por_pagina': 'abc'}).status_code == 200
+        assert paginar_keyset(agendamento.Agendamento.objects.all(), por_pagina=None).object_list
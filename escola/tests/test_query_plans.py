@@ -0,0 +1,120 @@
+"""Regressão de planos de consulta (EXPLAIN) dos caminhos quentes.
+Cada cenário executa o fluxo real, captura as queries sobre tabelas escola_* e roda
+EXPLAIN em cada uma; o teste falha se alguma tabela for varrida por inteiro.
+No Postgres o seq scan é desabilitado na sessão, para que um Seq Scan só apareça
+quando não existe índice utilizável (com tabelas pequenas o planner o preferiria).
+Cenários:
+ - validação de conflitos (clean)
+ - concluídos por conteúdo em período curto (sem rollup)
+ - home da coordenação e do professor
+ - lista de agendamentos em página profunda (cursor)
+ - busca de alunos por série/turno (AJAX e formulário)
+"""
+import re
+import pytest
+from datetime import datetime, timedelta
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import reports
+from escola.conflicts import conflitos_de
+from escola.forms.agendamento_form import AgendamentoForm
+from escola.models import aluno, conteudo, professor, agendamento
+
+VARREDURA_SQLITE = re.compile(r'\bSCAN (escola_\w+)')
+VARREDURA_POSTGRES = re.compile(r'Seq Scan on (escola_\w+)')
+
+
+def _plano(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + sql)
+        else:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return '\n'.join(str(linha[-1]) for linha in cursor.fetchall())
+
+
+def _varreduras(ctx):
+    padrao = VARREDURA_POSTGRES if connection.vendor == 'postgresql' else VARREDURA_SQLITE
+    encontradas = []
+    for query in ctx.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT') or 'escola_' not in sql:
+            continue
+        plano = _plano(sql)
+        encontradas += [(tabela, sql, plano) for tabela in padrao.findall(plano)]
+    return encontradas
+
+
+@pytest.mark.django_db
+class TestPlanosDeConsulta:
+
+    @pytest.fixture
+    def base_objs(self):
+        c = conteudo.Conteudo.objects.create(nome='Matemática', descricao='d', duracao_minutos=60)
+        p = professor.Professor.objects.create(nome='Prof')
+        alunos = [aluno.Aluno.objects.create(nome=f'A{i}', serie='1', turno='M') for i in range(3)]
+        amanha = timezone.now() + timedelta(days=1)
+        ags = [
+            agendamento.Agendamento.objects.create(aluno=alunos[i % 3], conteudo=c, professor=p, inicio=amanha + timedelta(hours=2 * i))
+            for i in range(6)
+        ]
+        return {'conteudo': c, 'professor': p, 'alunos': alunos, 'agendamentos': ags}
+
+    def _logar(self, client, grupo):
+        u = User.objects.create_user(username=grupo, password='pass')
+        u.groups.add(Group.objects.get_or_create(name=grupo)[0])
+        u.save()
+        client.force_login(u)
+        return u
+
+    def _assert_sem_varredura(self, ctx):
+        assert ctx.captured_queries
+        varreduras = _varreduras(ctx)
+        assert not varreduras, '\n\n'.join(f'{t}:\n{sql}\n{plano}' for t, sql, plano in varreduras)
+
+    def test_conflitos(self, base_objs):
+        ag = agendamento.Agendamento(
+            aluno=base_objs['alunos'][0], conteudo=base_objs['conteudo'],
+            professor=base_objs['professor'], inicio=base_objs['agendamentos'][0].inicio,
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            assert conflitos_de(ag)
+        self._assert_sem_varredura(ctx)
+
+    def test_concluido_por_conteudo(self, base_objs):
+        inicio = timezone.make_aware(datetime(2025, 3, 1))
+        with CaptureQueriesContext(connection) as ctx:
+            reports.concluido_por_conteudo(agendamento.Agendamento.objects.all(), inicio, inicio + timedelta(days=7))
+        self._assert_sem_varredura(ctx)
+
+    def test_home_coordenacao(self, client, base_objs):
+        self._logar(client, 'Coordenação')
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(reverse('agendamentos:home')).status_code == 200
+        self._assert_sem_varredura(ctx)
+
+    def test_home_professor(self, client, base_objs):
+        u = self._logar(client, 'Professor')
+        agendamento.Agendamento.objects.filter(professor=base_objs['professor']).update(professor=u.professor_profile)
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(reverse('agendamentos:home')).status_code == 200
+        self._assert_sem_varredura(ctx)
+
+    def test_lista_com_cursor(self, client, base_objs):
+        client.force_login(User.objects.create_superuser(username='su', password='pass'))
+        cursor = client.get(reverse('agendamentos:list'), {'por_pagina': 2}).context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as ctx:
+            assert client.get(reverse('agendamentos:list'), {'por_pagina': 2, 'cursor': cursor}).status_code == 200
+        self._assert_sem_varredura(ctx)
+
+    def test_busca_de_alunos(self, client, base_objs):
+        self._logar(client, 'Coordenação')
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(reverse('alunos:ajax_load_alunos'), {'serie': '1', 'turno': 'M'})
+            client.get(reverse('alunos:alunos_json'), {'serie': '1', 'turno': 'M'})
+            list(AgendamentoForm(data={'serie': '1', 'turno': 'M'}).fields['aluno'].queryset)
+        self._assert_sem_varredura(ctx)
@@ -0,0 +1,84 @@
+"""Testes da exportação do relatório (gerada por ReportJob e baixada em streaming).
+Cenários:
+ - primeira chamada enfileira o job (202); com o job concluído, a mesma URL baixa o arquivo
+ - XLSX com as seis abas e uma linha por agendamento
+ - CSV só com os agendamentos, sem calcular as agregações
+ - ZIP com um CSV por aba
+ - formato inválido -> 400
+"""
+import csv
+import io
+import zipfile
+import pytest
+import openpyxl
+from datetime import datetime, timedelta
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+from django.utils import timezone
+from escola import jobs, reports
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+@pytest.mark.django_db
+class TestRelatorioExport:
+
+    @pytest.fixture(autouse=True)
+    def media(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    @pytest.fixture
+    def logged_client(self, client):
+        u = User.objects.create_user(username='exp', password='pass')
+        u.user_permissions.add(Permission.objects.get(codename='view_agendamento'))
+        client.force_login(u)
+        return client
+
+    @pytest.fixture
+    def agendamentos(self):
+        a = aluno.Aluno.objects.create(nome='Aluno Export', serie='1', turno='Manhã')
+        c = conteudo.Conteudo.objects.create(nome='Ciências', descricao='d', duracao_minutos=60)
+        p = professor.Professor.objects.create(nome='Carla')
+        base = timezone.make_aware(datetime(2025, 2, 3, 8, 0))
+        return [
+            agendamento.Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=base + timedelta(days=i))
+            for i in range(5)
+        ]
+
+    def _get(self, client, **params):
+        params = {'start': '2025-02-01', 'end': '2025-02-28', **params}
+        resp = client.get(reverse('relatorios:export_relatorio_excel'), params)
+        assert resp.status_code == 202
+        jobs.executar_job(resp.json()['job'])
+        resp = client.get(reverse('relatorios:export_relatorio_excel'), params)
+        assert resp.status_code == 200
+        assert resp.streaming
+        return resp, b''.join(resp.streaming_content)
+
+    def test_xlsx_com_todas_as_abas(self, logged_client, agendamentos):
+        resp, conteudo_xlsx = self._get(logged_client)
+        assert resp['Content-Disposition'].endswith('.xlsx"')
+        wb = openpyxl.load_workbook(io.BytesIO(conteudo_xlsx))
+        assert wb.sheetnames == ['Agendamentos', 'Resumo', 'Por Professor', 'Por Aluno', 'Por Conteúdo', 'Mensal']
+        linhas = list(wb['Agendamentos'].iter_rows(values_only=True))
+        assert linhas[0][:2] == ('id', 'inicio')
+        assert [linha[0] for linha in linhas[1:]] == [ag.pk for ag in agendamentos]
+        assert list(wb['Resumo'].iter_rows(values_only=True))[1][2] == 5
+
+    def test_csv_de_agendamentos(self, logged_client, agendamentos, monkeypatch):
+        monkeypatch.setattr(reports, 'gerar_relatorio', lambda *a, **kw: pytest.fail('CSV não usa as agregações'))
+        _, corpo = self._get(logged_client, formato='csv')
+        linhas = list(csv.reader(io.StringIO(corpo.decode('utf-8'))))
+        assert linhas[0][0] == 'id'
+        assert len(linhas) == 1 + len(agendamentos)
+        assert linhas[1][7] == 'Carla'
+
+    def test_zip_com_um_csv_por_aba(self, logged_client, agendamentos):
+        _, corpo = self._get(logged_client, formato='zip')
+        with zipfile.ZipFile(io.BytesIO(corpo)) as zf:
+            assert len(zf.namelist()) == 6
+            mensal = list(csv.reader(io.StringIO(zf.read('Mensal.csv').decode('utf-8'))))
+        assert mensal == [['mes', 'agendamentos', 'horas'], ['2025-02', '5', '5.0']]
+
+    def test_formato_invalido(self, logged_client):
+        resp = logged_client.get(reverse('relatorios:export_relatorio_excel'), {'formato': 'pdf'})
+        assert resp.status_code == 400
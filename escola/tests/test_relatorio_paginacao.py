@@ -0,0 +1,70 @@
+"""Testes da página HTML do relatório com a tabela de agendamentos paginada no banco.
+Cenários:
+ - percorrer as páginas devolve todas as linhas, na ordem e no formato de `agendamentos_rows`
+ - trocar de página não refaz as agregações (resumo em cache) e lê só uma página de agendamentos
+ - resumo renderizado no servidor; as demais abas ficam para o endpoint de seções
+"""
+import pytest
+from datetime import datetime, timedelta
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import reports
+from escola.models import aluno, conteudo, professor, agendamento
+from escola.views.relatorio_view import RELATORIO_POR_PAGINA
+
+
+@pytest.mark.django_db
+class TestRelatorioPaginacao:
+
+    PARAMS = {'start': '2025-02-01', 'end': '2025-02-28'}
+
+    @pytest.fixture
+    def logged_client(self, client):
+        u = User.objects.create_user(username='rel', password='pass')
+        u.user_permissions.add(Permission.objects.get(codename='view_relatorio'))
+        client.force_login(u)
+        return client
+
+    @pytest.fixture
+    def agendamentos(self):
+        c = conteudo.Conteudo.objects.create(nome='Geografia', descricao='d', duracao_minutos=30)
+        p = professor.Professor.objects.create(nome='Lia', especialidade='Humanas')
+        alunos = [aluno.Aluno.objects.create(nome=f'Aluno {i}', serie='3', turno='M') for i in range(4)]
+        base = timezone.make_aware(datetime(2025, 2, 3, 7, 0))
+        return agendamento.Agendamento.objects.bulk_create([
+            agendamento.Agendamento(aluno=alunos[i % 4], conteudo=c, professor=p, inicio=base + timedelta(hours=i // 4), duracao_minutos=30)
+            for i in range(60)
+        ])
+
+    def test_percorre_paginas(self, logged_client, agendamentos):
+        linhas, params = [], dict(self.PARAMS)
+        while True:
+            page_obj = logged_client.get(reverse('relatorios:relatorio_conteudos'), params).context['agendamentos_page']
+            assert len(page_obj) <= RELATORIO_POR_PAGINA
+            linhas += page_obj.object_list
+            if not page_obj.has_next:
+                break
+            params['cursor'] = page_obj.next_cursor
+
+        _, _, inicio, fim = reports.resolver_periodo(datetime(2025, 2, 1).date(), datetime(2025, 2, 28).date())
+        esperado = sorted(reports.linhas_agendamentos(inicio, fim), key=lambda linha: (linha['inicio'], linha['id']))
+        assert linhas == esperado
+
+    def test_troca_de_pagina_barata(self, logged_client, agendamentos):
+        primeira = logged_client.get(reverse('relatorios:relatorio_conteudos'), self.PARAMS)
+        cursor = primeira.context['agendamentos_page'].next_cursor
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = logged_client.get(reverse('relatorios:relatorio_conteudos'), {**self.PARAMS, 'cursor': cursor})
+        consultas = [q['sql'] for q in ctx.captured_queries if 'escola_' in q['sql']]
+        assert len(consultas) == 1 and 'LIMIT' in consultas[0]
+        assert resp.context['resumo']['total_agendamentos'] == 60
+
+    def test_resumo_no_servidor(self, logged_client, agendamentos):
+        html = logged_client.get(reverse('relatorios:relatorio_conteudos'), self.PARAMS).content.decode()
+        assert '<strong>Total de Agendamentos:</strong> 60' in html
+        assert 'data-secao="by_professor"' in html and 'data-start="2025-02-01"' in html
+        assert 'cursor=' in html and 'start=2025-02-01' in html
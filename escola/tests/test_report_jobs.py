@@ -0,0 +1,122 @@
+"""Testes dos relatórios em segundo plano (ReportJob / escola.jobs).
+Cenários:
+ - JSON enfileira o job (202), o status acompanha o progresso e, concluído, o JSON sai do resultado
+ - novas chamadas do JSON reaproveitam o mesmo job do período
+ - a página HTML não usa jobs: resumo em cache por seção e linhas paginadas no banco
+ - mudar a versão do relatório gera um job novo
+ - falha na geração marca ERRO e a próxima chamada enfileira outro job
+ - comando run_report_worker esvazia a fila
+ - status de job exige a permissão do formato
+"""
+import json
+import pytest
+from asgiref.sync import async_to_sync
+from datetime import datetime, timedelta
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import jobs, reports
+from escola.models import aluno, conteudo, professor, agendamento
+from escola.models.report_job import ReportJob
+
+
+@async_to_sync
+async def _ler(resposta):
+    return b''.join([parte async for parte in resposta.streaming_content])
+
+
+@pytest.mark.django_db
+class TestReportJobs:
+
+    PARAMS = {'start': '2025-02-01', 'end': '2025-02-28'}
+
+    @pytest.fixture(autouse=True)
+    def media(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    @pytest.fixture
+    def logged_client(self, client):
+        u = User.objects.create_user(username='rel', password='pass')
+        u.user_permissions.add(*Permission.objects.filter(codename__in=['view_relatorio', 'export_relatorio', 'view_agendamento']))
+        client.force_login(u)
+        return client
+
+    @pytest.fixture
+    def base_objs(self):
+        a = aluno.Aluno.objects.create(nome='Aluno Job', serie='2', turno='Tarde')
+        c = conteudo.Conteudo.objects.create(nome='História', descricao='d', duracao_minutos=45)
+        p = professor.Professor.objects.create(nome='Rita')
+        base = timezone.make_aware(datetime(2025, 2, 10, 9, 0))
+        for i in range(3):
+            agendamento.Agendamento.objects.create(aluno=a, conteudo=c, professor=p, inicio=base + timedelta(days=i))
+
+    def _json(self, client):
+        return client.get(reverse('relatorios:relatorio_conteudos_json'), self.PARAMS)
+
+    def test_fluxo_json(self, logged_client, base_objs):
+        resp = self._json(logged_client)
+        assert resp.status_code == 202
+        status = resp.json()
+        assert status['status'] == 'PENDENTE' and status['download_url'] is None
+
+        jobs.executar_job(status['job'])
+        status = logged_client.get(status['status_url']).json()
+        assert status['status'] == 'CONCLUIDO' and status['progresso'] == 100
+
+        resp = self._json(logged_client)
+        assert resp.status_code == 200 and resp.streaming
+        data = json.loads(_ler(resp))
+        assert data['resumo']['total_agendamentos'] == 3
+        assert data['by_professor'] == [{'professor': 'Rita', 'agendamentos': 3, 'horas': 2.25}]
+        assert len(data['agendamentos_rows']) == 3
+        assert logged_client.get(status['download_url']).status_code == 200
+
+    def test_reaproveita_job(self, logged_client, base_objs):
+        job_id = self._json(logged_client).json()['job']
+        assert self._json(logged_client).json()['job'] == job_id
+        jobs.executar_job(job_id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._json(logged_client)
+            assert resp.status_code == 200 and json.loads(_ler(resp))['resumo']['total_agendamentos'] == 3
+        assert not any('escola_agendamento' in q['sql'] for q in ctx.captured_queries)
+        assert ReportJob.objects.count() == 1
+
+    def test_html_sem_job(self, logged_client, base_objs):
+        resp = logged_client.get(reverse('relatorios:relatorio_conteudos'), self.PARAMS)
+        assert resp.status_code == 200 and 'job' not in resp.context
+        assert resp.context['resumo']['total_agendamentos'] == 3
+        assert len(resp.context['agendamentos_page'].object_list) == 3
+        assert not ReportJob.objects.exists()
+
+    def test_nova_versao(self, logged_client, base_objs, monkeypatch):
+        jobs.executar_job(self._json(logged_client).json()['job'])
+        monkeypatch.setattr(reports, 'VERSAO_RELATORIO', reports.VERSAO_RELATORIO + 1)
+        assert self._json(logged_client).status_code == 202
+        assert ReportJob.objects.count() == 2
+
+    def test_erro(self, logged_client, base_objs, monkeypatch):
+        job_id = self._json(logged_client).json()['job']
+
+        def falhar(*args, **kwargs):
+            raise RuntimeError('sem disco')
+        monkeypatch.setattr(jobs, '_escrever_dados', falhar)
+        jobs.executar_job(job_id)
+        job = ReportJob.objects.get(pk=job_id)
+        assert job.status == 'ERRO' and job.erro == 'sem disco'
+
+        assert self._json(logged_client).json()['job'] != job_id
+
+    def test_comando_worker(self, logged_client, base_objs):
+        self._json(logged_client)
+        logged_client.get(reverse('relatorios:export_relatorio_excel'), {**self.PARAMS, 'formato': 'csv'})
+        call_command('run_report_worker', processos=0, uma_vez=True)
+        assert list(ReportJob.objects.values_list('status', flat=True)) == ['CONCLUIDO', 'CONCLUIDO']
+
+    def test_status_exige_permissao(self, client, logged_client, base_objs):
+        job_id = self._json(logged_client).json()['job']
+        client.force_login(User.objects.create_user(username='sem', password='pass'))
+        assert client.get(reverse('relatorios:relatorio_job_status', args=[job_id])).status_code == 403
@@ -0,0 +1,108 @@
+"""Testes do relatório em seções (escola.report_sections / relatorio_conteudos_secao).
+Cenários:
+ - cada seção é igual à parte correspondente do relatório completo (agendamentos e ResumoDiario)
+ - uma seção calcula só a si mesma e fica em cache já serializada
+ - linhas paginadas por cursor cobrem o período inteiro, na ordem
+ - salvar um agendamento ou renomear um cadastro invalida as seções em cache
+ - endpoint: gzip, 304 com If-None-Match, seção inválida, por_pagina inválido usa o padrão e permissão
+"""
+import gzip
+import json
+import pytest
+from datetime import date, datetime, timedelta
+from django.contrib.auth.models import Permission, User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import report_sections, reports, rollups
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+def _como_json(dados):
+    return json.loads(json.dumps(dados, cls=DjangoJSONEncoder))
+
+
+@pytest.mark.django_db
+class TestSecoes:
+
+    @pytest.fixture
+    def agendamentos(self):
+        conteudos = [conteudo.Conteudo.objects.create(nome=f'C{i}', descricao='d', duracao_minutos=30 + 15 * i) for i in range(3)]
+        profs = [professor.Professor.objects.create(nome=f'P{i}') for i in range(2)]
+        alunos = [aluno.Aluno.objects.create(nome=f'A{i}', serie='1', turno='M') for i in range(5)]
+        base = timezone.make_aware(datetime(2025, 1, 2, 8, 0))
+        ags = agendamento.Agendamento.objects.bulk_create([
+            agendamento.Agendamento(
+                aluno=alunos[i % 5], conteudo=conteudos[i % 3], professor=profs[i % 2],
+                inicio=base + timedelta(days=i % 80, hours=i % 7), status=('AGENDADO', 'CONCLUIDO', 'CANCELADO')[i % 3],
+            )
+            for i in range(120)
+        ])
+        rollups.reconstruir()
+        return ags
+
+    @pytest.fixture
+    def logged_client(self, client):
+        u = User.objects.create_user(username='rel', password='pass')
+        u.user_permissions.add(Permission.objects.get(codename='view_relatorio'))
+        client.force_login(u)
+        return client
+
+    @pytest.mark.parametrize('inicio,fim', [(date(2025, 1, 5), date(2025, 1, 20)), (date(2025, 1, 1), date(2025, 3, 31))])
+    def test_igual_ao_relatorio_completo(self, agendamentos, inicio, fim):
+        completo = _como_json(reports.gerar_relatorio(inicio, fim, incluir_linhas=False))
+        for secao in ('resumo', *reports.QUEBRAS):
+            assert json.loads(report_sections.obter(secao, inicio, fim).corpo) == completo[secao]
+
+    def test_so_a_secao_e_cacheada(self, agendamentos):
+        with CaptureQueriesContext(connection) as ctx:
+            report_sections.obter('by_professor', date(2025, 1, 5), date(2025, 1, 20))
+        assert len(ctx.captured_queries) == 1 and 'professor' in ctx.captured_queries[0]['sql']
+        with CaptureQueriesContext(connection) as ctx:
+            report_sections.obter('by_professor', date(2025, 1, 5), date(2025, 1, 20))
+        assert not ctx.captured_queries
+
+    def test_mudanca_invalida_as_secoes(self, agendamentos, django_capture_on_commit_callbacks):
+        inicio, fim = date(2025, 1, 1), date(2025, 3, 31)
+        total = json.loads(report_sections.obter('resumo', inicio, fim).corpo)['total_agendamentos']
+        with django_capture_on_commit_callbacks(execute=True):
+            agendamentos[0].delete()
+        assert json.loads(report_sections.obter('resumo', inicio, fim).corpo)['total_agendamentos'] == total - 1
+
+        prof = professor.Professor.objects.get(nome='P0')
+        prof.nome = 'Renomeado'
+        with django_capture_on_commit_callbacks(execute=True):
+            prof.save()
+        nomes = [linha['professor'] for linha in json.loads(report_sections.obter('by_professor', inicio, fim).corpo)]
+        assert 'Renomeado' in nomes
+
+    def test_linhas_paginadas(self, agendamentos):
+        inicio, fim = date(2025, 1, 1), date(2025, 3, 31)
+        ids, cursor = [], None
+        while True:
+            pagina = json.loads(report_sections.obter('rows', inicio, fim, cursor=cursor, por_pagina=7).corpo)
+            ids += [linha['id'] for linha in pagina['results']]
+            if not pagina['next']:
+                break
+            cursor = pagina['next']
+        _, _, inicio_dt, fim_dt = reports.resolver_periodo(inicio, fim)
+        esperado = sorted(reports.linhas_agendamentos(inicio_dt, fim_dt), key=lambda linha: (linha['inicio'], linha['id']))
+        assert ids == [linha['id'] for linha in esperado]
+
+    def test_endpoint(self, logged_client, agendamentos):
+        url = reverse('relatorios:relatorio_conteudos_secao', args=['by_conteudo'])
+        params = {'start': '2025-01-05', 'end': '2025-01-20'}
+        resp = logged_client.get(url, params, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert resp['Content-Encoding'] == 'gzip'
+        dados = json.loads(gzip.decompress(resp.content))
+        assert [linha['conteudo'] for linha in dados] == [linha['conteudo'] for linha in reports.quebra('by_conteudo', date(2025, 1, 5), date(2025, 1, 20))]
+
+        assert logged_client.get(url, params, HTTP_IF_NONE_MATCH=resp['ETag']).status_code == 304
+        assert logged_client.get(reverse('relatorios:relatorio_conteudos_secao', args=['tudo']), params).status_code == 400
+        rows = reverse('relatorios:relatorio_conteudos_secao', args=['rows'])
+        assert logged_client.get(rows, {**params, 'por_pagina': 'x'}).content == logged_client.get(rows, params).content
+
+        logged_client.force_login(User.objects.create_user(username='sem', password='pass'))
+        assert logged_client.get(url, params).status_code == 403
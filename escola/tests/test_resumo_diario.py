@@ -0,0 +1,88 @@
+"""Testes do resumo diário (ResumoDiario) mantido por signals.
+Cenários:
+ - criar, alterar e excluir agendamentos mantém o resumo igual à reconstrução completa
+ - mudança de série/turno do aluno move os totais
+ - concluido_por_conteudo lido do resumo é igual ao calculado nos agendamentos
+ - comando rebuild_rollups
+"""
+import pytest
+from datetime import datetime, timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from escola import reports, rollups
+from escola.models import aluno, conteudo, professor, agendamento
+from escola.models.resumo_diario import ResumoDiario
+
+
+def _snapshot():
+    return sorted(
+        ResumoDiario.objects.values_list('dia', 'mes', 'professor_id', 'conteudo_id', 'serie', 'turno', 'status', 'total', 'minutos')
+    )
+
+
+@pytest.mark.django_db
+class TestResumoDiario:
+
+    @pytest.fixture
+    def base_objs(self):
+        a1 = aluno.Aluno.objects.create(nome='A1', serie='1', turno='Manhã')
+        a2 = aluno.Aluno.objects.create(nome='A2', serie='2', turno='Tarde')
+        c1 = conteudo.Conteudo.objects.create(nome='C1', descricao='d', duracao_minutos=60)
+        c2 = conteudo.Conteudo.objects.create(nome='C2', descricao='d', duracao_minutos=40)
+        p = professor.Professor.objects.create(nome='P')
+        return a1, a2, c1, c2, p
+
+    def _criar(self, base_objs, n=6):
+        a1, a2, c1, c2, p = base_objs
+        # 23h30 local cai no mês seguinte em UTC no último dia do mês
+        inicio = timezone.make_aware(datetime(2025, 1, 28, 23, 30))
+        return [
+            agendamento.Agendamento.objects.create(
+                aluno=(a1, a2)[i % 2], conteudo=(c1, c2)[i % 2], professor=p,
+                inicio=inicio + timedelta(days=i), status='CONCLUIDO' if i % 3 else 'AGENDADO',
+            )
+            for i in range(n)
+        ]
+
+    def test_incremental_igual_a_reconstrucao(self, base_objs):
+        ags = self._criar(base_objs)
+        ags[0].status = 'CANCELADO'
+        ags[0].save()
+        ags[1].inicio += timedelta(days=40)
+        ags[1].duracao_minutos = 15
+        ags[1].save()
+        ags[2].delete()
+
+        incremental = _snapshot()
+        assert incremental
+        rollups.reconstruir()
+        assert _snapshot() == incremental
+        assert ResumoDiario.objects.filter(total__lte=0).count() == 0
+
+    def test_mudanca_de_serie_move_totais(self, base_objs):
+        a1 = base_objs[0]
+        self._criar(base_objs)
+        a1.serie = '5'
+        a1.save()
+        assert not ResumoDiario.objects.filter(serie='1').exists()
+        incremental = _snapshot()
+        rollups.reconstruir()
+        assert _snapshot() == incremental
+
+    def test_concluido_por_conteudo_pelo_resumo(self, base_objs):
+        self._criar(base_objs, n=40)
+        inicio = timezone.make_aware(datetime(2025, 1, 1))
+        fim = timezone.make_aware(datetime(2025, 4, 1))
+        qs = agendamento.Agendamento.objects.all()
+
+        pelo_resumo = reports.concluido_por_conteudo(qs, inicio, fim)
+        pelos_agendamentos = reports.concluido_por_conteudo(qs.filter(pk__gt=0), inicio, fim)
+        assert sorted(pelo_resumo, key=str) == sorted(pelos_agendamentos, key=str)
+
+    def test_comando_rebuild_rollups(self, base_objs, capsys):
+        self._criar(base_objs)
+        esperado = _snapshot()
+        ResumoDiario.objects.all().delete()
+        call_command('rebuild_rollups')
+        assert _snapshot() == esperado
+        assert 'Linhas de resumo diário geradas' in capsys.readouterr().out
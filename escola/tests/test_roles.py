@@ -0,0 +1,74 @@
+"""Testes da resolução de papéis (escola.roles).
+Cenários:
+ - papel e perfil de Professor resolvidos uma vez e servidos do cache depois
+ - cache invalidado ao mudar grupos e ao vincular Professor
+ - home do professor sem queries de grupos/perfil com o cache quente
+ - lista de agendamentos do professor mostra só os dele
+"""
+import pytest
+from datetime import timedelta
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import roles
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+@pytest.mark.django_db
+class TestRoles:
+
+    @pytest.fixture
+    def prof_user(self):
+        u = User.objects.create_user(username='prof', password='pass')
+        u.groups.add(Group.objects.get_or_create(name='Professor')[0])
+        u.save()
+        return u
+
+    def test_papel_cacheado(self, prof_user, django_assert_num_queries):
+        papel = roles.papel_de(User.objects.get(pk=prof_user.pk))
+        assert papel.eh_professor and not papel.eh_coordenacao
+        assert papel.professor.user_id == prof_user.pk
+
+        fresco = User.objects.get(pk=prof_user.pk)
+        with django_assert_num_queries(0):
+            assert roles.papel_de(fresco).professor.pk == papel.professor.pk
+
+    def test_invalidacao(self, prof_user):
+        coord = Group.objects.get_or_create(name='Coordenação')[0]
+        assert not roles.papel_de(User.objects.get(pk=prof_user.pk)).eh_coordenacao
+
+        coord.user_set.add(prof_user)
+        assert roles.papel_de(User.objects.get(pk=prof_user.pk)).eh_coordenacao
+
+        prof_user.groups.clear()
+        assert roles.papel_de(User.objects.get(pk=prof_user.pk)).grupos == frozenset()
+
+        novo = professor.Professor.objects.create(nome='Outro perfil')
+        prof_user.professor_profile.delete()
+        novo.user = prof_user
+        novo.save()
+        assert roles.papel_de(User.objects.get(pk=prof_user.pk)).professor.pk == novo.pk
+
+    def test_home_professor_com_cache_quente(self, client, prof_user):
+        client.force_login(prof_user)
+        assert client.get(reverse('agendamentos:home')).status_code == 200
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(reverse('agendamentos:home'))
+        assert resp.status_code == 200
+        sqls = ' '.join(q['sql'] for q in ctx.captured_queries)
+        assert 'auth_user_groups' not in sqls
+        assert '"escola_professor"."user_id"' not in sqls
+
+    def test_lista_do_professor(self, client, prof_user):
+        a = aluno.Aluno.objects.create(nome='A')
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=30)
+        outro = professor.Professor.objects.create(nome='Outro')
+        inicio = timezone.now() + timedelta(days=1)
+        meu = agendamento.Agendamento.objects.create(aluno=a, conteudo=c, professor=prof_user.professor_profile, inicio=inicio)
+        agendamento.Agendamento.objects.create(aluno=a, conteudo=c, professor=outro, inicio=inicio + timedelta(hours=1))
+
+        client.force_login(prof_user)
+        resp = client.get(reverse('agendamentos:list'))
+        assert [ag.pk for ag in resp.context['agendamentos']] == [meu.pk]
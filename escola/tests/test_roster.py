@@ -0,0 +1,100 @@
+"""Testes dos endpoints de busca de alunos (load_alunos / alunos_json) com cache.
+Cenários:
+ - alunos_json filtra só ativos e load_alunos exige série e turno
+ - segunda chamada servida do cache, sem queries
+ - If-None-Match / If-Modified-Since respondem 304
+ - salvar ou excluir aluno invalida o cache e troca o ETag
+ - rajada de alterações não leva o Last-Modified para o futuro
+ - troca de versão que não chegou ao processo: a lista vence em ROSTER_CACHE_TIMEOUT e o ETag muda
+ - corpo gzip quando o cliente aceita
+"""
+import gzip
+import json
+import time
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils.http import parse_http_date
+from escola import roster
+from escola.models import aluno
+
+
+@pytest.mark.django_db
+class TestRoster:
+
+    @pytest.fixture
+    def alunos(self):
+        return [
+            aluno.Aluno.objects.create(nome='Bruno', serie='1', turno='M'),
+            aluno.Aluno.objects.create(nome='Ana', serie='1', turno='M'),
+            aluno.Aluno.objects.create(nome='Caio', serie='1', turno='M', is_active=False),
+            aluno.Aluno.objects.create(nome='Duda', serie='2', turno='T'),
+        ]
+
+    @pytest.fixture
+    def logado(self, client):
+        client.force_login(User.objects.create_user(username='u', password='pass'))
+        return client
+
+    def test_filtros(self, logado, alunos):
+        resp = logado.get(reverse('alunos:alunos_json'), {'serie': '1'})
+        assert [a['nome'] for a in resp.json()] == ['Ana', 'Bruno']
+        resp = logado.get(reverse('alunos:ajax_load_alunos'), {'serie': '1', 'turno': 'M'})
+        assert [a['nome'] for a in resp.json()] == ['Ana', 'Bruno', 'Caio']
+        assert logado.get(reverse('alunos:ajax_load_alunos'), {'serie': '1'}).json() == []
+
+    def test_cache_e_304(self, logado, alunos, django_assert_num_queries):
+        url = reverse('alunos:ajax_load_alunos')
+        params = {'serie': '1', 'turno': 'M'}
+        primeira = logado.get(url, params)
+        with django_assert_num_queries(0):
+            segunda = logado.get(url, params)
+        assert segunda.content == primeira.content
+
+        etag = primeira['ETag']
+        assert logado.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert logado.get(url, params, HTTP_IF_MODIFIED_SINCE=primeira['Last-Modified']).status_code == 304
+
+    def test_invalidacao(self, logado, alunos, django_capture_on_commit_callbacks):
+        url = reverse('alunos:alunos_json')
+        etag = logado.get(url, {'serie': '1'})['ETag']
+
+        alunos[2].is_active = True
+        with django_capture_on_commit_callbacks(execute=True):
+            alunos[2].save()
+        resp = logado.get(url, {'serie': '1'}, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200 and resp['ETag'] != etag
+        assert [a['nome'] for a in resp.json()] == ['Ana', 'Bruno', 'Caio']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            alunos[0].delete()
+        assert [a['nome'] for a in logado.get(url, {'serie': '1'}).json()] == ['Ana', 'Caio']
+
+    def test_rajada_sem_last_modified_no_futuro(self, logado, alunos, django_capture_on_commit_callbacks):
+        url = reverse('alunos:alunos_json')
+        versao = roster.versao()
+        for i in range(30):
+            alunos[0].nome = f'Bruno {i}'
+            with django_capture_on_commit_callbacks(execute=True):
+                alunos[0].save()
+        assert roster.versao() == versao + 30
+        resp = logado.get(url, {'serie': '1'})
+        assert parse_http_date(resp['Last-Modified']) <= time.time()
+
+    def test_troca_perdida_vence_pelo_timeout(self, logado, alunos, monkeypatch):
+        assert roster.ROSTER_CACHE_TIMEOUT <= 5 * 60
+        monkeypatch.setattr(roster, 'ROSTER_CACHE_TIMEOUT', 0)  # toda entrada já venceu
+        url = reverse('alunos:alunos_json')
+        etag = logado.get(url, {'serie': '1'})['ETag']
+        # sem executar o on_commit: como um worker que não recebeu a troca de versão
+        alunos[2].is_active = True
+        alunos[2].save()
+        resp = logado.get(url, {'serie': '1'}, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200 and resp['ETag'] != etag
+        assert [a['nome'] for a in resp.json()] == ['Ana', 'Bruno', 'Caio']
+
+    def test_gzip(self, logado, alunos):
+        resp = logado.get(reverse('alunos:alunos_json'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert resp['Content-Encoding'] == 'gzip'
+        assert [a['nome'] for a in json.loads(gzip.decompress(resp.content))] == ['Ana', 'Bruno', 'Duda']
+        assert 'Accept-Encoding' in resp['Vary']
@@ -0,0 +1,148 @@
+"""Testes do arquivo colunar mensal dos agendamentos (escola.snapshots).
+Cenários:
+ - linhas lidas dos snapshots iguais às do banco, inclusive na virada de mês em UTC
+ - período só com meses fechados não consulta o banco
+ - execução incremental: só regera meses alterados, com exclusões e meses esvaziados
+ - editar ou excluir um agendamento de mês fechado remove a partição: linhas iguais às agregações
+ - renomear ou mudar de turma aluno, professor ou conteúdo (também pela importação) remove
+   as partições dos meses dele; a próxima execução grava os valores novos
+ - partição gravada em blocos igual à gravada de uma vez
+ - comando snapshot_agendamentos (e Parquet só com pyarrow)
+"""
+import importlib.util
+import io
+import pytest
+from datetime import date, datetime
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from escola import reports, roster_import, snapshots, transitions
+from escola.models import aluno, conteudo, professor, agendamento
+
+
+@pytest.mark.django_db
+class TestSnapshots:
+
+    @pytest.fixture
+    def agendamentos(self):
+        a1 = aluno.Aluno.objects.create(nome='Ana', serie='1', turno='M')
+        a2 = aluno.Aluno.objects.create(nome='Beto', serie='2', turno='T')
+        c = conteudo.Conteudo.objects.create(nome='Química', descricao='d', duracao_minutos=50)
+        p = professor.Professor.objects.create(nome='Davi', especialidade='Exatas')
+        inicios = [
+            datetime(2025, 1, 10, 8, 0),
+            datetime(2025, 1, 20, 14, 0),
+            datetime(2025, 1, 31, 22, 30),  # 01:30 de fevereiro em UTC
+            datetime(2025, 2, 5, 9, 0),
+            datetime(2025, 3, 3, 10, 0),
+        ]
+        return [
+            agendamento.Agendamento.objects.create(
+                aluno=(a1, a2)[i % 2], conteudo=c, professor=p, inicio=timezone.make_aware(inicio), duracao_minutos=30 + i,
+            )
+            for i, inicio in enumerate(inicios)
+        ]
+
+    def _linhas(self, inicio, fim):
+        _, _, inicio_dt, fim_dt = reports.resolver_periodo(inicio, fim)
+        return list(reports.iterar_linhas(inicio_dt, fim_dt))
+
+    def test_paridade_com_o_banco(self, agendamentos):
+        periodos = [(date(2025, 1, 1), date(2025, 1, 31)), (date(2025, 1, 15), date(2025, 3, 31)), (date(2025, 2, 1), date(2025, 2, 28))]
+        do_banco = [self._linhas(*periodo) for periodo in periodos]
+        snapshots.sincronizar()
+        assert [self._linhas(*periodo) for periodo in periodos] == do_banco
+        assert [linha['id'] for linha in do_banco[0]] == [ag.pk for ag in agendamentos[:3]]
+
+    def test_meses_fechados_sem_banco(self, agendamentos):
+        snapshots.sincronizar()
+        with CaptureQueriesContext(connection) as ctx:
+            linhas = self._linhas(date(2025, 1, 1), date(2025, 2, 28))
+        assert len(linhas) == 4
+        assert ctx.captured_queries == []
+
+    def test_incremental(self, agendamentos):
+        gerados, _ = snapshots.sincronizar()
+        assert [mes.month for mes in gerados] == [1, 2, 3]
+        assert snapshots.sincronizar() == ({}, [])
+
+        agendamentos[0].status = 'CONCLUIDO'
+        agendamentos[0].save()
+        agendamentos[3].delete()
+        gerados, removidos = snapshots.sincronizar()
+        assert [mes.month for mes in gerados] == [1, 2]
+        assert [linha['status'] for linha in self._linhas(date(2025, 1, 1), date(2025, 1, 15))] == ['CONCLUIDO']
+
+        # a exclusão já removeu a partição do mês, que ficou vazio
+        agendamentos[4].delete()
+        assert snapshots.ler_meta(date(2025, 3, 1)) is None
+        assert snapshots.sincronizar() == ({}, [])
+
+    def test_edicao_invalida_o_mes(self, agendamentos):
+        snapshots.sincronizar()
+        agendamentos[0].status = 'CANCELADO'
+        agendamentos[0].save()
+        assert snapshots.ler_meta(date(2025, 1, 1)) is None
+        assert snapshots.ler_meta(date(2025, 2, 1)) is not None
+        linhas = self._linhas(date(2025, 1, 1), date(2025, 1, 15))
+        assert [linha['status'] for linha in linhas] == ['CANCELADO']
+        resumo = reports.gerar_relatorio(date(2025, 1, 1), date(2025, 1, 15), incluir_linhas=False)
+        assert resumo['resumo']['total_agendamentos'] == len(linhas)
+
+        agendamentos[3].delete()
+        assert snapshots.ler_meta(date(2025, 2, 1)) is None
+        snapshots.sincronizar()
+        transitions.alterar_status_em_lote(agendamento.Agendamento.objects.filter(pk=agendamentos[4].pk), 'CONCLUIDO')
+        assert snapshots.ler_meta(date(2025, 3, 1)) is None
+        assert snapshots.ler_meta(date(2025, 1, 1)) is not None
+
+    def test_cadastro_invalida_os_meses(self, agendamentos):
+        janeiro, fevereiro, marco = date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)
+        snapshots.sincronizar()
+        beto = agendamentos[1].aluno  # agendamentos em janeiro e fevereiro
+        beto.telefone = '9999'
+        beto.save()
+        assert snapshots.meses_com_particao() == [janeiro, fevereiro, marco]
+
+        beto.nome = 'Beto Lima'
+        beto.save()
+        assert snapshots.meses_com_particao() == [marco]
+        gerados, _ = snapshots.sincronizar()
+        assert list(gerados) == [janeiro, fevereiro]
+        assert {linha['aluno'] for linha in self._linhas(janeiro, date(2025, 2, 28))} == {'Ana', 'Beto Lima'}
+
+        professor_ = agendamentos[0].professor
+        professor_.especialidade = 'Química'
+        professor_.save()
+        conteudo_ = agendamentos[0].conteudo
+        conteudo_.duracao_minutos = 45
+        conteudo_.save()
+        assert snapshots.meses_com_particao() == []
+
+        snapshots.sincronizar()
+        resultado = roster_import.importar(io.BytesIO('nome;serie;turno\nBETO LIMA;2;T\n'.encode()), 'a.csv')
+        assert resultado.aplicado and resultado.atualizados
+        assert snapshots.meses_com_particao() == [marco]
+        snapshots.sincronizar()
+        assert 'BETO LIMA' in {linha['aluno'] for linha in self._linhas(janeiro, date(2025, 1, 31))}
+
+    def test_gravacao_em_blocos(self, agendamentos, monkeypatch):
+        snapshots.sincronizar()
+        inteiro = self._linhas(date(2025, 1, 1), date(2025, 3, 31))
+        monkeypatch.setattr(snapshots, 'CHUNK_LINHAS', 1)
+        snapshots.sincronizar(completo=True)
+        assert self._linhas(date(2025, 1, 1), date(2025, 3, 31)) == inteiro
+        assert snapshots.ler_meta(date(2025, 1, 1))['linhas'] == 2
+
+    def test_comando(self, agendamentos, tmp_path):
+        call_command('snapshot_agendamentos')
+        assert snapshots.ler_meta(date(2025, 1, 1))['linhas'] == 2
+
+        if importlib.util.find_spec('pyarrow') is None:
+            with pytest.raises(CommandError):
+                call_command('snapshot_agendamentos', completo=True, parquet=str(tmp_path / 'parquet'))
+        else:
+            call_command('snapshot_agendamentos', completo=True, parquet=str(tmp_path / 'parquet'))
+            assert (tmp_path / 'parquet' / 'mes=2025-01' / 'agendamentos.parquet').exists()
@@ -0,0 +1,44 @@
+"""Testes do custo de inicialização de um worker (django.setup() + URLconf).
+Cenários:
+ - pandas, numpy, xlsxwriter e openpyxl não são importados ao subir o projeto e resolver URLs
+ - a soma dos tempos de importação (python -X importtime) fica dentro do orçamento
+"""
+import os
+import subprocess
+import sys
+from django.conf import settings
+
+# Folga de ~2x sobre o medido (~290 ms com -X importtime); só pandas já passa de 400 ms.
+ORCAMENTO_MS = 600
+PESADOS = {'pandas', 'numpy', 'xlsxwriter', 'openpyxl'}
+SCRIPT = """
+import django
+django.setup()
+from django.urls import get_resolver, resolve
+get_resolver().url_patterns
+resolve('/relatorios/conteudos/')
+"""
+
+
+def _importacoes():
+    """{módulo: tempo próprio em µs} de um processo novo subindo o projeto."""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings', 'PYTHONDONTWRITEBYTECODE': '1'}
+    saida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stderr
+    tempos = {}
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, _, modulo = linha.removeprefix('import time:').split('|')
+        tempos[modulo.strip()] = int(proprio)
+    return tempos
+
+
+def test_inicializacao_sem_dependencias_pesadas():
+    tempos = _importacoes()
+    carregados = {modulo.split('.')[0] for modulo in tempos}
+    assert not carregados & PESADOS, f'importados na inicialização: {sorted(carregados & PESADOS)}'
+    total_ms = sum(tempos.values()) / 1000
+    assert total_ms < ORCAMENTO_MS, f'importações somam {total_ms:.0f} ms (orçamento: {ORCAMENTO_MS} ms)'
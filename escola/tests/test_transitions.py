@@ -0,0 +1,152 @@
+"""Testes da mudança de status de agendamentos (escola.transitions).
+Cenários:
+ - transição grava só status/updated_at, sem checar sobreposição, e mantém o resumo diário
+ - transição não permitida e reativação de cancelado que colide com a agenda
+   (verificada dentro da transação, com professor e aluno travados)
+ - status alterado por outra pessoa no meio do caminho
+ - lote: um único UPDATE, ignorados, conflitos entre si e resumo igual à reconstrução
+ - endpoints: professor só altera os próprios agendamentos; Diretoria altera qualquer um
+"""
+import pytest
+from datetime import datetime, timedelta
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from escola import rollups, transitions
+from escola.models import aluno, conteudo, professor, agendamento
+from escola.models.resumo_diario import ResumoDiario
+
+Agendamento = agendamento.Agendamento
+
+
+def _snapshot():
+    return sorted(ResumoDiario.objects.values_list('dia', 'professor_id', 'conteudo_id', 'serie', 'turno', 'status', 'total', 'minutos'))
+
+
+@pytest.mark.django_db
+class TestTransicoes:
+
+    @pytest.fixture
+    def base_objs(self):
+        a1 = aluno.Aluno.objects.create(nome='A1', serie='1', turno='Manhã')
+        a2 = aluno.Aluno.objects.create(nome='A2', serie='2', turno='Tarde')
+        c = conteudo.Conteudo.objects.create(nome='C', descricao='d', duracao_minutos=60)
+        u = User.objects.create_user(username='prof', password='pass')
+        p = professor.Professor.objects.create(nome='P', user=u)
+        outro = professor.Professor.objects.create(nome='Outro')
+        return a1, a2, c, p, outro
+
+    def _ag(self, aluno_, conteudo_, prof, hora, status=Agendamento.STATUS_AGENDADO, dias=1):
+        inicio = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=dias), datetime.min.time()))
+        return Agendamento.objects.create(
+            aluno=aluno_, conteudo=conteudo_, professor=prof, inicio=inicio + timedelta(hours=hora), status=status,
+        )
+
+    def _carregar(self, pk):
+        return Agendamento.objects.select_related('aluno', 'conteudo', 'professor').get(pk=pk)
+
+    def test_so_status_sem_sobreposicao(self, base_objs):
+        a1, _, c, p, _ = base_objs
+        ag = self._carregar(self._ag(a1, c, p, 8).pk)
+        antes = ag.updated_at
+        with CaptureQueriesContext(connection) as ctx:
+            assert transitions.alterar_status(ag, Agendamento.STATUS_CONCLUIDO)
+        sqls = [q['sql'] for q in ctx.captured_queries]
+        # nenhuma busca de conflitos: só o UPDATE e o ajuste do resumo
+        assert not any(sql.startswith('SELECT') and 'escola_agendamento' in sql for sql in sqls)
+        [update] = [sql for sql in sqls if sql.startswith('UPDATE "escola_agendamento"')]
+        assert '"status"' in update and '"updated_at"' in update and '"inicio"' not in update
+
+        ag.refresh_from_db()
+        assert ag.status == Agendamento.STATUS_CONCLUIDO and ag.updated_at > antes
+        assert transitions.alterar_status(ag, Agendamento.STATUS_CONCLUIDO) is False
+
+        incremental = _snapshot()
+        rollups.reconstruir()
+        assert _snapshot() == incremental
+
+    def test_transicao_invalida_e_reativacao_com_conflito(self, base_objs):
+        a1, _, c, p, _ = base_objs
+        cancelado = self._carregar(self._ag(a1, c, p, 8, Agendamento.STATUS_CANCELADO).pk)
+        with pytest.raises(transitions.TransicaoInvalida):
+            transitions.alterar_status(cancelado, Agendamento.STATUS_CONCLUIDO)
+
+        self._ag(a1, c, p, 8)  # o horário foi reocupado depois do cancelamento
+        with CaptureQueriesContext(connection) as ctx, pytest.raises(ValidationError) as exc:
+            transitions.alterar_status(cancelado, Agendamento.STATUS_AGENDADO)
+        sqls = [q['sql'] for q in ctx.captured_queries]
+        assert sqls[0].startswith('SAVEPOINT')
+        assert any('FROM "escola_professor"' in sql for sql in sqls) and any('FROM "escola_aluno"' in sql for sql in sqls)
+        assert 'já possui um atendimento' in exc.value.messages[0]
+        assert cancelado.status == Agendamento.STATUS_CANCELADO
+        cancelado.refresh_from_db()
+        assert cancelado.status == Agendamento.STATUS_CANCELADO
+
+    def test_alterado_por_outra_pessoa(self, base_objs):
+        a1, _, c, p, _ = base_objs
+        ag = self._carregar(self._ag(a1, c, p, 8).pk)
+        Agendamento.objects.filter(pk=ag.pk).update(status=Agendamento.STATUS_CANCELADO)
+        with pytest.raises(transitions.TransicaoInvalida):
+            transitions.alterar_status(ag, Agendamento.STATUS_CONCLUIDO)
+        ag.refresh_from_db()
+        assert ag.status == Agendamento.STATUS_CANCELADO
+
+    def test_lote(self, base_objs):
+        a1, a2, c, p, _ = base_objs
+        agendados = [self._ag((a1, a2)[i % 2], c, p, 8 + i, dias=i + 1) for i in range(6)]
+        concluido = self._ag(a1, c, p, 7, Agendamento.STATUS_CONCLUIDO, dias=30)
+        pks = [ag.pk for ag in agendados] + [concluido.pk]
+
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = transitions.alterar_status_em_lote(Agendamento.objects.filter(pk__in=pks), Agendamento.STATUS_CANCELADO)
+        assert sorted(resultado['atualizados']) == sorted(ag.pk for ag in agendados)
+        assert resultado['ignorados'] == [concluido.pk] and resultado['conflitos'] == {}
+        assert len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "escola_agendamento"')]) == 1
+
+        # dois cancelados no mesmo horário do mesmo aluno: só o primeiro volta
+        x = self._ag(a1, c, p, 9, Agendamento.STATUS_CANCELADO, dias=40)
+        y = self._ag(a1, c, p, 9, Agendamento.STATUS_CANCELADO, dias=40)
+        resultado = transitions.alterar_status_em_lote(Agendamento.objects.filter(pk__in=[x.pk, y.pk]), Agendamento.STATUS_AGENDADO)
+        assert resultado['atualizados'] == [x.pk] and list(resultado['conflitos']) == [y.pk]
+
+        incremental = _snapshot()
+        rollups.reconstruir()
+        assert _snapshot() == incremental
+
+        with pytest.raises(transitions.TransicaoInvalida):
+            transitions.alterar_status_em_lote(Agendamento.objects.all(), 'PERDIDO')
+
+    def test_endpoints(self, client, base_objs):
+        a1, a2, c, p, outro = base_objs
+        meu = self._ag(a1, c, p, 8)
+        alheio = self._ag(a2, c, outro, 8)
+        client.force_login(p.user)
+
+        url = reverse('agendamentos:alterar_status_agendamento', args=[alheio.pk])
+        assert client.post(url, {'status': 'CONCLUIDO'}).status_code == 302
+        alheio.refresh_from_db()
+        assert alheio.status == Agendamento.STATUS_AGENDADO
+
+        url = reverse('agendamentos:alterar_status_agendamento', args=[meu.pk])
+        client.post(url, {'status': 'CONCLUIDO'})
+        meu.refresh_from_db()
+        assert meu.status == Agendamento.STATUS_CONCLUIDO
+        resposta = client.post(url, {'status': 'CANCELADO'}, follow=True)
+        assert 'Não é possível passar' in resposta.content.decode()
+
+        url = reverse('agendamentos:alterar_status_em_lote')
+        assert client.post(url, {'status': 'AGENDADO', 'ids': ['x']}).status_code == 400
+        data = client.post(
+            url, {'status': 'AGENDADO', 'ids': [meu.pk, alheio.pk]}, HTTP_ACCEPT='application/json'
+        ).json()
+        assert data['atualizados'] == [meu.pk] and data['nao_encontrados'] == [alheio.pk]
+
+        diretor = User.objects.create_user(username='diretor', password='pass')
+        diretor.groups.add(Group.objects.get(name='Diretoria'))
+        client.force_login(diretor)
+        client.post(reverse('agendamentos:alterar_status_agendamento', args=[alheio.pk]), {'status': 'CONCLUIDO'})
+        alheio.refresh_from_db()
+        assert alheio.status == Agendamento.STATUS_CONCLUIDO
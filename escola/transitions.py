@@ -0,0 +1,131 @@
+"""
+Mudança de status de agendamentos sem passar por save()/full_clean(): só status e
+updated_at são gravados, num UPDATE condicionado ao status de origem, e o ResumoDiario e
+o feed de mudanças são acertados explicitamente (o UPDATE não dispara signals). Trocar o
+status não mexe no horário, então a sobreposição só é verificada quando um cancelado volta
+a ocupar a agenda, dentro da transação e com o professor e o aluno travados (conflicts.travar).
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from escola import changefeed, conflicts, dashboard, rollups, snapshots
+from escola.models.agendamento import Agendamento
+from escola.models.mudanca_agendamento import MudancaAgendamento
+from escola.reports import duracao_efetiva, fim_efetivo
+
+# status atual -> status para os quais ele pode passar
+TRANSICOES = {
+    Agendamento.STATUS_AGENDADO: {Agendamento.STATUS_CONCLUIDO, Agendamento.STATUS_CANCELADO},
+    Agendamento.STATUS_CONCLUIDO: {Agendamento.STATUS_AGENDADO},
+    Agendamento.STATUS_CANCELADO: {Agendamento.STATUS_AGENDADO},
+}
+ROTULOS = dict(Agendamento.STATUS_CHOICES)
+
+
+class TransicaoInvalida(ValidationError):
+    """Status desconhecido ou transição não permitida a partir do status atual."""
+
+
+def origens(status):
+    """Status a partir dos quais é permitido passar para `status`."""
+    if status not in ROTULOS:
+        raise TransicaoInvalida(f"Status inválido: {status!r}.")
+    return [atual for atual, destinos in TRANSICOES.items() if status in destinos]
+
+
+def reativa(atual, novo):
+    """A transição faz o agendamento voltar a ocupar o horário?"""
+    return atual not in conflicts.STATUS_OCUPADOS and novo in conflicts.STATUS_OCUPADOS
+
+
+def validar(atual, novo):
+    if novo not in TRANSICOES.get(atual, ()):
+        raise TransicaoInvalida(
+            f"Não é possível passar um agendamento de {ROTULOS.get(atual, atual)} para {ROTULOS.get(novo, novo)}."
+        )
+
+
+def alterar_status(agendamento, novo):
+    """
+    Aplica a transição a um agendamento carregado com aluno, conteúdo e professor.
+    Retorna False se ele já estava no status pedido; levanta ValidationError se a
+    transição não é permitida, se o horário já foi ocupado (reativação) ou se outra
+    pessoa mudou o status nesse meio tempo.
+    """
+    atual = agendamento.status
+    if novo == atual:
+        return False
+    validar(atual, novo)
+
+    antes = rollups.estado_de(agendamento)
+    agendamento.status = novo
+    try:
+        agora = timezone.now()
+        with transaction.atomic():
+            if reativa(atual, novo):
+                conflicts.travar([agendamento])
+                encontrados = conflicts.conflitos_de(agendamento)
+                if encontrados:
+                    raise ValidationError([c.mensagem for c in encontrados])
+            alterados = Agendamento.objects.filter(pk=agendamento.pk, status=atual).update(status=novo, updated_at=agora)
+            if not alterados:
+                raise TransicaoInvalida("O status deste agendamento foi alterado por outra pessoa; recarregue a página.")
+            rollups.substituir(antes, rollups.estado_de(agendamento))
+        dashboard.invalidar_agendamentos([agendamento.professor_id])
+        snapshots.invalidar([snapshots.mes_de(agendamento.inicio)])
+        changefeed.registrar([(agendamento.pk, agendamento.professor_id, MudancaAgendamento.ALTERADO)])
+    except ValidationError:
+        agendamento.status = atual
+        raise
+    agendamento.updated_at = agora
+    return True
+
+
+def alterar_status_em_lote(qs, novo):
+    """
+    Passa para `novo`, com um único UPDATE, os agendamentos de `qs` cuja transição é
+    permitida. Reativações que colidiriam com a agenda (no banco ou entre si) ficam de fora.
+    Retorna {"atualizados": [pks], "ignorados": [pks], "conflitos": {pk: [mensagens]}};
+    "ignorados" são os que já estavam em `novo` ou não podem passar para ele.
+    """
+    permitidos = origens(novo)
+    with transaction.atomic():
+        linhas = list(
+            qs.select_for_update(of=("self",))
+            .annotate(duracao=duracao_efetiva(), fim_efetivo=fim_efetivo())
+            .order_by("inicio", "pk")
+            .values("pk", "aluno_id", "aluno__nome", "professor__nome", "fim_efetivo", *rollups.CAMPOS_ESTADO)
+        )
+        aplicar = [linha for linha in linhas if linha["status"] in permitidos]
+        ignorados = [linha["pk"] for linha in linhas if linha["status"] not in permitidos]
+
+        conflitos = {}
+        reativados = [linha for linha in aplicar if reativa(linha["status"], novo)]
+        if reativados:
+            ocupacoes = [
+                conflicts.Ocupacao(
+                    inicio=linha["inicio"],
+                    fim=linha["fim_efetivo"],
+                    pk=linha["pk"],
+                    aluno_id=linha["aluno_id"],
+                    professor_id=linha["professor_id"],
+                    aluno_nome=linha["aluno__nome"],
+                    professor_nome=linha["professor__nome"],
+                )
+                for linha in reativados
+            ]
+            conflicts.travar(ocupacoes)
+            for ocupacao, encontrados in zip(ocupacoes, conflicts.verificar_lote(ocupacoes)):
+                if encontrados:
+                    conflitos[ocupacao.pk] = [c.mensagem for c in encontrados]
+            aplicar = [linha for linha in aplicar if linha["pk"] not in conflitos]
+
+        pks = [linha["pk"] for linha in aplicar]
+        if pks:
+            Agendamento.objects.filter(pk__in=pks).update(status=novo, updated_at=timezone.now())
+            rollups.trocar_status(aplicar, novo)
+            dashboard.invalidar_agendamentos(linha["professor_id"] for linha in aplicar)
+            snapshots.invalidar(snapshots.mes_de(linha["inicio"]) for linha in aplicar)
+            changefeed.registrar((linha["pk"], linha["professor_id"], MudancaAgendamento.ALTERADO) for linha in aplicar)
+    return {"atualizados": pks, "ignorados": ignorados, "conflitos": conflitos}
@@ -0,0 +1,78 @@
+"""
+Versões de dados guardadas no cache, usadas nas chaves dos caches derivados (lista de
+alunos, painéis da home). Cada versão tem um número, que só cresce e entra nas chaves,
+e o instante da última troca, que serve de Last-Modified.
+O número é um contador (cache.incr): rajadas de mudanças não o descolam do relógio. Se a
+entrada some do cache, ele recomeça do instante atual em µs, acima de qualquer valor anterior.
+`trocar` só age no commit da transação em curso: uma requisição concorrente que lesse o
+número novo antes do commit montaria o cache com as linhas antigas, guardado sob ele.
+As versões só valem entre processos com um cache compartilhado (CACHES em core/settings.py);
+os caches derivados têm timeouts curtos para limitar o atraso quando não há.
+"""
+import time
+from functools import partial
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+class Versao(NamedTuple):
+    numero: int
+    modificado: int  # timestamp (s) da última troca
+
+
+def _chave_modificado(key):
+    return f'{key}:modificado'
+
+
+def _inicial():
+    return time.time_ns() // 1000
+
+
+def _versao(valores, key):
+    return Versao(valores[key], valores[_chave_modificado(key)])
+
+
+def numero(key):
+    atual = cache.get(key)
+    if atual is None:
+        cache.add(key, _inicial(), None)
+        atual = cache.get(key)
+    return atual
+
+
+def obter(key):
+    """Número e instante da última troca."""
+    chaves = [key, _chave_modificado(key)]
+    valores = cache.get_many(chaves)
+    if len(valores) < len(chaves):
+        cache.add(key, _inicial(), None)
+        cache.add(_chave_modificado(key), int(time.time()), None)
+        valores = cache.get_many(chaves)
+    return _versao(valores, key)
+
+
+async def aobter(key):
+    """obter() para views assíncronas."""
+    chaves = [key, _chave_modificado(key)]
+    valores = await cache.aget_many(chaves)
+    if len(valores) < len(chaves):
+        await cache.aadd(key, _inicial(), None)
+        await cache.aadd(_chave_modificado(key), int(time.time()), None)
+        valores = await cache.aget_many(chaves)
+    return _versao(valores, key)
+
+
+def _trocar_agora(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:  # ainda não existia (ou saiu do cache)
+            cache.add(key, _inicial(), None)
+        cache.set(_chave_modificado(key), int(time.time()), None)
+
+
+def trocar(*keys):
+    """Troca as versões no commit da transação atual (na hora, fora de transação)."""
+    transaction.on_commit(partial(_trocar_agora, keys))
@@ -0,0 +1,47 @@
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from .. import scheduling
+from ..forms.agendamento_lote_form import AgendamentoLoteForm
+
+
+@login_required
+@permission_required('escola.add_agendamento', raise_exception=True)
+def agendamento_lote(request):
+    """
+    GET: formulário de agendamento recorrente/em lote.
+    POST: expande a recorrência para os alunos, verifica conflitos em uma passada e
+    grava os agendamentos válidos; responde em JSON com o relatório por item.
+    """
+    if request.method != 'POST':
+        return render(request, 'agendamentos/agendamento_lote.html', {'form': AgendamentoLoteForm()})
+
+    form = AgendamentoLoteForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    data = form.cleaned_data
+    horarios = scheduling.expandir_recorrencia(
+        data['data_inicial'], data['data_final'], data['dias_semana'], data['horario'], data['intervalo_semanas']
+    )
+    candidatos = scheduling.montar_candidatos(
+        list(data['alunos']),
+        data['conteudo'],
+        data['professor'],
+        horarios,
+        duracao_minutos=data['duracao_minutos'],
+        observacoes=data['observacoes'],
+        escalonar=data['escalonar'],
+    )
+    criados, relatorio = scheduling.agendar_em_lote(candidatos, tudo_ou_nada=data['tudo_ou_nada'])
+
+    return JsonResponse(
+        {
+            'total': len(candidatos),
+            'criados': len(criados),
+            'conflitos': sum(1 for item in relatorio if item['conflitos']),
+            'itens': relatorio,
+        },
+        status=201 if criados else 200,
+    )
@@ -1,13 +1,10 @@
 from django.http import JsonResponse
-from ..models.aluno import Aluno
+from .. import roster
 
-def load_alunos(request):
+async def load_alunos(request):
     serie = request.GET.get('serie')
     turno = request.GET.get('turno')
+    if not serie or not turno:
+        return JsonResponse([], safe=False)
 
-    alunos = Aluno.objects.filter(
-        serie=serie,
-        turno=turno
-    ).order_by('nome')
-
-    return JsonResponse(list(alunos.values('id', 'nome')), safe=False)
+    return roster.resposta(request, await roster.aconsultar(serie, turno))
@@ -2,26 +2,24 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from ..models.agendamento import Aluno
 from ..forms.aluno_form import AlunoForm
-from django.http import JsonResponse
+from ..forms.aluno_import_form import ImportarAlunosForm
 from ..models.aluno import Aluno
+from .. import roster, roster_import
+
+ITENS_NO_RELATORIO = 200
+
 
 @login_required
-def alunos_json(request):
+async def alunos_json(request):
     """
     GET params: serie (ex: '1'), turno ('M' ou 'T')
-    Retorna JSON list: [{ 'id': 1, 'nome': 'Fulano' }, ...]
+    Retorna JSON list só com alunos ativos: [{ 'id': 1, 'nome': 'Fulano' }, ...]
+    Servido do cache de escola.roster, com ETag/Last-Modified; assíncrona (ORM/cache async).
     """
     serie = request.GET.get("serie")
     turno = request.GET.get("turno")
 
-    qs = Aluno.objects.all().filter(Aluno.is_active==True)
-    if serie:
-        qs = qs.filter(serie=serie)
-    if turno:
-        qs = qs.filter(turno=turno)
-    qs = qs.order_by("nome").values("id", "nome")
-
-    return JsonResponse(list(qs), safe=False)
+    return roster.resposta(request, await roster.aconsultar(serie, turno, is_active=True))
 
 @login_required
 @permission_required('escola.add_aluno', raise_exception=True)
@@ -53,3 +51,29 @@ def aluno_edit(request, pk):
 def alunos_list(request):
     alunos = Aluno.objects.all()
     return render(request, 'alunos/alunos_list.html', {'alunos': alunos})
+
+@login_required
+@permission_required(['escola.add_aluno', 'escola.change_aluno'], raise_exception=True)
+def alunos_importar(request):
+    """Importação em lote (CSV/XLSX); por padrão só simula e mostra a diferença (ver escola.roster_import)."""
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarAlunosForm(request.POST, request.FILES)
+        if form.is_valid():
+            arquivo = form.cleaned_data['arquivo']
+            try:
+                resultado = roster_import.importar(
+                    arquivo,
+                    arquivo.name,
+                    desativar_ausentes=form.cleaned_data['desativar_ausentes'],
+                    simular=form.cleaned_data['simular'],
+                )
+            except roster_import.ErroImportacao as exc:
+                form.add_error('arquivo', str(exc))
+    else:
+        form = ImportarAlunosForm()
+    return render(request, 'alunos/alunos_importar.html', {
+        'form': form,
+        'resultado': resultado,
+        'limite': ITENS_NO_RELATORIO,
+    })
@@ -0,0 +1,54 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .. import availability
+from ..forms.disponibilidade_form import DisponibilidadeForm
+
+
+@login_required
+@permission_required('escola.view_agendamento', raise_exception=True)
+def horarios_disponiveis(request):
+    """
+    Próximos horários livres em comum para um professor e um aluno.
+    GET params: professor, aluno, conteudo (obrigatórios); duracao_minutos (padrão: a do conteúdo),
+    data_inicial (padrão: agora), dias (janela, máx. 62), quantidade, passo_minutos, das/ate (expediente)
+    Professores só consultam a própria agenda.
+    """
+    form = DisponibilidadeForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
+
+    papel = request.escola_role
+    professor = data['professor']
+    if papel.eh_professor and not (request.user.is_superuser or papel.eh_coordenacao) and professor != papel.professor:
+        return JsonResponse({'errors': {'professor': ['Você só pode consultar a sua agenda.']}}, status=403)
+
+    agora = timezone.now()
+    inicio = agora
+    if data['data_inicial']:
+        inicio = max(agora, timezone.make_aware(datetime.combine(data['data_inicial'], time.min)))
+    fim = inicio + timedelta(days=data['dias'] or 30)
+    duracao = timedelta(minutes=data['duracao_minutos'] or data['conteudo'].duracao_minutos)
+
+    livres = availability.horarios_livres(
+        professor.pk,
+        data['aluno'].pk,
+        duracao,
+        inicio,
+        fim,
+        quantidade=data['quantidade'] or 10,
+        passo=timedelta(minutes=data['passo_minutos'] or 30),
+        hora_inicial=data['das'],
+        hora_final=data['ate'],
+    )
+    return JsonResponse({
+        'duracao_minutos': int(duracao.total_seconds() // 60),
+        'horarios': [
+            {'inicio': timezone.localtime(ini).isoformat(), 'fim': timezone.localtime(f).isoformat()}
+            for ini, f in livres
+        ],
+    })
@@ -0,0 +1,117 @@
+"""
+Feed de mudanças dos agendamentos (escola.changefeed) para os tablets das salas:
+JSON ou NDJSON com long-poll opcional, e Server-Sent Events. As views são assíncronas
+para que, servidas por core/asgi.py, uma conexão esperando mudanças não ocupe uma thread.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+
+from .. import changefeed
+from ..report_sections import codificar
+
+_lote = sync_to_async(changefeed.lote)
+_escopo_de = sync_to_async(changefeed.escopo_de)
+
+
+def _erro(exc):
+    status = 410 if isinstance(exc, changefeed.CursorExpirado) else 400
+    return JsonResponse({'erro': str(exc)}, status=status)
+
+
+def _parametros(request):
+    """(limite, esperar) da query string; ValueError se inválidos."""
+    limite = int(request.GET.get('limite', changefeed.LIMITE_PADRAO))
+    esperar = float(request.GET.get('esperar', 0))
+    if not 1 <= limite <= changefeed.LIMITE_MAXIMO or esperar < 0:
+        raise ValueError
+    return limite, min(esperar, changefeed.ESPERA_MAXIMA)
+
+
+def _quer_ndjson(request):
+    return request.GET.get('formato') == 'ndjson' or request.headers.get('Accept', '').startswith('application/x-ndjson')
+
+
+@login_required
+async def agendamentos_feed(request):
+    """
+    Mudanças dos agendamentos visíveis ao usuário depois do cursor.
+    GET params: cursor (vazio na primeira sincronização), limite (máx. LIMITE_MAXIMO),
+    esperar=segundos para segurar a resposta até haver mudança (long-poll, máx. ESPERA_MAXIMA),
+    formato=ndjson (ou Accept: application/x-ndjson) para um evento por linha.
+    """
+    escopo = await _escopo_de(await request.auser())
+    try:
+        limite, esperar = _parametros(request)
+    except ValueError:
+        return JsonResponse({'erro': 'limite/esperar inválidos.'}, status=400)
+
+    cursor = request.GET.get('cursor') or None
+    prazo = time.monotonic() + esperar
+    try:
+        resultado = await _lote(escopo, cursor, limite)
+        while not resultado.eventos and time.monotonic() + changefeed.INTERVALO_CONSULTA <= prazo:
+            await asyncio.sleep(changefeed.INTERVALO_CONSULTA)
+            resultado = await _lote(escopo, resultado.cursor, limite)
+    except (changefeed.CursorInvalido, changefeed.CursorExpirado) as exc:
+        return _erro(exc)
+
+    fim = {'cursor': resultado.cursor, 'has_more': resultado.has_more}
+    if _quer_ndjson(request):
+        corpo = b''.join(codificar(item) + b'\n' for item in [*resultado.eventos, fim])
+        response = HttpResponse(corpo, content_type='application/x-ndjson')
+    else:
+        response = HttpResponse(codificar({'results': resultado.eventos, **fim}), content_type='application/json')
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
+
+def _evento_sse(resultado):
+    dados = codificar({'results': resultado.eventos, 'has_more': resultado.has_more}).decode()
+    return f'id: {resultado.cursor}\nevent: mudancas\ndata: {dados}\n\n'.encode()
+
+
+@login_required
+async def agendamentos_eventos(request):
+    """
+    Server-Sent Events com as mudanças dos agendamentos visíveis ao usuário. Cada evento
+    "mudancas" leva o cursor no id, então o EventSource retoma de onde parou
+    (Last-Event-ID) ao reconectar; a conexão é encerrada após DURACAO_SSE.
+    """
+    escopo = await _escopo_de(await request.auser())
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('cursor') or None
+    try:
+        primeiro = await _lote(escopo, cursor, changefeed.LIMITE_PADRAO)
+    except (changefeed.CursorInvalido, changefeed.CursorExpirado) as exc:
+        return _erro(exc)
+
+    async def eventos():
+        encerrar = time.monotonic() + changefeed.DURACAO_SSE
+        ultimo_envio = time.monotonic()
+        resultado = primeiro
+        # sem cursor, o cliente precisa do primeiro mesmo que não haja mudanças
+        enviar = cursor is None
+        yield f'retry: {int(changefeed.INTERVALO_CONSULTA * 1000)}\n\n'.encode()
+        while True:
+            if resultado.eventos or enviar:
+                yield _evento_sse(resultado)
+                enviar = False
+                ultimo_envio = time.monotonic()
+            elif time.monotonic() - ultimo_envio >= changefeed.ESPERA_MAXIMA:
+                # mantém a conexão ociosa aberta nos proxies e renova o Last-Event-ID
+                yield f'id: {resultado.cursor}\nevent: ping\ndata: \n\n'.encode()
+                ultimo_envio = time.monotonic()
+            if time.monotonic() >= encerrar:
+                return
+            if not resultado.has_more:
+                await asyncio.sleep(changefeed.INTERVALO_CONSULTA)
+            resultado = await _lote(escopo, resultado.cursor, changefeed.LIMITE_PADRAO)
+
+    response = StreamingHttpResponse(eventos(), content_type='text/event-stream')
+    response['X-Accel-Buffering'] = 'no'
+    patch_cache_control(response, private=True, no_store=True)
+    return response
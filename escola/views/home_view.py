@@ -1,43 +1,111 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.urls import reverse_lazy
-from ..models.agendamento import Agendamento, Professor
+from .. import dashboard, pagination, roles, transitions
+from ..models.agendamento import Agendamento
 from ..forms.agendamento_form import AgendamentoForm
-from django.http import HttpResponseBadRequest
+from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.safestring import mark_safe
 from django.utils import timezone
+from datetime import datetime, time
+import hashlib
+
+# Limite de agendamentos por pedido de mudança de status em lote.
+MAX_STATUS_EM_LOTE = 500
+
+
+def _pagina_keyset(request, qs, por_pagina=20):
+    return pagination.paginar_keyset(
+        qs,
+        cursor=request.GET.get('cursor'),
+        por_pagina=pagination.tamanho_da_pagina(request.GET.get('por_pagina'), por_pagina),
+        contar=request.GET.get('contar') == '1',
+    )
+
+
+def _inicio_de_hoje():
+    """Meia-noite local de hoje: `inicio__gte` usa o índice, ao contrário de `inicio__date__gte`."""
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def _visiveis(user, papel):
+    """Agendamentos que o usuário pode ver: todos (Diretoria/Coordenação/admin) ou os do professor."""
+    qs = Agendamento.objects.select_related('aluno', 'conteudo', 'professor')
+    if user.is_superuser or papel.eh_diretoria or papel.eh_coordenacao:
+        return qs
+    if papel.eh_professor and papel.professor is not None:
+        return qs.filter(professor=papel.professor)
+    return Agendamento.objects.none()
+
+
+def _agendamentos_visiveis(request):
+    return _visiveis(request.user, request.escola_role)
+
+
+def _responder_painel(request, template, painel, contexto):
+    """Home com o painel vindo do cache; 304 quando o navegador já tem esta versão da página."""
+    # usuário e segredo CSRF também estão na página, fora do painel
+    identidade = f"{painel.etag}:{request.user.pk}:{request.META.get('CSRF_COOKIE', '')}"
+    etag = f'"{hashlib.sha1(identidade.encode()).hexdigest()}"'
+    # mensagens pendentes precisam ser exibidas: nada de 304
+    if not len(messages.get_messages(request)):
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
+    response = render(request, template, {**contexto, 'painel': mark_safe(painel.html)})
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 
 @login_required
 def home(request):
     user = request.user
+    papel = request.escola_role
 
-    if user.is_superuser or user.groups.filter(name="Diretoria").exists():
+    if user.is_superuser or papel.eh_diretoria:
         return redirect('/admin/')
 
-    if user.groups.filter(name="Coordenação").exists():
-        agendamentos = Agendamento.objects.select_related('aluno', 'conteudo', 'professor').all()
-        today = timezone.localdate()
-        filtro = agendamentos.filter(inicio__date__gte=today, aluno__is_active=True)
-        return render(request, 'home/home_coordenacao.html', {'agendamentos': filtro})
-
-    if user.groups.filter(name="Professor").exists():
-        prof = None
-        try:
-            prof = Professor.objects.get(user=user)
-        except Professor.DoesNotExist:
-            try:
-                nome = user.get_full_name() or user.username
-                prof = Professor.objects.get(nome__iexact=nome)
-            except Professor.DoesNotExist:
-                prof = None
-
-        if prof:
-            today = timezone.localdate()
-            agendamentos = Agendamento.objects.select_related('aluno', 'conteudo').filter(professor=prof,inicio__date__gte=today, aluno__is_active=True)
-        else:
-            agendamentos = Agendamento.objects.none()
-        return render(request, 'home/home_professor.html', {'agendamentos': agendamentos, 'professor': prof})
+    if papel.eh_coordenacao:
+        def montar():
+            agendamentos = Agendamento.objects.select_related('aluno', 'conteudo', 'professor').all()
+            filtro = agendamentos.filter(inicio__gte=_inicio_de_hoje(), aluno__is_active=True)
+            pagina = _pagina_keyset(request, filtro, por_pagina=50)
+            return render_to_string('home/_painel_coordenacao.html', {
+                'agendamentos': pagina.object_list,
+                'linhas': dashboard.linhas(pagina.object_list, 'home/_linha_coordenacao.html'),
+                'page_obj': pagina,
+            }, request=request)
+
+        parametros = {chave: request.GET[chave] for chave in ('cursor', 'por_pagina', 'contar') if chave in request.GET}
+        painel = dashboard.painel('coordenacao', parametros, montar)
+        return _responder_painel(request, 'home/home_coordenacao.html', painel, {})
+
+    if papel.eh_professor:
+        prof = papel.professor
+
+        def montar():
+            if prof:
+                agendamentos = Agendamento.objects.select_related('aluno', 'conteudo').filter(professor=prof, inicio__gte=_inicio_de_hoje(), aluno__is_active=True)
+            else:
+                agendamentos = Agendamento.objects.none()
+            return render_to_string('home/_painel_professor.html', {
+                'agendamentos': agendamentos,
+                'linhas': dashboard.linhas(agendamentos, 'home/_linha_professor.html'),
+            })
+
+        painel = dashboard.painel(f'professor:{prof.pk}', {}, montar) if prof else dashboard.Painel(montar(), '')
+        return _responder_painel(request, 'home/home_professor.html', painel, {
+            'professor': prof, 'status_choices': Agendamento.STATUS_CHOICES,
+        })
 
     return render(request, 'home/home_default.html')
 
@@ -49,21 +117,38 @@ class AgendamentoListView(LoginRequiredMixin, ListView):
     context_object_name = 'agendamentos'
 
     def get_queryset(self):
-        qs = super().get_queryset().select_related('aluno', 'conteudo', 'professor')
-        user = self.request.user
-
-        if user.is_superuser or user.groups.filter(name='Coordenação').exists():
-            return qs
-        if user.groups.filter(name='professor').exists():
-            try:
-                prof = Professor.objects.get(user=user)
-            except Professor.DoesNotExist:
-                try:
-                    prof = Professor.objects.get(nome__iexact=user.get_full_name() or user.username)
-                except Professor.DoesNotExist:
-                    return Agendamento.objects.none()
-            return qs.filter(Professor=prof)
-        return Agendamento.objects.none()
+        return _agendamentos_visiveis(self.request)
+
+    def paginate_queryset(self, queryset, page_size):
+        # keyset em vez de OFFSET: sem COUNT(*) e com custo constante em páginas profundas
+        pagina = _pagina_keyset(self.request, queryset, page_size)
+        return None, pagina, pagina.object_list, pagina.has_next or pagina.has_previous
+
+
+@login_required
+def agendamentos_json(request):
+    """
+    Lista paginada por cursor dos agendamentos visíveis ao usuário.
+    GET params: cursor, por_pagina (máx. 100), contar=1 para incluir o total (aproximado no Postgres)
+    """
+    pagina = _pagina_keyset(request, _agendamentos_visiveis(request))
+    return JsonResponse({
+        'results': [
+            {
+                'id': ag.pk,
+                'inicio': ag.inicio,
+                'fim': ag.fim,
+                'status': ag.status,
+                'aluno': ag.aluno.nome,
+                'conteudo': ag.conteudo.nome,
+                'professor': ag.professor.nome,
+            }
+            for ag in pagina
+        ],
+        'next': pagina.next_cursor,
+        'previous': pagina.previous_cursor,
+        'count': pagina.total,
+    })
 
 
 class AgendamentoCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
@@ -103,33 +188,72 @@ class AgendamentoDetailView(LoginRequiredMixin, DetailView):
     template_name = 'agendamentos/agendamento_detail.html'
 
 
+def _quer_json(request):
+    return request.headers.get('Accept', '').startswith('application/json')
+
+
 @login_required
-def alterar_status_agendamento(request, pk):
+async def alterar_status_agendamento(request, pk):
     """
-    Altera o status de um agendamento.
+    Altera o status de um agendamento (escola.transitions: só status/updated_at são gravados).
     - Somente POST é aceito.
     - Professor só pode alterar seus próprios agendamentos.
-    - Coordenação e Admin podem alterar qualquer agendamento.
+    - Diretoria, Coordenação e Admin podem alterar qualquer agendamento.
+    Assíncrona: a busca usa o ORM assíncrono; a transição (transação) roda em thread.
     """
     if request.method != 'POST':
         return HttpResponseBadRequest("Apenas POST permitido.")
 
     novo_status = request.POST.get('status')
-    allowed_status = [s[0] for s in Agendamento.STATUS_CHOICES]
-    if novo_status not in allowed_status:
+    if novo_status not in transitions.ROTULOS:
         return HttpResponseBadRequest("Status inválido.")
 
-    agendamento = get_object_or_404(Agendamento, pk=pk)
-    user = request.user
-
-    if user.groups.filter(name='Professor').exists():
-        try:
-            prof = Professor.objects.get(user=user)
-        except Professor.DoesNotExist:
-            return redirect('agendamentos:home')
-        if agendamento.professor != prof:
+    user = await request.auser()
+    papel = await roles.apapel_de(user)
+    # uma query: o filtro de visibilidade já restringe o professor aos seus agendamentos
+    agendamento = await _visiveis(user, papel).filter(pk=pk).afirst()
+    if agendamento is None:
+        if papel.eh_professor:
             return redirect('agendamentos:home')
+        raise Http404("Agendamento não encontrado.")
+    try:
+        await sync_to_async(transitions.alterar_status)(agendamento, novo_status)
+    except ValidationError as exc:
+        messages.error(request, ' '.join(exc.messages))
+    return redirect('agendamentos:home')
+
+
+@login_required
+def alterar_status_em_lote(request):
+    """
+    Aplica um status a vários agendamentos visíveis ao usuário com um único UPDATE.
+    POST: status e ids (repetido). Responde em JSON se pedido (Accept: application/json);
+    senão volta para a home com um resumo.
+    """
+    if request.method != 'POST':
+        return HttpResponseBadRequest("Apenas POST permitido.")
+
+    novo_status = request.POST.get('status')
+    if novo_status not in transitions.ROTULOS:
+        return HttpResponseBadRequest("Status inválido.")
+    try:
+        ids = {int(valor) for valor in request.POST.getlist('ids')}
+    except ValueError:
+        return HttpResponseBadRequest("ids inválidos.")
+    if not ids or len(ids) > MAX_STATUS_EM_LOTE:
+        return HttpResponseBadRequest(f"Informe de 1 a {MAX_STATUS_EM_LOTE} agendamentos.")
+
+    visiveis = _agendamentos_visiveis(request).filter(pk__in=ids)
+    resultado = transitions.alterar_status_em_lote(visiveis, novo_status)
+    resultado['nao_encontrados'] = sorted(
+        ids.difference(resultado['atualizados'], resultado['ignorados'], resultado['conflitos'])
+    )
+    if _quer_json(request):
+        return JsonResponse(resultado)
 
-    agendamento.status = novo_status
-    agendamento.save()
+    messages.success(request, f"{len(resultado['atualizados'])} agendamento(s) atualizado(s).")
+    for pk, mensagens in resultado['conflitos'].items():
+        messages.error(request, f"Agendamento {pk}: {' '.join(mensagens)}")
+    if resultado['ignorados']:
+        messages.warning(request, f"{len(resultado['ignorados'])} agendamento(s) não podem passar para esse status.")
     return redirect('agendamentos:home')
@@ -0,0 +1,33 @@
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, JsonResponse
+
+from .. import instrumentation
+
+
+@login_required
+def instrumentacao_piores(request):
+    """
+    Piores views pelas amostras da instrumentação (só staff).
+    GET params: ordenar (uma de instrumentation.METRICAS, padrão total_ms), limite (padrão 20)
+    e recentes (quantas amostras cruas devolver, padrão 0).
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    ordenar = request.GET.get("ordenar", "total_ms")
+    try:
+        limite = int(request.GET.get("limite", 20))
+        recentes = int(request.GET.get("recentes", 0))
+    except ValueError:
+        return HttpResponseBadRequest("limite e recentes devem ser inteiros.")
+    if ordenar not in instrumentation.METRICAS:
+        return HttpResponseBadRequest("Métrica inválida.")
+
+    amostras = instrumentation.amostras()
+    amostras.sort(key=lambda amostra: amostra["em"])
+    return JsonResponse({
+        "amostras": len(amostras),
+        "taxa": instrumentation.taxa(),
+        "piores": instrumentation.piores(amostras, ordenar=ordenar, limite=limite),
+        "recentes": amostras[-recentes:] if recentes > 0 else [],
+    })
@@ -1,16 +1,16 @@
 # app_ajuda_agente/escola/views/relatorio_view.py
-import io
-from datetime import datetime, time
-import pandas as pd
+import json
+from datetime import datetime
 
-from django.http import HttpResponse, JsonResponse
-from django.utils import timezone
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required, permission_required
-from django.shortcuts import render
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
 
+from escola import assincrono, jobs, pagination, report_sections, reports
 from escola.forms.relatorio_form import RelatorioForm
-from escola.models.agendamento import Agendamento
+from escola.models.report_job import ReportJob
 
 #PARSE DE DATAS 
 def _parse_date(date_str):
@@ -38,139 +38,77 @@ def _generate_report_data(start_date, end_date):
     start_date, end_date: datetime.date (se None, default é últimos 30 dias)
     Retorna dict com chaves:
       resumo, by_professor, by_aluno, by_conteudo, monthly, agendamentos_rows
+    As agregações são feitas no banco (ver escola.reports.gerar_relatorio).
     """
-    if not start_date and not end_date:
-        end_dt = timezone.localdate()
-        start_dt = end_dt - pd.Timedelta(days=30)
-    else:
-        end_dt = end_date or timezone.localdate()
-        start_dt = start_date or (end_dt - pd.Timedelta(days=30))
+    return reports.gerar_relatorio(start_date, end_date)
 
-    start_dt_dt = datetime.combine(start_dt, time.min)
-    end_dt_dt = datetime.combine(end_dt, time.max)
 
-    try:
-        start_dt_dt = timezone.make_aware(start_dt_dt)
-        end_dt_dt = timezone.make_aware(end_dt_dt)
-    except Exception:
-        pass
-
-    qs = (
-        Agendamento.objects.select_related("aluno", "conteudo", "professor")
-        .filter(inicio__gte=start_dt_dt, inicio__lte=end_dt_dt)
-        .order_by("inicio")
-    )
 
-    rows = []
-    for ag in qs:
-        aluno = getattr(ag, "aluno", None)
-        conteudo = getattr(ag, "conteudo", None)
-        prof = getattr(ag, "professor", None)
-        rows.append(
-            {
-                "id": ag.id,
-                "inicio": ag.inicio,
-                "duracao_minutos": ag.duracao_minutos or 0,
-                "status": ag.status,
-                "aluno": aluno.nome if aluno else "",
-                "serie": aluno.serie if aluno else "",
-                "turno": aluno.turno if aluno else "",
-                "professor": prof.nome if prof else "",
-                "especialidade": prof.especialidade if prof else "",
-                "conteudo": conteudo.nome if conteudo else "",
-                "descritor": conteudo.descritor if conteudo else "",
-            }
-        )
+# JOBS EM SEGUNDO PLANO
 
-    df = pd.DataFrame(rows)
-    if df.empty:
-        df = pd.DataFrame(
-            columns=[
-                "id",
-                "inicio",
-                "duracao_minutos",
-                "status",
-                "aluno",
-                "serie",
-                "turno",
-                "professor",
-                "especialidade",
-                "conteudo",
-                "descritor",
-            ]
-        )
+PERMISSOES_POR_FORMATO = {
+    "dados": ("escola.view_relatorio", "escola.export_relatorio"),
+    "xlsx": ("escola.view_agendamento",),
+    "csv": ("escola.view_agendamento",),
+    "zip": ("escola.view_agendamento",),
+}
 
-    # Cálculos e transformações
-    df["duracao_horas"] = df["duracao_minutos"].fillna(0) / 60
-    df["inicio"] = pd.to_datetime(df["inicio"], errors="coerce").dt.tz_localize(None)
-    df["mes"] = df["inicio"].dt.to_period("M").astype(str)
-
-    total_agendamentos = len(df)
-    total_horas = df["duracao_horas"].sum()
-    media_duracao = df["duracao_minutos"].mean() if total_agendamentos else 0
-
-    # Agrupamentos (DataFrames)
-    by_professor = (
-        df.groupby("professor")
-        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
-        .reset_index()
-        .sort_values("agendamentos", ascending=False)
-    )
 
-    by_aluno = (
-        df.groupby("aluno")
-        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
-        .reset_index()
-        .sort_values("agendamentos", ascending=False)
-    )
+def _job_status(job):
+    status = {
+        "job": job.pk,
+        "formato": job.formato,
+        "status": job.status,
+        "progresso": job.progresso,
+        "erro": job.erro,
+        "status_url": reverse("relatorios:relatorio_job_status", args=[job.pk]),
+        "download_url": None,
+    }
+    if job.status == "CONCLUIDO":
+        status["download_url"] = reverse("relatorios:relatorio_job_download", args=[job.pk])
+    return status
 
-    by_conteudo = (
-        df.groupby("conteudo")
-        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
-        .reset_index()
-        .sort_values("agendamentos", ascending=False)
-    )
 
-    monthly = (
-        df.groupby("mes")
-        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
-        .reset_index()
-        .sort_values("mes")
-    )
+def _get_job(request, pk):
+    job = get_object_or_404(ReportJob, pk=pk)
+    if not any(request.user.has_perm(perm) for perm in PERMISSOES_POR_FORMATO[job.formato]):
+        raise PermissionDenied
+    return job
 
-    resumo = {
-        "periodo_inicial": start_dt,
-        "periodo_final": end_dt,
-        "total_agendamentos": int(total_agendamentos),
-        "total_horas": round(float(total_horas), 2),
-        "media_duracao_min": round(float(media_duracao or 0), 1),
-    }
 
-    def df_to_list(df_obj, cols=None):
-        if df_obj is None:
-            return []
-        if cols:
-            df_obj = df_obj[cols]
-        return df_obj.fillna("").to_dict(orient="records")
-
-    return {
-        "resumo": resumo,
-        "by_professor": df_to_list(by_professor, cols=["professor", "agendamentos", "horas"]),
-        "by_aluno": df_to_list(by_aluno, cols=["aluno", "agendamentos", "horas"]),
-        "by_conteudo": df_to_list(by_conteudo, cols=["conteudo", "agendamentos", "horas"]),
-        "monthly": df_to_list(monthly, cols=["mes", "agendamentos", "horas"]),
-        "agendamentos_rows": df.fillna("").to_dict(orient="records"),
-    }
+@login_required
+def relatorio_job_status(request, pk):
+    """Status e progresso de um ReportJob, para polling."""
+    return JsonResponse(_job_status(_get_job(request, pk)))
+
+
+@login_required
+def relatorio_job_download(request, pk):
+    """Baixa o resultado de um ReportJob concluído."""
+    job = _get_job(request, pk)
+    if job.status != "CONCLUIDO":
+        return JsonResponse(_job_status(job), status=409)
+    return FileResponse(
+        job.arquivo.open("rb"),
+        as_attachment=True,
+        filename=jobs.nome_arquivo(job),
+        content_type=jobs.CONTENT_TYPES[job.formato],
+    )
 
 
 
 # INTERFACE
 
+RELATORIO_POR_PAGINA = 25
+
+
 @login_required
 @permission_required("escola.view_relatorio", raise_exception=True)
 def relatorio_conteudos(request):
     """
     Renderiza a página HTML com o formulário e as abas (Resumo / Por professor / Por conteúdo / Por aluno / Mensal).
+    Só o resumo é calculado aqui; as demais abas são carregadas sob demanda pelo endpoint de
+    seções. A tabela de agendamentos é paginada no banco por cursor.
     """
     form = RelatorioForm(request.GET or None)
     context = {"form": form}
@@ -178,20 +116,17 @@ def relatorio_conteudos(request):
     if form.is_valid():
         start = form.cleaned_data.get("start")
         end = form.cleaned_data.get("end")
-        report = _generate_report_data(start, end)
-        context.update(report)
-
-        
-        page = request.GET.get("page", 1)
-        per_page = 25
-        paginator = Paginator(context["agendamentos_rows"], per_page)
-        try:
-            page_obj = paginator.page(page)
-        except PageNotAnInteger:
-            page_obj = paginator.page(1)
-        except EmptyPage:
-            page_obj = paginator.page(paginator.num_pages)
-
+        # só o resumo vem com a página; as outras abas são buscadas ao abrir (relatorio_conteudos_secao)
+        context["resumo"] = json.loads(report_sections.obter("resumo", start, end).corpo)
+
+        _, _, start_dt_dt, end_dt_dt = reports.resolver_periodo(start, end)
+        page_obj = pagination.paginar_keyset(
+            reports.agendamentos_do_periodo(start_dt_dt, end_dt_dt),
+            cursor=request.GET.get("cursor"),
+            por_pagina=RELATORIO_POR_PAGINA,
+            decrescente=False,
+        )
+        page_obj.object_list = [reports.linha_de(ag) for ag in page_obj.object_list]
         context["agendamentos_page"] = page_obj
 
     return render(request, "relatorio/relatorio_conteudos.html", context)
@@ -201,19 +136,47 @@ def relatorio_conteudos(request):
 # ENDPOINT
 @login_required
 @permission_required("escola.export_relatorio", raise_exception=True)
-def relatorio_conteudos_json(request):
+async def relatorio_conteudos_json(request):
     """
     Retorna os dados do relatório em JSON — útil para chamadas AJAX que preencham as abas
     sem recarregar a página inteira.
     Parâmetros: start (YYYY-MM-DD), end (YYYY-MM-DD)
+    Se o relatório do período ainda não foi gerado, enfileira o job e responde 202 com o status.
+    Assíncrona: a consulta do job usa o ORM assíncrono; o resultado sai do arquivo em streaming.
     """
     start_param = request.GET.get("start")
     end_param = request.GET.get("end")
     start_date = _parse_date(start_param)
     end_date = _parse_date(end_param)
 
-    report = _generate_report_data(start_date, end_date)
-    return JsonResponse(report, safe=False)
+    job = await jobs.asolicitar("dados", start_date, end_date, await request.auser())
+    if job.status != "CONCLUIDO":
+        return JsonResponse(_job_status(job), status=202)
+    return StreamingHttpResponse(jobs.adados(job), content_type="application/json")
+
+
+
+@login_required
+@permission_required("escola.view_relatorio", raise_exception=True)
+async def relatorio_conteudos_secao(request, secao):
+    """
+    Uma seção do relatório em JSON (ver escola.report_sections), calculada só quando pedida,
+    no pool de threads de escola.assincrono.
+    Seções: resumo, by_professor, by_aluno, by_conteudo, monthly e rows (paginada por cursor).
+    Parâmetros: start, end (YYYY-MM-DD); em rows também cursor e por_pagina.
+    """
+    if secao not in report_sections.SECOES:
+        return HttpResponseBadRequest("Seção inválida.")
+
+    item = await assincrono.em_thread(
+        report_sections.obter,
+        secao,
+        _parse_date(request.GET.get("start")),
+        _parse_date(request.GET.get("end")),
+        cursor=request.GET.get("cursor"),
+        por_pagina=pagination.tamanho_da_pagina(request.GET.get("por_pagina"), report_sections.LINHAS_POR_PAGINA),
+    )
+    return report_sections.resposta(request, item)
 
 
 
@@ -223,55 +186,21 @@ def relatorio_conteudos_json(request):
 @permission_required("escola.view_agendamento", raise_exception=True)
 def export_relatorio_excel(request):
     """
-    Gera um arquivo Excel com múltiplas abas, reutilizando os mesmos cálculos do helper.
-    Parâmetros: start (YYYY-MM-DD), end (YYYY-MM-DD)
+    Exporta o relatório gerado em segundo plano (ver escola.jobs).
+    Parâmetros: start (YYYY-MM-DD), end (YYYY-MM-DD) e formato:
+      xlsx (padrão, múltiplas abas), csv (só os agendamentos) ou zip (um CSV por aba)
+    Com o arquivo pronto, responde com o download; senão enfileira o job e responde 202 com o status.
     """
     start_param = request.GET.get("start")
     end_param = request.GET.get("end")
     start_date = _parse_date(start_param)
     end_date = _parse_date(end_param)
 
-    report_data = _generate_report_data(start_date, end_date)
-
-    resumo_df = pd.DataFrame([report_data["resumo"]])
-    by_prof_df = pd.DataFrame(report_data["by_professor"])
-    by_aluno_df = pd.DataFrame(report_data["by_aluno"])
-    by_conteudo_df = pd.DataFrame(report_data["by_conteudo"])
-    monthly_df = pd.DataFrame(report_data["monthly"])
-
-    agendamentos_df = pd.DataFrame(report_data["agendamentos_rows"])
-    desired_cols = [
-        "id",
-        "inicio",
-        "duracao_minutos",
-        "status",
-        "aluno",
-        "serie",
-        "turno",
-        "professor",
-        "especialidade",
-        "conteudo",
-        "descritor",
-    ]
-    agendamentos_df = agendamentos_df.reindex(columns=desired_cols)
-
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter", datetime_format="yyyy-mm-dd HH:MM") as writer:
-        agendamentos_df.to_excel(writer, sheet_name="Agendamentos", index=False)
-        resumo_df.to_excel(writer, sheet_name="Resumo", index=False)
-        by_prof_df.to_excel(writer, sheet_name="Por Professor", index=False)
-        by_aluno_df.to_excel(writer, sheet_name="Por Aluno", index=False)
-        by_conteudo_df.to_excel(writer, sheet_name="Por Conteúdo", index=False)
-        monthly_df.to_excel(writer, sheet_name="Mensal", index=False)
-
-    buffer.seek(0)
-    start_label = start_date or timezone.localdate()
-    end_label = end_date or timezone.localdate()
-    filename = f"relatorio_agendamentos_{start_label}_{end_label}.xlsx"
-
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    formato = request.GET.get("formato", "xlsx")
+    if formato not in jobs.GERADORES:
+        return HttpResponseBadRequest("Formato inválido.")
+
+    job = jobs.solicitar(formato, start_date, end_date, request.user)
+    if job.status != "CONCLUIDO":
+        return JsonResponse(_job_status(job), status=202)
+    return relatorio_job_download(request, job.pk)
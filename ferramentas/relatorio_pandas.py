@@ -0,0 +1,365 @@
+"""
+Benchmark do relatório em pandas, fora do app: compara a implementação original (uma lista
+de dicts por linha e um groupby por quebra) com um motor vetorizado sobre linhas sintéticas,
+sem banco. O relatório da aplicação é o de escola.reports, agregado no banco; este módulo não
+é importado por ela. A implementação original também serve de referência para
+escola/tests/test_relatorio_paridade.py.
+
+Motor vetorizado: as linhas entram como tuplas só com ids das FKs; nomes, série, turno etc.
+entram como Categorical cujos códigos saem desses ids. Todas as quebras saem de um único
+groupby e as linhas detalhadas só são montadas quando alguém as percorre (LinhasAgendamentos).
+
+Uso (na raiz do projeto):
+    python -m ferramentas.relatorio_pandas --linhas 10000 100000 1000000
+"""
+import argparse
+import gc
+import os
+import random
+import time
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+import django
+import numpy as np
+import pandas as pd
+from django.apps import apps
+
+if not apps.ready:  # rodando como script
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+
+from escola import reports  # noqa: E402
+from escola.models.agendamento import Agendamento  # noqa: E402
+
+CAMPOS = ("id", "inicio", "duracao", "status", "aluno_id", "professor_id", "conteudo_id")
+COLUNAS_TEXTO = ("status", "aluno", "serie", "turno", "professor", "especialidade", "conteudo", "descritor")
+# Mesma ordem de reports.montar_linha.
+COLUNAS = ("id", "inicio", "duracao_minutos") + COLUNAS_TEXTO
+CHUNK_LINHAS = 20000
+
+STATUS = [valor for valor, _ in Agendamento.STATUS_CHOICES]
+
+
+def _categorica(fks, ids, valores):
+    """Categorical da coluna: cada id do cadastro aponta para o código do seu valor (nulos viram "")."""
+    categorias, codigos = np.unique(np.array([v or "" for v in valores], dtype=object), return_inverse=True)
+    tabela = np.full(max(ids, default=0) + 1, -1, dtype="int64")
+    tabela[list(ids)] = codigos
+    return pd.Categorical.from_codes(tabela[fks], categories=categorias)
+
+
+def montar_frame(tuplas, cadastros):
+    """
+    DataFrame colunar a partir de tuplas na ordem de CAMPOS, transpostas em blocos.
+    `cadastros`: {coluna da FK: (ids, {coluna do relatório: valores na ordem dos ids})}.
+    """
+    listas = tuple([] for _ in CAMPOS)
+    tuplas = iter(tuplas)
+    while bloco := list(islice(tuplas, CHUNK_LINHAS)):
+        for lista, coluna in zip(listas, zip(*bloco)):
+            lista.extend(coluna)
+
+    ids, inicios, duracoes, status, *fks = listas
+    frame = {
+        "id": np.array(ids, dtype="int64"),
+        "inicio": pd.to_datetime(pd.Series(inicios, dtype=object), utc=True).dt.tz_localize(None),
+        "duracao_minutos": pd.Series(duracoes, dtype="float64").fillna(0),
+        "status": pd.Categorical(status),
+    }
+    for fk, lista in zip(CAMPOS[4:], fks):
+        fk_ids, valores = cadastros[fk]
+        codigos = np.array(lista, dtype="int64")
+        frame.update((coluna, _categorica(codigos, fk_ids, vals)) for coluna, vals in valores.items())
+    return pd.DataFrame(frame, columns=COLUNAS)
+
+
+class LinhasAgendamentos(Sequence):
+    """`agendamentos_rows` preguiçoso: os dicts só são criados ao iterar/indexar."""
+
+    def __init__(self, df):
+        self._df = df
+
+    def __len__(self):
+        return len(self._df)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return list(self._linhas(self._df.iloc[indice]))
+        return next(self._linhas(self._df.iloc[[indice]]))
+
+    def __iter__(self):
+        for inicio in range(0, len(self._df), CHUNK_LINHAS):
+            yield from self._linhas(self._df.iloc[inicio:inicio + CHUNK_LINHAS])
+
+    @staticmethod
+    def _linhas(bloco):
+        colunas = [bloco["id"].tolist(), bloco["inicio"].to_numpy().astype("datetime64[us]").tolist(), bloco["duracao_minutos"].tolist()]
+        colunas += [bloco[coluna].astype(object).tolist() for coluna in COLUNAS_TEXTO]
+        for valores in zip(*colunas):
+            yield reports.montar_linha(*valores)
+
+
+def _quebra(grupos, chave, ordenar_por_mes=False):
+    df = grupos.groupby(chave, observed=True, sort=False)[["agendamentos", "horas"]].sum().reset_index()
+    df[chave] = df[chave].astype(str)
+    if ordenar_por_mes:
+        df = df.sort_values(chave)
+    else:
+        df = df.sort_values(["agendamentos", chave], ascending=[False, True])
+    return df[[chave, "agendamentos", "horas"]].to_dict(orient="records")
+
+
+def calcular(df, start_dt, end_dt):
+    """Resumo e quebras (formato de reports.gerar_relatorio) a partir do frame de `montar_frame`."""
+    horas = df["duracao_minutos"] / 60
+    base = pd.DataFrame({
+        "professor": df["professor"],
+        "aluno": df["aluno"],
+        "conteudo": df["conteudo"],
+        "mes": pd.Categorical(df["inicio"].to_numpy().astype("datetime64[M]").astype(str)),
+        "horas": horas,
+    })
+    # um único groupby sobre as linhas; as quebras reagregam este resultado, que é pequeno
+    grupos = (
+        base.groupby(["professor", "aluno", "conteudo", "mes"], observed=True, sort=False)
+        .agg(agendamentos=("horas", "size"), horas=("horas", "sum"))
+        .reset_index()
+    )
+
+    total = len(df)
+    return {
+        "resumo": {
+            "periodo_inicial": start_dt,
+            "periodo_final": end_dt,
+            "total_agendamentos": total,
+            "total_horas": round(float(horas.sum()), 2),
+            "media_duracao_min": round(float(df["duracao_minutos"].mean()), 1) if total else 0,
+        },
+        "by_professor": _quebra(grupos, "professor"),
+        "by_aluno": _quebra(grupos, "aluno"),
+        "by_conteudo": _quebra(grupos, "conteudo"),
+        "monthly": _quebra(grupos, "mes", ordenar_por_mes=True),
+        "agendamentos_rows": LinhasAgendamentos(df),
+    }
+
+
+def gerar_relatorio_original(start_date, end_date):
+    """
+    Implementação original em pandas: materializa todo o período em um DataFrame.
+    Mantida como referência para os testes de paridade com o caminho em SQL.
+    """
+    start_dt, end_dt, start_dt_dt, end_dt_dt = reports.resolver_periodo(start_date, end_date)
+
+    qs = (
+        Agendamento.objects.select_related("aluno", "conteudo", "professor")
+        .filter(inicio__gte=start_dt_dt, inicio__lte=end_dt_dt)
+        .order_by("inicio")
+    )
+
+    rows = []
+    for ag in qs:
+        aluno = getattr(ag, "aluno", None)
+        conteudo = getattr(ag, "conteudo", None)
+        prof = getattr(ag, "professor", None)
+        rows.append(
+            {
+                "id": ag.id,
+                "inicio": ag.inicio,
+                "duracao_minutos": ag.duracao_minutos or 0,
+                "status": ag.status,
+                "aluno": aluno.nome if aluno else "",
+                "serie": aluno.serie if aluno else "",
+                "turno": aluno.turno if aluno else "",
+                "professor": prof.nome if prof else "",
+                "especialidade": prof.especialidade if prof else "",
+                "conteudo": conteudo.nome if conteudo else "",
+                "descritor": conteudo.descritor if conteudo else "",
+            }
+        )
+
+    return relatorio_original(rows, start_dt, end_dt)
+
+
+def relatorio_original(rows, start_dt, end_dt):
+    """Parte em pandas da implementação original (uma lista de dicts por linha, um groupby por quebra)."""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        df = pd.DataFrame(
+            columns=[
+                "id",
+                "inicio",
+                "duracao_minutos",
+                "status",
+                "aluno",
+                "serie",
+                "turno",
+                "professor",
+                "especialidade",
+                "conteudo",
+                "descritor",
+            ]
+        )
+
+    # Cálculos e transformações
+    df["duracao_horas"] = df["duracao_minutos"].fillna(0) / 60
+    df["inicio"] = pd.to_datetime(df["inicio"], errors="coerce").dt.tz_localize(None)
+    df["mes"] = df["inicio"].dt.to_period("M").astype(str)
+
+    total_agendamentos = len(df)
+    total_horas = df["duracao_horas"].sum()
+    media_duracao = df["duracao_minutos"].mean() if total_agendamentos else 0
+
+    # Agrupamentos (DataFrames)
+    by_professor = (
+        df.groupby("professor")
+        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
+        .reset_index()
+        .sort_values("agendamentos", ascending=False)
+    )
+
+    by_aluno = (
+        df.groupby("aluno")
+        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
+        .reset_index()
+        .sort_values("agendamentos", ascending=False)
+    )
+
+    by_conteudo = (
+        df.groupby("conteudo")
+        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
+        .reset_index()
+        .sort_values("agendamentos", ascending=False)
+    )
+
+    monthly = (
+        df.groupby("mes")
+        .agg(agendamentos=("id", "count"), horas=("duracao_horas", "sum"))
+        .reset_index()
+        .sort_values("mes")
+    )
+
+    resumo = {
+        "periodo_inicial": start_dt,
+        "periodo_final": end_dt,
+        "total_agendamentos": int(total_agendamentos),
+        "total_horas": round(float(total_horas), 2),
+        "media_duracao_min": round(float(media_duracao or 0), 1),
+    }
+
+    def df_to_list(df_obj, cols=None):
+        if df_obj is None:
+            return []
+        if cols:
+            df_obj = df_obj[cols]
+        return df_obj.fillna("").to_dict(orient="records")
+
+    return {
+        "resumo": resumo,
+        "by_professor": df_to_list(by_professor, cols=["professor", "agendamentos", "horas"]),
+        "by_aluno": df_to_list(by_aluno, cols=["aluno", "agendamentos", "horas"]),
+        "by_conteudo": df_to_list(by_conteudo, cols=["conteudo", "agendamentos", "horas"]),
+        "monthly": df_to_list(monthly, cols=["mes", "agendamentos", "horas"]),
+        "agendamentos_rows": df.fillna("").to_dict(orient="records"),
+    }
+
+
+# DADOS SINTÉTICOS E MEDIÇÃO
+
+def dados_sinteticos(n, semente=0):
+    """
+    Tuplas no formato de CAMPOS e os cadastros correspondentes,
+    com cardinalidades parecidas com as reais.
+    """
+    rnd = random.Random(semente)
+    n_alunos, n_profs, n_conteudos = max(n // 20, 1), max(n // 500, 1), 40
+    cadastros = {
+        "aluno_id": (range(1, n_alunos + 1), {
+            "aluno": [f"Aluno {i}" for i in range(n_alunos)],
+            "serie": [str(i % 9 + 1) for i in range(n_alunos)],
+            "turno": [("Manhã", "Tarde")[i % 2] for i in range(n_alunos)],
+        }),
+        "professor_id": (range(1, n_profs + 1), {
+            "professor": [f"Professor {i}" for i in range(n_profs)],
+            "especialidade": [("Exatas", "Humanas", None)[i % 3] for i in range(n_profs)],
+        }),
+        "conteudo_id": (range(1, n_conteudos + 1), {
+            "conteudo": [f"Conteúdo {i}" for i in range(n_conteudos)],
+            "descritor": [f"D{i % 12}" for i in range(n_conteudos)],
+        }),
+    }
+    base = datetime(2024, 1, 1, 11, 0, tzinfo=dt_timezone.utc)
+    tuplas = [
+        (pk, base + timedelta(minutes=pk * 7), rnd.choice((30, 45, 50, 60)), rnd.choice(STATUS),
+         rnd.randint(1, n_alunos), rnd.randint(1, n_profs), rnd.randint(1, n_conteudos))
+        for pk in range(1, n + 1)
+    ]
+    return tuplas, cadastros
+
+
+def linhas_com_nomes(tuplas, cadastros):
+    """As mesmas linhas como o caminho original as lê (objetos relacionados já resolvidos)."""
+    atributos = [
+        [valores[coluna] for coluna in valores]
+        for _, valores in (cadastros[fk] for fk in CAMPOS[4:])
+    ]
+    for pk, inicio, duracao, status, *fks in tuplas:
+        textos = [vals[fk - 1] for fk, colunas in zip(fks, atributos) for vals in colunas]
+        yield (pk, inicio, duracao, status, *textos)
+
+
+def _cronometrar(func):
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = func()
+    return time.perf_counter() - inicio, resultado
+
+
+def _cronometrar(func):
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = func()
+    return time.perf_counter() - inicio, resultado
+
+
+def _conferir(novo, referencia):
+    """O motor vetorizado tem de dar o mesmo relatório da implementação original."""
+    assert novo["resumo"] == referencia["resumo"], "resumo diferente"
+    for secao, chave in (("by_professor", "professor"), ("by_aluno", "aluno"), ("by_conteudo", "conteudo"), ("monthly", "mes")):
+        a = {i[chave]: (i["agendamentos"], round(i["horas"], 6)) for i in novo[secao]}
+        b = {i[chave]: (i["agendamentos"], round(i["horas"], 6)) for i in referencia[secao]}
+        assert a == b, f"{secao} diferente"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--sem-original", action="store_true", help="Não mede o caminho original (economiza memória)")
+    options = parser.parse_args(argv)
+
+    print(f'{"linhas":>9} {"original":>10} {"vetorizado":>11} {"+ linhas":>10} {"ganho":>7}')
+    for n in options.linhas:
+        tuplas, cadastros = dados_sinteticos(n)
+        inicio, fim = tuplas[0][1].date(), tuplas[-1][1].date()
+
+        original = referencia = None
+        if not options.sem_original:
+            com_nomes = list(linhas_com_nomes(tuplas, cadastros))
+            original, referencia = _cronometrar(
+                lambda: relatorio_original([dict(zip(COLUNAS, t)) for t in com_nomes], inicio, fim)
+            )
+            del com_nomes
+        vetorizado, report = _cronometrar(lambda: calcular(montar_frame(tuplas, cadastros), inicio, fim))
+        materializar, _ = _cronometrar(lambda: list(report["agendamentos_rows"]))
+        if referencia is not None:
+            _conferir(report, referencia)
+        del report, referencia, tuplas
+
+        ganho = f"{original / vetorizado:6.1f}x" if original else "-"
+        original = f"{original:9.2f}s" if original else "-"
+        print(f"{n:>9} {original:>10} {vetorizado:>10.2f}s {materializar:>9.2f}s {ganho:>7}")
+
+
+if __name__ == "__main__":
+    main()